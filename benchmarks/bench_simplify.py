@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Benchmark track simplification on a synthetic random-walk track.
+
+Usage:
+    python benchmarks/bench_simplify.py [number_of_fixes] [tolerance_m]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pettracer.simplify import douglas_peucker, radial_distance
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    rng = np.random.default_rng(42)
+    xy = np.cumsum(rng.normal(0, 1, (n, 2)), axis=0)
+    t = np.arange(n) * 10.0
+
+    cases = [
+        ("douglas_peucker", lambda: douglas_peucker(xy, tolerance)),
+        ("douglas_peucker (SED)", lambda: douglas_peucker(xy, tolerance, t=t)),
+        ("radial_distance", lambda: radial_distance(xy, tolerance)),
+        ("radial_distance (5 min)", lambda: radial_distance(xy, tolerance, t=t, max_interval=300)),
+    ]
+    print(f"fixes: {n}, tolerance: {tolerance} m")
+    for name, fn in cases:
+        start = time.perf_counter()
+        kept = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<26} {elapsed * 1000:9.1f} ms  kept {len(kept):>8} ({100 * len(kept) / n:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized trajectory metrics against a per-object Python loop.
+
+Usage:
+    python benchmarks/bench_trajectory.py [number_of_fixes]
+"""
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pettracer.trajectory import EARTH_RADIUS_M, PositionArrays, compute_metrics
+from pettracer.types import LastPos
+
+
+def make_positions(n: int):
+    rng = np.random.default_rng(42)
+    lat = 51.40 + np.cumsum(rng.normal(0, 1e-5, n))
+    lon = -1.08 + np.cumsum(rng.normal(0, 1e-5, n))
+    t0 = datetime(2025, 12, 31, tzinfo=timezone.utc)
+    return [
+        LastPos(id=i, posLat=float(lat[i]), posLong=float(lon[i]), fixS=3, fixP=1, horiPrec=10,
+                sat=9, rssi=100, acc=2, flags=0, timeMeasure=t0 + timedelta(seconds=10 * i), timeDb=None)
+        for i in range(n)
+    ]
+
+
+def loop_metrics(positions):
+    """Reference implementation: one haversine/bearing per pair of LastPos objects."""
+    distances, speeds, bearings, cumulative = [], [], [], [0.0]
+    for a, b in zip(positions, positions[1:]):
+        phi1, phi2 = math.radians(a.posLat), math.radians(b.posLat)
+        dphi = phi2 - phi1
+        dlmb = math.radians(b.posLong - a.posLong)
+        h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+        d = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+        dt = (b.timeMeasure - a.timeMeasure).total_seconds()
+        y = math.sin(dlmb) * math.cos(phi2)
+        x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlmb)
+        distances.append(d)
+        speeds.append(d / dt if dt > 0 else float("nan"))
+        bearings.append(math.degrees(math.atan2(y, x)) % 360)
+        cumulative.append(cumulative[-1] + d)
+    return distances, speeds, bearings, cumulative
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    positions = make_positions(n)
+    arrays = PositionArrays.from_positions(positions)
+
+    loop_s = best_of(lambda: loop_metrics(positions))
+    convert_s = best_of(lambda: PositionArrays.from_positions(positions))
+    vector_s = best_of(lambda: compute_metrics(arrays))
+
+    print(f"fixes:                    {n}")
+    print(f"python loop:              {loop_s * 1000:9.1f} ms")
+    print(f"LastPos -> arrays:        {convert_s * 1000:9.1f} ms (once per history)")
+    print(f"vectorized metrics:       {vector_s * 1000:9.1f} ms")
+    print(f"speedup (metrics only):   {loop_s / vector_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
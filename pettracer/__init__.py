@@ -14,6 +14,7 @@ from .client import (
     PetTracerDevice,
     PetTracerError,
 )
+from .errors import CircuitOpenError
 from .types import Device, MasterHs, LastPos, Details, UserProfile, LoginInfo, SubscriptionInfo
 
 __all__ = [
@@ -25,6 +26,7 @@ __all__ = [
     "PetTracerClient",
     "PetTracerDevice",
     "PetTracerError",
+    "CircuitOpenError",
     "Device",
     "MasterHs",
     "LastPos",
@@ -0,0 +1,228 @@
+""" Resumable, checkpointed history backfill.
+
+    A `BackfillJob` splits [start, end) into fixed windows for every device,
+    fetches them through `get_ccpositions` with bounded concurrency and a
+    request-rate cap (a `TokenBucket`, see `pettracer.ratelimit`), and records
+    finished windows in a JSON checkpoint file. The checkpoint is written
+    atomically in a worker thread, every `checkpoint_every` windows and when
+    the run ends. Running the same job again with the same checkpoint skips
+    the finished windows, so an interrupted onboarding resumes where it
+    stopped (a crash re-fetches at most the windows since the last write).
+    Failed windows, including errors raised by `on_positions`, are reported
+    and retried on the next run. Window requests run as `Priority.BULK`, so
+    with a client scheduler they only use capacity left over by interactive
+    calls.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union, TYPE_CHECKING
+import asyncio
+import inspect
+import json
+import os
+
+from .client import PetTracerError
+from .ratelimit import TokenBucket
+from .scheduler import Priority
+from .types import LastPos
+
+if TYPE_CHECKING:
+    from .client import PetTracerClient
+
+
+CHECKPOINT_VERSION = 1
+
+Window = Tuple[int, int, int]  # (device_id, from_ms, to_ms)
+PositionsCallback = Callable[[int, int, int, List[LastPos]], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class BackfillResult:
+    """Outcome of one `BackfillJob.run`."""
+    planned: int = 0
+    completed: int = 0
+    skipped: int = 0
+    positions: int = 0
+    failed: Dict[Window, Exception] = field(default_factory=dict)
+    collected: Dict[int, List[LastPos]] = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        """True when every planned window has been fetched (now or in an earlier run)."""
+        return not self.failed and self.completed + self.skipped == self.planned
+
+
+class BackfillJob:
+    """Fetch position history for many devices, resumable via a checkpoint file.
+
+    Example:
+        >>> job = BackfillJob(client, start, end, checkpoint_path="backfill.json",
+        ...                   on_positions=store_positions)
+        >>> result = await job.run()     # re-run after a crash to resume
+    """
+
+    def __init__(
+        self,
+        client: "PetTracerClient",
+        start: datetime,
+        end: datetime,
+        device_ids: Optional[Sequence[int]] = None,
+        window: timedelta = timedelta(days=1),
+        checkpoint_path: Optional[str] = None,
+        concurrency: int = 4,
+        max_rate: Union[float, TokenBucket, None] = 2.0,
+        on_positions: Optional[PositionsCallback] = None,
+        timeout: int = 30,
+        checkpoint_every: int = 10,
+    ):
+        """Initialize the job.
+
+        Args:
+            client: authenticated PetTracerClient
+            start: start of the history to fetch (timezone-aware)
+            end: end of the history to fetch (exclusive)
+            device_ids: devices to backfill (default: all devices of the account)
+            window: length of one `getccpositions` request
+            checkpoint_path: JSON file recording finished windows (None: no checkpointing)
+            concurrency: maximum requests in flight
+            max_rate: maximum request starts per second, or a TokenBucket to share
+                (None: only the client's own rate limiter applies)
+            on_positions: called (sync or async) with (device_id, from_ms, to_ms, positions)
+                for each finished window; when omitted, positions are collected in the result
+            timeout: per-request timeout in seconds
+            checkpoint_every: finished windows between checkpoint writes
+
+        Raises:
+            PetTracerError: for an empty range or invalid window/concurrency
+        """
+        if end <= start:
+            raise PetTracerError("Backfill end must be after start")
+        if window.total_seconds() <= 0 or concurrency < 1 or checkpoint_every < 1:
+            raise PetTracerError("Backfill window must be positive, concurrency and checkpoint_every at least 1")
+        self.client = client
+        self.start_ms = int(start.timestamp() * 1000)
+        self.end_ms = int(end.timestamp() * 1000)
+        self.window_ms = int(window.total_seconds() * 1000)
+        self.device_ids = list(device_ids) if device_ids is not None else None
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = concurrency
+        self.on_positions = on_positions
+        self.timeout = timeout
+        self.checkpoint_every = checkpoint_every
+        if isinstance(max_rate, TokenBucket):
+            self._limiter: Optional[TokenBucket] = max_rate
+        else:
+            self._limiter = TokenBucket(max_rate, burst=1) if max_rate else None
+        self._done: Dict[int, Set[int]] = {}
+        self._unsaved = 0
+        self._checkpoint_lock = asyncio.Lock()
+
+    def plan(self, device_ids: Sequence[int]) -> List[Window]:
+        """All windows for the given devices, oldest first per device."""
+        windows = []
+        for dev in device_ids:
+            t = self.start_ms
+            while t < self.end_ms:
+                windows.append((dev, t, min(t + self.window_ms, self.end_ms)))
+                t += self.window_ms
+        return windows
+
+    def _load_checkpoint(self) -> None:
+        self._done = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise PetTracerError(f"Cannot read backfill checkpoint {self.checkpoint_path}: {exc}") from exc
+        params = (data.get("version"), data.get("start_ms"), data.get("end_ms"), data.get("window_ms"))
+        if params != (CHECKPOINT_VERSION, self.start_ms, self.end_ms, self.window_ms):
+            raise PetTracerError(
+                f"Backfill checkpoint {self.checkpoint_path} was written for a different range or window"
+            )
+        self._done = {int(dev): set(starts) for dev, starts in data.get("done", {}).items()}
+
+    def _write_checkpoint(self, data: dict) -> None:
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        # atomic on POSIX and Windows: a crash leaves either the old or the new file
+        os.replace(tmp, self.checkpoint_path)
+
+    async def _save_checkpoint(self) -> None:
+        async with self._checkpoint_lock:
+            if not self._unsaved:
+                return
+            self._unsaved = 0
+            data = {
+                "version": CHECKPOINT_VERSION,
+                "start_ms": self.start_ms,
+                "end_ms": self.end_ms,
+                "window_ms": self.window_ms,
+                "done": {str(dev): sorted(starts) for dev, starts in self._done.items()},
+            }
+            await asyncio.to_thread(self._write_checkpoint, data)
+
+    async def _mark_done(self, window: Window) -> None:
+        self._done.setdefault(window[0], set()).add(window[1])
+        if self.checkpoint_path:
+            self._unsaved += 1
+            if self._unsaved >= self.checkpoint_every:
+                await self._save_checkpoint()
+
+    async def _fetch(self, window: Window, result: BackfillResult, slots: asyncio.Semaphore) -> None:
+        dev, from_ms, to_ms = window
+        async with slots:
+            if self._limiter is not None:
+                await self._limiter.acquire()
+            try:
+                positions = await self.client.get_device(dev).get_positions(
+                    from_ms, to_ms, timeout=self.timeout, priority=Priority.BULK
+                )
+                if self.on_positions is not None:
+                    outcome = self.on_positions(dev, from_ms, to_ms, positions)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                else:
+                    result.collected.setdefault(dev, []).extend(positions)
+            except Exception as exc:
+                # HTTP errors, timeouts and errors from `on_positions` fail this window only
+                result.failed[window] = exc
+                return
+        await self._mark_done(window)
+        result.completed += 1
+        result.positions += len(positions)
+
+    async def run(self) -> BackfillResult:
+        """Fetch every window not yet recorded in the checkpoint.
+
+        Returns:
+            BackfillResult; windows in `failed` are retried on the next run
+
+        Raises:
+            PetTracerError: if the device list cannot be fetched or the checkpoint does not match
+        """
+        self._load_checkpoint()
+        device_ids = self.device_ids
+        if device_ids is None:
+            device_ids = [d.id for d in await self.client.get_all_devices(timeout=self.timeout)]
+
+        windows = self.plan(device_ids)
+        result = BackfillResult(planned=len(windows))
+        pending = []
+        for window in windows:
+            if window[1] in self._done.get(window[0], ()):
+                result.skipped += 1
+            else:
+                pending.append(window)
+
+        slots = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self._fetch(w, result, slots) for w in pending))
+        finally:
+            if self.checkpoint_path:
+                await self._save_checkpoint()
+        for dev in result.collected:
+            result.collected[dev].sort(key=lambda p: (p.timeMeasure is None, p.timeMeasure))
+        return result
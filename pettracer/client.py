@@ -2,16 +2,26 @@
     You need to own a collar, have a valid subscription, and an account.
     www.pettracer.com provides the web interface and mobile apps.
 """
-from typing import Any, List, Optional, TYPE_CHECKING
+from typing import Any, List, Optional, Sequence, TYPE_CHECKING
 from datetime import datetime
+from functools import partial
 import os
 
 import aiohttp
-import json
 
+from .errors import PetTracerError
+from .hedging import Hedger, HedgePolicy
+from .instrumentation import RequestMetrics
+from .pipeline import DEFAULT_PIPELINE, Middleware, Pipeline, Request, ResponseCache, default_middleware
+from .ratelimit import AdaptiveConcurrency, Throttle, TokenBucket
+from .resilience import BreakerPolicy, Resilience, RetryPolicy
+from .scheduler import Priority, RequestScheduler
+from .timeouts import AdaptiveTimeouts, TimeoutPolicy
 from .types import Device, LastPos
+from .warmup import ConnectionStats, ConnectionWarmer, WarmupPolicy
 
 if TYPE_CHECKING:
+    from .telegrams import TelegramTracker, TelegramUpdate
     from .types import LoginInfo, SubscriptionInfo, UserProfile
 
 
@@ -22,42 +32,94 @@ LOGIN_URL = "https://portal.pettracer.com/api/user/login"
 USER_PROFILE_URL = "https://portal.pettracer.com/api/user/profile"
 
 
-class PetTracerError(Exception):
-    pass
+def _parse_device(
+    item: Any,
+    telegrams: Optional["TelegramTracker"] = None,
+    pending: Optional[List["TelegramUpdate"]] = None,
+) -> Device:
+    """Parse a device dict; with a tracker, `fiFo` holds only telegrams not seen before.
 
+    The tracker is not changed here: its update is appended to `pending`, to be
+    committed once the whole response has parsed.
+    """
+    if telegrams is None or not isinstance(item, dict):
+        return Device.from_dict(item)
+    update = telegrams.peek(item)
+    device = Device.from_dict({**item, "fiFo": []})
+    device.fiFo = update.entries
+    if pending is not None:
+        pending.append(update)
+    return device
+
+
+def _parse_devices(data: Any, telegrams: Optional["TelegramTracker"] = None) -> List[Device]:
+    """Parse a `getccs` response."""
+    if not isinstance(data, list):
+        raise PetTracerError("Unexpected JSON structure: expected a list")
 
-def _request_headers(token: Optional[str]) -> dict:
-    """Build request headers. Token may come from parameter or env var PETTRACER_TOKEN."""
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Content-Type": "application/json",
-        "User-Agent": "pettracer-python-client/0.1",
-        "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
-    }
-    t = token or os.getenv("PETTRACER_TOKEN")
-    if t:
-        headers["Authorization"] = f"Bearer {t}"
-    return headers
+    devices = []
+    pending: List["TelegramUpdate"] = []
+    for item in data:
+        try:
+            devices.append(_parse_device(item, telegrams, pending))
+        except Exception as exc:
+            raise PetTracerError(f"Failed to parse device item: {exc}") from exc
 
+    if telegrams is not None:
+        telegrams.commit(pending)
+    return devices
 
-def _login_headers() -> dict:
-    """Return minimal headers for the API login request.
 
-    Use the same minimal headers as other API calls (no browser-specific headers).
-    """
-    headers = _request_headers(None)
-    # ensure Authorization (if any) is not present for a login attempt
-    headers.pop("Authorization", None)
-    return headers
+def _parse_ccinfo(data: Any, telegrams: Optional["TelegramTracker"] = None) -> Any:
+    """Parse a `getccinfo` response into a Device or a list of them."""
+    pending: List["TelegramUpdate"] = []
+    if isinstance(data, dict):
+        result: Any = _parse_device(data, telegrams, pending)
+    elif isinstance(data, list):
+        result = [_parse_device(item, telegrams, pending) for item in data]
+    else:
+        raise PetTracerError("Unexpected JSON structure from getccinfo: expected dict or list")
 
+    if telegrams is not None:
+        telegrams.commit(pending)
+    return result
 
-async def get_ccs_status(session: Optional[aiohttp.ClientSession] = None, token: str = None, timeout: int = 10) -> List[Device]:
+
+def _parse_positions(data: Any) -> List[LastPos]:
+    """Parse a `getccpositions` response."""
+    if not isinstance(data, list):
+        raise PetTracerError("Unexpected JSON structure from getccpositions: expected a list")
+
+    positions = []
+    for item in data:
+        try:
+            positions.append(LastPos.from_dict(item))
+        except Exception as exc:
+            raise PetTracerError(f"Failed to parse position item: {exc}") from exc
+
+    return positions
+
+
+def _parse_profile(data: Any) -> 'UserProfile':
+    """Parse a user profile response."""
+    if not isinstance(data, dict):
+        raise PetTracerError("Unexpected JSON structure from user profile: expected a dict")
+
+    from .types import UserProfile
+    return UserProfile.from_dict(data)
+
+
+async def get_ccs_status(session: Optional[aiohttp.ClientSession] = None, token: str = None, timeout: int = 10, telegrams: Optional["TelegramTracker"] = None, resilience: Optional[Resilience] = None, priority: Optional[Priority] = None, pipeline: Optional[Pipeline] = None) -> List[Device]:
     """Fetch the CCS status list from PetTracer and return parsed Device objects.
 
     Args:
         session: Optional aiohttp.ClientSession to use
         token: Optional bearer token (or set PETTRACER_TOKEN env var)
         timeout: Request timeout in seconds
+        telegrams: Optional TelegramTracker; only new `fiFo` telegrams are parsed
+        resilience: Optional retry / circuit-breaker state
+        priority: Scheduling class when `resilience` has a scheduler (default polling)
+        pipeline: Optional request middleware pipeline (default pipeline if None)
 
     Returns:
         List[Device]: parsed devices
@@ -65,37 +127,15 @@ async def get_ccs_status(session: Optional[aiohttp.ClientSession] = None, token:
     Raises:
         PetTracerError: for network or parsing issues
     """
-    headers = _request_headers(token)
-    close_session = session is None
-    sess = session or aiohttp.ClientSession()
-
-    try:
-        async with sess.get(GETCCS_URL, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
-            resp.raise_for_status()
-            try:
-                data = await resp.json()
-            except ValueError as exc:
-                raise PetTracerError("Invalid JSON response") from exc
-    except aiohttp.ClientError as exc:
-        raise PetTracerError(f"HTTP error while fetching CCS status: {exc}") from exc
-    finally:
-        if close_session:
-            await sess.close()
+    request = Request(
+        "getccs", "GET", GETCCS_URL, "fetching CCS status",
+        token=token, timeout=timeout, resilience=resilience, priority=priority,
+        parse=partial(_parse_devices, telegrams=telegrams),
+    )
+    return await (pipeline or DEFAULT_PIPELINE).send(request, session)
 
-    if not isinstance(data, list):
-        raise PetTracerError("Unexpected JSON structure: expected a list")
 
-    devices = []
-    for item in data:
-        try:
-            devices.append(Device.from_dict(item))
-        except Exception as exc:
-            raise PetTracerError(f"Failed to parse device item: {exc}") from exc
-
-    return devices
-
-
-async def get_ccinfo(payload: Any, session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10) -> Any:
+async def get_ccinfo(payload: Any, session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10, telegrams: Optional["TelegramTracker"] = None, resilience: Optional[Resilience] = None, priority: Optional[Priority] = None, pipeline: Optional[Pipeline] = None) -> Any:
     """Call the `getccinfo` endpoint with the device id payload.
 
     The `getccinfo` endpoint expects a JSON body of the form `{"devId": <int>}`.
@@ -108,6 +148,10 @@ async def get_ccinfo(payload: Any, session: Optional[aiohttp.ClientSession] = No
         session: Optional aiohttp.ClientSession to use
         token: Optional bearer token (or set PETTRACER_TOKEN env var)
         timeout: Request timeout in seconds
+        telegrams: Optional TelegramTracker; only new `fiFo` telegrams are parsed
+        resilience: Optional retry / circuit-breaker state
+        priority: Scheduling class when `resilience` has a scheduler (default polling)
+        pipeline: Optional request middleware pipeline (default pipeline if None)
 
     Returns:
         Parsed JSON response (dict/list)
@@ -128,67 +172,41 @@ async def get_ccinfo(payload: Any, session: Optional[aiohttp.ClientSession] = No
     else:
         raise PetTracerError("get_ccinfo expects payload to be an int or a dict containing 'devId' or 'id'.")
 
-    headers = _request_headers(token)
-    close_session = session is None
-    sess = session or aiohttp.ClientSession()
-
-    try:
-        async with sess.post(CCINFO_URL, json=body, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
-            resp.raise_for_status()
-            try:
-                data = await resp.json()
-            except ValueError as exc:
-                raise PetTracerError("Invalid JSON response from getccinfo") from exc
-    except aiohttp.ClientError as exc:
-        raise PetTracerError(f"HTTP error while calling getccinfo: {exc}") from exc
-    finally:
-        if close_session:
-            await sess.close()
-
-    # Normalize and parse response into typed Device objects
-    if isinstance(data, dict):
-        return Device.from_dict(data)
-    if isinstance(data, list):
-        return [Device.from_dict(item) for item in data]
+    # getccinfo only reads, so it is safe to retry despite being a POST
+    request = Request(
+        "getccinfo", "POST", CCINFO_URL, "calling getccinfo", json=body,
+        token=token, timeout=timeout, resilience=resilience, priority=priority,
+        parse=partial(_parse_ccinfo, telegrams=telegrams),
+    )
+    return await (pipeline or DEFAULT_PIPELINE).send(request, session)
 
-    raise PetTracerError("Unexpected JSON structure from getccinfo: expected dict or list")
 
-
-async def login(username: str, password: str, session: Optional[aiohttp.ClientSession] = None, token_env: bool = False, timeout: int = 10) -> dict:
+async def login(username: str, password: str, session: Optional[aiohttp.ClientSession] = None, token_env: bool = False, timeout: int = 10, resilience: Optional[Resilience] = None, pipeline: Optional[Pipeline] = None) -> dict:
     """Authenticate against the PetTracer site using JSON credentials.
 
     This helper performs a single JSON POST to `LOGIN_URL` with
     {"username":..., "password":...}. The response MUST be JSON and
     contain a token in one of the fields: `access_token`, `token`, or
-    `id_token`. On success returns {"token": <token>, "session": <aiohttp.ClientSession>}.
+    `id_token`. On success returns {"token": <token>, "session": <session passed in>}.
 
     Raises `PetTracerError` for HTTP errors, non-JSON responses, or when
     no access token is present in the response.
 
     If `token_env` is True the discovered token is stored in the
     `PETTRACER_TOKEN` environment variable.
+
+    With `resilience`, login goes through the circuit breaker but is never
+    retried. `pipeline` selects the request middleware (default pipeline if None).
     """
-    close_session = session is None
-    sess = session or aiohttp.ClientSession()
     # API expects JSON payload with keys `login` and `password` (not `username`).
     payload = {"login": username, "password": password}
-    body = json.dumps(payload)
-    headers = _login_headers()
-    # ensure Content-Length matches the JSON body we are sending
-    headers["Content-Length"] = str(len(body.encode("utf-8")))
-
-    try:
-        async with sess.post(LOGIN_URL, json=payload, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
-            resp.raise_for_status()
-            try:
-                j = await resp.json()
-            except ValueError:
-                raise PetTracerError("Login response is not JSON; JSON login required")
-    except aiohttp.ClientError as exc:
-        raise PetTracerError(f"HTTP error during login: {exc}") from exc
-    finally:
-        if close_session:
-            await sess.close()
+    request = Request(
+        "login", "POST", LOGIN_URL, "logging in", json=payload, authenticate=False,
+        timeout=timeout, idempotent=False, resilience=resilience, priority=Priority.INTERACTIVE,
+    )
+    j = await (pipeline or DEFAULT_PIPELINE).send(request, session)
+    if not isinstance(j, dict):
+        raise PetTracerError("Login response is not a JSON object; JSON login required")
 
     token = j.get("access_token") or j.get("token") or j.get("id_token")
     if not token:
@@ -197,10 +215,10 @@ async def login(username: str, password: str, session: Optional[aiohttp.ClientSe
     if token_env:
         os.environ["PETTRACER_TOKEN"] = token
 
-    return {"token": token, "session": sess, "data": j}
+    return {"token": token, "session": session, "data": j}
 
 
-async def get_ccpositions(dev_id: int, filter_time: int, to_time: int, session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10) -> List[LastPos]:
+async def get_ccpositions(dev_id: int, filter_time: int, to_time: int, session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10, resilience: Optional[Resilience] = None, priority: Optional[Priority] = None, pipeline: Optional[Pipeline] = None) -> List[LastPos]:
     """Fetch device positions for a given time range.
 
     The `getccpositions` endpoint returns device positions with a time range filter.
@@ -212,6 +230,9 @@ async def get_ccpositions(dev_id: int, filter_time: int, to_time: int, session:
         session: Optional aiohttp.ClientSession to use
         token: Optional bearer token (or set PETTRACER_TOKEN env var)
         timeout: Request timeout in seconds
+        resilience: Optional retry / circuit-breaker state
+        priority: Scheduling class when `resilience` has a scheduler (default polling)
+        pipeline: Optional request middleware pipeline (default pipeline if None)
 
     Returns:
         List[LastPos]: list of position records
@@ -220,61 +241,26 @@ async def get_ccpositions(dev_id: int, filter_time: int, to_time: int, session:
         PetTracerError: for network, validation, or parsing issues
     """
     body = {"devId": dev_id, "filterTime": filter_time, "toTime": to_time}
-    headers = _request_headers(token)
-    close_session = session is None
-    sess = session or aiohttp.ClientSession()
-
-    try:
-        async with sess.post(CCPOSITIONS_URL, json=body, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
-            resp.raise_for_status()
-            try:
-                data = await resp.json()
-            except ValueError as exc:
-                raise PetTracerError("Invalid JSON response from getccpositions") from exc
-    except aiohttp.ClientError as exc:
-        raise PetTracerError(f"HTTP error while calling getccpositions: {exc}") from exc
-    finally:
-        if close_session:
-            await sess.close()
-
-    if not isinstance(data, list):
-        raise PetTracerError("Unexpected JSON structure from getccpositions: expected a list")
-
-    positions = []
-    for item in data:
-        try:
-            positions.append(LastPos.from_dict(item))
-        except Exception as exc:
-            raise PetTracerError(f"Failed to parse position item: {exc}") from exc
-
-    return positions
-
-
-async def get_user_profile(session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10) -> 'UserProfile':
+    scale = 1.0
+    if resilience is not None and resilience.timeouts is not None:
+        # larger ranges take longer; adaptive timeouts scale with the span
+        scale = resilience.timeouts.range_scale(to_time - filter_time)
+    request = Request(
+        "getccpositions", "POST", CCPOSITIONS_URL, "calling getccpositions", json=body,
+        token=token, timeout=timeout, resilience=resilience, priority=priority, scale=scale,
+        parse=_parse_positions,
+    )
+    return await (pipeline or DEFAULT_PIPELINE).send(request, session)
+
+
+async def get_user_profile(session: Optional[aiohttp.ClientSession] = None, token: Optional[str] = None, timeout: int = 10, resilience: Optional[Resilience] = None, priority: Optional[Priority] = None, pipeline: Optional[Pipeline] = None) -> 'UserProfile':
     """Fetch the account profile for the current token and return a typed UserProfile."""
-    headers = _request_headers(token)
-    close_session = session is None
-    sess = session or aiohttp.ClientSession()
-
-    try:
-        async with sess.get(USER_PROFILE_URL, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as resp:
-            resp.raise_for_status()
-            try:
-                data = await resp.json()
-            except ValueError as exc:
-                raise PetTracerError("Invalid JSON response from user profile") from exc
-    except aiohttp.ClientError as exc:
-        raise PetTracerError(f"HTTP error while fetching user profile: {exc}") from exc
-    finally:
-        if close_session:
-            await sess.close()
-
-    # expect a dict
-    if not isinstance(data, dict):
-        raise PetTracerError("Unexpected JSON structure from user profile: expected a dict")
-
-    from .types import UserProfile
-    return UserProfile.from_dict(data)
+    request = Request(
+        "profile", "GET", USER_PROFILE_URL, "fetching user profile",
+        token=token, timeout=timeout, resilience=resilience, priority=priority,
+        parse=_parse_profile,
+    )
+    return await (pipeline or DEFAULT_PIPELINE).send(request, session)
 
 
 class PetTracerClient:
@@ -293,16 +279,71 @@ class PetTracerClient:
         >>> positions = await device.get_positions(1767152926491, 1767174526491)
     """
     
-    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        telegram_tracker: Optional['TelegramTracker'] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker_policy: Optional[BreakerPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        adaptive_concurrency: Optional[AdaptiveConcurrency] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        timeout_policy: Optional[TimeoutPolicy] = None,
+        response_cache: Optional[ResponseCache] = None,
+        middleware: Sequence[Middleware] = (),
+        warmup: Optional[WarmupPolicy] = None,
+    ):
         """Initialize PetTracer client.
         
         Args:
             session: Optional aiohttp.ClientSession to reuse (e.g., from Home Assistant)
+            telegram_tracker: Optional TelegramTracker; when set, `Device.fiFo` only
+                contains telegrams not returned by an earlier poll
+            retry_policy: Optional RetryPolicy; transient read failures are retried
+                with backoff (None, the default, disables retries)
+            breaker_policy: Optional BreakerPolicy; calls fail fast with
+                CircuitOpenError while the portal is down (None disables the breaker)
+            rate_limiter: Optional TokenBucket pacing every request (may be shared by clients)
+            adaptive_concurrency: Optional AIMD limit on requests in flight
+            hedge_policy: Optional HedgePolicy; slow reads are duplicated and the
+                first response wins (None disables hedging)
+            scheduler: Optional RequestScheduler; requests start by priority class
+                (interactive, polling, bulk) instead of arrival order
+            timeout_policy: Optional TimeoutPolicy for adaptive per-endpoint
+                timeouts; the `timeout` arguments are used until an endpoint has
+                enough samples and always cap the adaptive budget
+                (None keeps fixed timeouts)
+            response_cache: Optional ResponseCache for read responses (also
+                coalesces identical concurrent reads)
+            middleware: Extra request middleware, outermost first, run after
+                metrics and before the cache, retries and auth
+            warmup: Optional WarmupPolicy; pre-opens connections after login and
+                keeps them warm across idle gaps
         """
         self._token: Optional[str] = None
         self._session: Optional[aiohttp.ClientSession] = session
         self._login_info: Optional['LoginInfo'] = None
         self._owns_session: bool = False
+        self._telegrams: Optional['TelegramTracker'] = telegram_tracker
+        throttle = None
+        if rate_limiter is not None or adaptive_concurrency is not None:
+            throttle = Throttle(rate_limiter, adaptive_concurrency)
+        hedger = Hedger(hedge_policy) if hedge_policy is not None else None
+        timeouts = AdaptiveTimeouts(timeout_policy) if timeout_policy is not None else None
+        self._resilience: Resilience = Resilience(
+            retry_policy, breaker_policy, throttle=throttle, hedger=hedger, scheduler=scheduler, timeouts=timeouts
+        )
+        self._metrics: RequestMetrics = RequestMetrics()
+        self._cache: Optional[ResponseCache] = response_cache
+        self._warmer: Optional[ConnectionWarmer] = ConnectionWarmer(warmup) if warmup is not None else None
+        chain: List[Middleware] = [self._metrics]
+        if self._warmer is not None:
+            chain.append(self._warmer)
+        chain.extend(middleware)
+        if response_cache is not None:
+            chain.append(response_cache)
+        self._pipeline: Pipeline = Pipeline(chain + default_middleware(), metrics=self._metrics)
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -323,6 +364,36 @@ class PetTracerClient:
         """Get the current aiohttp session."""
         return self._session
     
+    @property
+    def telegram_tracker(self) -> Optional['TelegramTracker']:
+        """Get the telegram tracker used for incremental `fiFo` ingestion."""
+        return self._telegrams
+    
+    @property
+    def resilience(self) -> Resilience:
+        """Get the retry / circuit-breaker state shared by this client's requests."""
+        return self._resilience
+    
+    @property
+    def pipeline(self) -> Pipeline:
+        """Get the request middleware pipeline used by this client."""
+        return self._pipeline
+    
+    @property
+    def metrics(self) -> RequestMetrics:
+        """Get per-endpoint request counters and latency/size/parse histograms."""
+        return self._metrics
+    
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """Get the response cache, if enabled."""
+        return self._cache
+    
+    @property
+    def connection_stats(self) -> Optional[ConnectionStats]:
+        """Get new vs reused connection counts (with warm-up on a client-owned session)."""
+        return self._warmer.stats if self._warmer is not None else None
+    
     @property
     def is_authenticated(self) -> bool:
         """Check if the client is authenticated."""
@@ -414,12 +485,23 @@ class PetTracerClient:
         """
         # If we don't have a session, create one that we'll own
         if self._session is None:
-            self._session = aiohttp.ClientSession()
+            trace_configs = [self._metrics.trace_config()]
+            if self._warmer is not None:
+                trace_configs.append(self._warmer.stats.trace_config())
+                self._session = aiohttp.ClientSession(connector=self._warmer.connector(), trace_configs=trace_configs)
+            else:
+                self._session = aiohttp.ClientSession(trace_configs=trace_configs)
             self._owns_session = True
         
-        result = await login(username, password, session=self._session, timeout=timeout)
+        result = await login(username, password, session=self._session, timeout=timeout, resilience=self._resilience, pipeline=self._pipeline)
+        if self._token is not None:
+            self._metrics.token_refreshes += 1
         self._token = result["token"]
         
+        if self._warmer is not None:
+            # pre-connect while the caller processes the login
+            self._warmer.start(self._session)
+        
         # Parse and store login info
         from .types import LoginInfo
         self._login_info = LoginInfo.from_dict(result["data"])
@@ -430,15 +512,18 @@ class PetTracerClient:
         Call this when done with the client to properly clean up resources.
         Only closes the session if it was created by this client (not passed in).
         """
+        if self._warmer is not None:
+            await self._warmer.stop()
         if self._owns_session and self._session:
             await self._session.close()
             self._session = None
     
-    async def get_all_devices(self, timeout: int = 10) -> List[Device]:
+    async def get_all_devices(self, timeout: int = 10, priority: Priority = Priority.POLLING) -> List[Device]:
         """Fetch all devices for the authenticated user.
         
         Args:
             timeout: Request timeout in seconds
+            priority: Scheduling class (used when the client has a scheduler)
             
         Returns:
             List of Device objects
@@ -449,11 +534,50 @@ class PetTracerClient:
         if not self.is_authenticated:
             raise PetTracerError("Not authenticated. Call login() first.")
         
-        return await get_ccs_status(
+        devices = await get_ccs_status(
             session=self._session,
             token=self._token,
-            timeout=timeout
+            timeout=timeout,
+            telegrams=self._telegrams,
+            resilience=self._resilience,
+            priority=priority,
+            pipeline=self._pipeline
         )
+        self._metrics.devices_polled += len(devices)
+        return devices
+    
+    async def backfill(
+        self,
+        start: datetime,
+        end: datetime,
+        checkpoint_path: Optional[str] = None,
+        **kwargs: Any
+    ):
+        """Fetch position history for all (or selected) devices, resumably.
+        
+        Runs a `pettracer.backfill.BackfillJob`; calling again with the same
+        range and checkpoint file skips windows that already finished.
+        
+        Args:
+            start: Start of the history to fetch (timezone-aware datetime)
+            end: End of the history to fetch (exclusive)
+            checkpoint_path: JSON file recording finished windows
+            **kwargs: Further BackfillJob options (device_ids, window, concurrency,
+                max_rate, on_positions, timeout, checkpoint_every)
+            
+        Returns:
+            BackfillResult with counts, failed windows and (without `on_positions`)
+            the collected positions per device
+            
+        Raises:
+            PetTracerError: If not authenticated or the checkpoint does not match
+        """
+        if not self.is_authenticated:
+            raise PetTracerError("Not authenticated. Call login() first.")
+        
+        from .backfill import BackfillJob
+        job = BackfillJob(self, start, end, checkpoint_path=checkpoint_path, **kwargs)
+        return await job.run()
     
     def get_device(self, device_id: int) -> "PetTracerDevice":
         """Get a device-specific client for the given device ID.
@@ -472,11 +596,12 @@ class PetTracerClient:
         
         return PetTracerDevice(device_id, self)
     
-    async def get_user_profile(self, timeout: int = 10):
+    async def get_user_profile(self, timeout: int = 10, priority: Priority = Priority.INTERACTIVE):
         """Fetch the user profile information and update stored login data.
         
         Args:
             timeout: Request timeout in seconds
+            priority: Scheduling class (used when the client has a scheduler)
             
         Returns:
             UserProfile object
@@ -490,7 +615,10 @@ class PetTracerClient:
         profile = await get_user_profile(
             session=self._session,
             token=self._token,
-            timeout=timeout
+            timeout=timeout,
+            resilience=self._resilience,
+            priority=priority,
+            pipeline=self._pipeline
         )
         
         # Update stored login info with profile data
@@ -533,11 +661,12 @@ class PetTracerDevice:
         """Get the device ID."""
         return self._device_id
     
-    async def get_info(self, timeout: int = 10):
+    async def get_info(self, timeout: int = 10, priority: Priority = Priority.INTERACTIVE):
         """Fetch detailed information for this device.
         
         Args:
             timeout: Request timeout in seconds
+            priority: Scheduling class (used when the client has a scheduler)
             
         Returns:
             Device object or list of Device objects
@@ -549,14 +678,19 @@ class PetTracerDevice:
             payload=self._device_id,
             session=self._client.session,
             token=self._client.token,
-            timeout=timeout
+            timeout=timeout,
+            telegrams=self._client.telegram_tracker,
+            resilience=self._client.resilience,
+            priority=priority,
+            pipeline=self._client.pipeline
         )
     
     async def get_positions(
         self,
         filter_time: int,
         to_time: int,
-        timeout: int = 10
+        timeout: int = 10,
+        priority: Priority = Priority.POLLING
     ) -> List[LastPos]:
         """Fetch position history for this device within a time range.
         
@@ -564,6 +698,7 @@ class PetTracerDevice:
             filter_time: Start time in milliseconds since epoch
             to_time: End time in milliseconds since epoch
             timeout: Request timeout in seconds
+            priority: Scheduling class (use `Priority.BULK` for bulk history)
             
         Returns:
             List of LastPos objects with position data
@@ -577,5 +712,8 @@ class PetTracerDevice:
             to_time=to_time,
             session=self._client.session,
             token=self._client.token,
-            timeout=timeout
+            timeout=timeout,
+            resilience=self._client.resilience,
+            priority=priority,
+            pipeline=self._client.pipeline
         )
@@ -0,0 +1,243 @@
+""" Hotspot (home station) coverage analytics.
+
+    `CoverageEngine` accumulates, per receiving hotspot, how often collars were
+    heard, with what rssi and how far away. Statistics live in fixed-size
+    histograms (`array('d')` counts over fixed rssi bins and log-spaced
+    distance bins), so memory stays constant no matter how long the engine
+    runs; quantiles and the coverage radius are read from the histograms.
+
+    Hotspot locations come from `Device.masterHs` (`posLat`/`posLong`).
+    Receptions come from polls (`Device.lastPos` heard by `masterHs` with
+    `lastRssi`) and from fiFo telegrams (`FifoEntry.receivedBy`, with the
+    telegram's latitude/longitude).
+"""
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+
+from .geo import point_distance
+from .types import Device, FifoEntry
+
+
+class HotspotStats:
+    """Constant-memory reception statistics of one hotspot."""
+
+    def __init__(self, hs_id: int, rssi_range: Tuple[int, int], distance_edges: array):
+        self.hs_id = hs_id
+        self.lat: Optional[float] = None
+        self.lon: Optional[float] = None
+        self.receptions = 0
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.devices: Dict[int, int] = {}
+        self._rssi_lo, self._rssi_hi = rssi_range
+        self._rssi_counts = array("d", bytes(8 * (self._rssi_hi - self._rssi_lo + 1)))
+        self._rssi_sum = 0.0
+        self._rssi_n = 0
+        self._rssi_min: Optional[int] = None
+        self._rssi_max: Optional[int] = None
+        self._dist_edges = distance_edges
+        self._dist_counts = array("d", bytes(8 * (len(distance_edges) + 1)))
+        self._dist_n = 0
+        self._dist_max = 0.0
+
+    def add_reception(self, device_id: Optional[int], rssi: Optional[int], distance_m: Optional[float],
+                      when: Optional[datetime] = None) -> None:
+        """Record one reception; `rssi` and `distance_m` may be unknown."""
+        self.receptions += 1
+        if device_id is not None:
+            self.devices[device_id] = self.devices.get(device_id, 0) + 1
+        if when is not None:
+            if self.first_seen is None or when < self.first_seen:
+                self.first_seen = when
+            if self.last_seen is None or when > self.last_seen:
+                self.last_seen = when
+        if rssi is not None:
+            # out-of-range readings are clamped into the edge bins
+            self._rssi_counts[min(max(int(rssi), self._rssi_lo), self._rssi_hi) - self._rssi_lo] += 1
+            self._rssi_sum += rssi
+            self._rssi_n += 1
+            self._rssi_min = rssi if self._rssi_min is None else min(self._rssi_min, rssi)
+            self._rssi_max = rssi if self._rssi_max is None else max(self._rssi_max, rssi)
+        if distance_m is not None:
+            self._dist_counts[_edge_index(self._dist_edges, distance_m)] += 1
+            self._dist_n += 1
+            self._dist_max = max(self._dist_max, distance_m)
+
+    @property
+    def rssi_mean(self) -> Optional[float]:
+        return self._rssi_sum / self._rssi_n if self._rssi_n else None
+
+    @property
+    def rssi_min(self) -> Optional[int]:
+        return self._rssi_min
+
+    @property
+    def rssi_max(self) -> Optional[int]:
+        return self._rssi_max
+
+    def rssi_quantile(self, q: float) -> Optional[int]:
+        """rssi value below which a fraction `q` of readings fall (1 unit resolution)."""
+        i = _histogram_quantile(self._rssi_counts, self._rssi_n, q)
+        return None if i is None else i + self._rssi_lo
+
+    def rssi_histogram(self) -> Dict[int, int]:
+        """Non-empty rssi bins as {rssi: count}."""
+        return {i + self._rssi_lo: int(c) for i, c in enumerate(self._rssi_counts) if c}
+
+    def coverage_radius(self, q: float = 0.95) -> Optional[float]:
+        """Distance in metres within which a fraction `q` of located receptions fall.
+
+        Resolved to the upper edge of the log-spaced distance bin; `q=1.0`
+        returns the largest distance seen.
+        """
+        if q >= 1.0:
+            return self._dist_max if self._dist_n else None
+        i = _histogram_quantile(self._dist_counts, self._dist_n, q)
+        if i is None:
+            return None
+        return min(self._dist_edges[i] if i < len(self._dist_edges) else self._dist_max, self._dist_max)
+
+    @property
+    def located_receptions(self) -> int:
+        """Receptions with a known distance to the hotspot."""
+        return self._dist_n
+
+
+def _edge_index(edges: array, value: float) -> int:
+    """Index of the first edge >= value (len(edges) for overflow)."""
+    lo, hi = 0, len(edges)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if edges[mid] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _histogram_quantile(counts: array, total: int, q: float) -> Optional[int]:
+    if not total:
+        return None
+    target = max(q, 0.0) * total
+    running = 0.0
+    for i, c in enumerate(counts):
+        running += c
+        if c and running >= target:
+            return i
+    return len(counts) - 1
+
+
+class CoverageEngine:
+    """Accumulate per-hotspot reception statistics from polls and telegrams.
+
+    Example:
+        >>> engine = CoverageEngine()
+        >>> engine.add_devices(await client.get_all_devices())     # on every poll
+        >>> engine.add_fifo(device.fiFo, device_id=device.id)      # new telegrams
+        >>> hs = engine.hotspot(10775)
+        >>> hs.receptions, hs.rssi_quantile(0.5), hs.coverage_radius(0.95)
+    """
+
+    def __init__(
+        self,
+        rssi_range: Tuple[int, int] = (-150, 150),
+        min_distance_m: float = 1.0,
+        max_distance_m: float = 100_000.0,
+        bins_per_decade: int = 10,
+    ):
+        """Initialize the engine.
+
+        Args:
+            rssi_range: inclusive rssi range covered by 1-unit histogram bins
+            min_distance_m: upper edge of the first distance bin
+            max_distance_m: distances beyond this share one overflow bin
+            bins_per_decade: log-spaced distance bins per factor of ten
+        """
+        if rssi_range[0] >= rssi_range[1]:
+            raise ValueError("rssi_range must be (low, high) with low < high")
+        if not 0 < min_distance_m < max_distance_m:
+            raise ValueError("need 0 < min_distance_m < max_distance_m")
+        self.rssi_range = rssi_range
+        decades = math.log10(max_distance_m / min_distance_m)
+        n = int(math.ceil(decades * bins_per_decade))
+        self._edges = array("d", (min_distance_m * 10 ** (i / bins_per_decade) for i in range(n + 1)))
+        self._hotspots: Dict[int, HotspotStats] = {}
+        self._last_pos_id: Dict[int, int] = {}
+
+    def hotspot(self, hs_id: int) -> Optional[HotspotStats]:
+        """Statistics of one hotspot, if it has been seen."""
+        return self._hotspots.get(hs_id)
+
+    def hotspots(self) -> List[int]:
+        """Ids of all hotspots seen."""
+        return sorted(self._hotspots)
+
+    def _stats(self, hs_id: int) -> HotspotStats:
+        stats = self._hotspots.get(hs_id)
+        if stats is None:
+            stats = self._hotspots[hs_id] = HotspotStats(hs_id, self.rssi_range, self._edges)
+        return stats
+
+    def _distance_to(self, stats: HotspotStats, lat: Optional[float], lon: Optional[float]) -> Optional[float]:
+        if stats.lat is None or stats.lon is None or lat is None or lon is None:
+            return None
+        return point_distance(stats.lat, stats.lon, lat, lon)
+
+    def add_device(self, device: Device) -> bool:
+        """Fold one polled device: hotspot location and its latest reception.
+
+        The latest position counts as one reception by `masterHs` (with
+        `lastRssi`) the first time its `lastPos.id` is seen.
+
+        Returns:
+            True if a reception was recorded
+        """
+        hs = device.masterHs
+        if hs is None or hs.id is None:
+            return False
+        stats = self._stats(hs.id)
+        if hs.posLat is not None and hs.posLong is not None:
+            stats.lat, stats.lon = hs.posLat, hs.posLong
+        pos = device.lastPos
+        if pos is None or pos.id is None or self._last_pos_id.get(device.id) == pos.id:
+            return False
+        self._last_pos_id[device.id] = pos.id
+        stats.add_reception(
+            device.id,
+            device.lastRssi,
+            self._distance_to(stats, pos.posLat, pos.posLong),
+            pos.timeMeasure or device.lastContact,
+        )
+        return True
+
+    def add_devices(self, devices: Iterable[Device]) -> int:
+        """Fold one poll; returns the number of receptions recorded."""
+        return sum(self.add_device(d) for d in devices)
+
+    def add_fifo(self, entries: Iterable[FifoEntry], device_id: Optional[int] = None) -> int:
+        """Fold telegram receptions (`receivedBy`) of fiFo entries.
+
+        Feed each telegram once, e.g. the new entries returned via a
+        `TelegramTracker`.
+
+        Returns:
+            Number of receptions recorded
+        """
+        recorded = 0
+        for entry in entries:
+            if entry is None:
+                continue
+            t = entry.telegram
+            lat = t.latitude if t is not None else None
+            lon = t.longitude if t is not None else None
+            when = (t.timeDev or t.timeDb) if t is not None else None
+            dev = device_id if device_id is not None else (t.deviceId if t is not None else None)
+            for r in entry.receivedBy or ():
+                if r is None or r.hsId is None:
+                    continue
+                stats = self._stats(r.hsId)
+                stats.add_reception(dev, r.rssi, self._distance_to(stats, lat, lon), when)
+                recorded += 1
+        return recorded
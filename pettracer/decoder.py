@@ -0,0 +1,214 @@
+""" Table-driven batch decoding of `TelegramPacket` payloads.
+
+    `TelegramPacket.telegram` is a hex string. `telegram_bytes` turns a batch
+    of packets into one zero-padded uint8 matrix (one row per packet), and
+    `decode_telegrams` extracts every field of a `FieldSpec` layout as a whole
+    column at once: the bytes of a field are combined with a single weighted
+    sum, then shifted, masked, sign-extended and scaled per column, so there
+    is no per-packet or per-byte Python branching. `rssi_by_hotspot` groups
+    `ReceivedBy` readings of many fiFo entries per hotspot.
+
+    The wire format of the telegrams is not documented; callers supply the
+    layout for their firmware.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import FifoEntry, TelegramPacket
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """One field of a telegram payload.
+
+    Args:
+        name: output column name
+        offset: first byte of the field
+        size: number of bytes (1-8)
+        byteorder: "big" or "little"
+        signed: two's complement value (applied after `shift`/`bits`)
+        shift: right shift applied to the raw integer (for bit fields)
+        bits: number of bits kept after shifting (None keeps all)
+        scale: multiply the value by this factor (result becomes float64)
+    """
+    name: str
+    offset: int
+    size: int = 1
+    byteorder: str = "big"
+    signed: bool = False
+    shift: int = 0
+    bits: Optional[int] = None
+    scale: Optional[float] = None
+
+    def __post_init__(self):
+        if not 1 <= self.size <= 8:
+            raise ValueError(f"Field {self.name}: size must be between 1 and 8 bytes")
+        if self.byteorder not in ("big", "little"):
+            raise ValueError(f"Field {self.name}: byteorder must be 'big' or 'little'")
+        if self.offset < 0:
+            raise ValueError(f"Field {self.name}: offset must not be negative")
+
+
+@dataclass
+class DecodedTelegrams:
+    """Column-oriented decoded batch.
+
+    `fields[name]` holds one value per packet; `present[name]` is False where
+    the payload was too short (or not valid hex) and the value is 0 / NaN.
+    """
+    ids: np.ndarray
+    lengths: np.ndarray
+    fields: Dict[str, np.ndarray] = field(default_factory=dict)
+    present: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _payloads(packets: Iterable) -> Tuple[List[Optional[int]], List[str]]:
+    ids: List[Optional[int]] = []
+    hexes: List[str] = []
+    for p in packets:
+        if isinstance(p, FifoEntry):
+            p = p.telegram
+        if isinstance(p, TelegramPacket):
+            ids.append(p.id)
+            hexes.append(p.telegram or "")
+        else:
+            ids.append(None)
+            hexes.append(p or "")
+    return ids, hexes
+
+
+def telegram_bytes(payloads: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert hex payloads into a zero-padded byte matrix.
+
+    Args:
+        payloads: hex strings (invalid strings are treated as empty)
+
+    Returns:
+        (matrix, lengths): uint8 array of shape (n, max_len) and byte length per row
+    """
+    chunks = []
+    for s in payloads:
+        try:
+            chunks.append(bytes.fromhex(s))
+        except (TypeError, ValueError):
+            chunks.append(b"")
+    lengths = np.fromiter((len(c) for c in chunks), dtype=np.int64, count=len(chunks))
+    width = int(lengths.max()) if lengths.size else 0
+    matrix = np.zeros((len(chunks), width), dtype=np.uint8)
+    if width:
+        flat = np.frombuffer(b"".join(chunks), dtype=np.uint8)
+        rows = np.repeat(np.arange(len(chunks)), lengths)
+        starts = np.cumsum(lengths) - lengths
+        cols = np.arange(flat.size) - np.repeat(starts, lengths)
+        matrix[rows, cols] = flat
+    return matrix, lengths
+
+
+def _extract(matrix: np.ndarray, lengths: np.ndarray, spec: FieldSpec) -> Tuple[np.ndarray, np.ndarray]:
+    n = matrix.shape[0]
+    present = lengths >= spec.offset + spec.size
+    cols = np.zeros((n, spec.size), dtype=np.uint64)
+    available = matrix[:, spec.offset:spec.offset + spec.size]
+    cols[:, :available.shape[1]] = available
+    exponents = np.arange(spec.size, dtype=np.uint64) * np.uint64(8)
+    if spec.byteorder == "big":
+        exponents = exponents[::-1]
+    raw = (cols << exponents).sum(axis=1, dtype=np.uint64)
+
+    width = spec.size * 8
+    if spec.shift:
+        raw >>= np.uint64(spec.shift)
+        width -= spec.shift
+    if spec.bits is not None:
+        raw &= np.uint64((1 << spec.bits) - 1)
+        width = min(width, spec.bits)
+    if spec.signed and width < 64:
+        sign = np.uint64(1 << (width - 1))
+        value = (raw ^ sign).astype(np.int64) - np.int64(1 << (width - 1))
+    else:
+        value = raw.view(np.int64) if spec.signed else raw.astype(np.int64)
+
+    if spec.scale is not None:
+        out = value.astype(np.float64) * spec.scale
+        out[~present] = np.nan
+        return out, present
+    value[~present] = 0
+    return value, present
+
+
+def decode_telegrams(packets: Iterable, layout: Sequence[FieldSpec]) -> DecodedTelegrams:
+    """Decode a batch of telegrams with a field layout.
+
+    Args:
+        packets: TelegramPacket, FifoEntry or raw hex strings
+        layout: fields to extract
+
+    Returns:
+        DecodedTelegrams with one column per field
+    """
+    ids, hexes = _payloads(packets)
+    matrix, lengths = telegram_bytes(hexes)
+    result = DecodedTelegrams(
+        ids=np.array([-1 if i is None else i for i in ids], dtype=np.int64),
+        lengths=lengths,
+    )
+    for spec in layout:
+        result.fields[spec.name], result.present[spec.name] = _extract(matrix, lengths, spec)
+    return result
+
+
+@dataclass
+class HotspotRssi:
+    """RSSI readings of one hotspot across telegrams."""
+    hs_id: int
+    count: int
+    mean: float
+    min: int
+    max: int
+    median: float
+
+
+def rssi_by_hotspot(entries: Iterable[FifoEntry]) -> Dict[int, HotspotRssi]:
+    """Summarize `ReceivedBy` rssi per receiving hotspot.
+
+    Args:
+        entries: fiFo entries, e.g. from `TelegramTracker.retained`
+
+    Returns:
+        Mapping of hotspot id to HotspotRssi
+    """
+    hs: List[int] = []
+    rssi: List[int] = []
+    for entry in entries:
+        for r in (entry.receivedBy or ()) if entry is not None else ():
+            if r is not None and r.hsId is not None and r.rssi is not None:
+                hs.append(r.hsId)
+                rssi.append(r.rssi)
+    if not hs:
+        return {}
+    hs_arr = np.asarray(hs, dtype=np.int64)
+    rssi_arr = np.asarray(rssi, dtype=np.float64)
+    order = np.lexsort((rssi_arr, hs_arr))
+    hs_arr, rssi_arr = hs_arr[order], rssi_arr[order]
+    ids, starts, counts = np.unique(hs_arr, return_index=True, return_counts=True)
+    sums = np.add.reduceat(rssi_arr, starts)
+    # values are sorted within each group, so min/max/median are index lookups
+    lo = starts + (counts - 1) // 2
+    hi = starts + counts // 2
+    medians = (rssi_arr[lo] + rssi_arr[hi]) / 2.0
+    return {
+        int(h): HotspotRssi(
+            hs_id=int(h),
+            count=int(c),
+            mean=float(s / c),
+            min=int(rssi_arr[st]),
+            max=int(rssi_arr[st + c - 1]),
+            median=float(m),
+        )
+        for h, st, c, s, m in zip(ids, starts, counts, sums, medians)
+    }
@@ -0,0 +1,197 @@
+""" Multi-pet proximity (encounter) detection.
+
+    For every pair of devices whose tracks overlap in time and space, both
+    tracks are swept over the merged, sorted timeline of the pair: each track
+    is interpolated at the other's fix times, distances are computed in one
+    vectorized call, and consecutive close samples are grouped into encounter
+    intervals.
+
+    `find_encounters` computes each device's time span and bounding box once,
+    so a pair that cannot meet is rejected in constant time. For D devices the
+    cost is O(D^2) of those checks plus one O((n_a + n_b) log(n_a + n_b))
+    sweep per remaining pair, instead of comparing every fix against every
+    other fix. Many devices that all share one area still need a sweep for
+    every pair.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .trajectory import EARTH_RADIUS_M, PositionArrays, haversine
+
+
+@dataclass
+class Encounter:
+    """Interval during which two devices were within the distance threshold."""
+    device_a: int
+    device_b: int
+    start: datetime
+    end: datetime
+    min_distance_m: float
+    samples: int
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+def _interp_at(track: PositionArrays, times: np.ndarray, max_gap_s: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Interpolate a track at `times`; `valid` is False outside it or across long gaps."""
+    t = track.t
+    valid = (times >= t[0]) & (times <= t[-1])
+    if t.size > 1:
+        j = np.clip(np.searchsorted(t, times, side="left"), 1, t.size - 1)
+        on_fix = (t[j] == times) | (t[j - 1] == times)
+        valid &= on_fix | (t[j] - t[j - 1] <= max_gap_s)
+    lat = np.interp(times, t, track.lat)
+    lon = np.interp(times, t, track.lon)
+    return lat, lon, valid
+
+
+class _Extent(NamedTuple):
+    """Time span and bounding box of one track."""
+    t_min: float
+    t_max: float
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+    abs_lat: float
+
+    @classmethod
+    def of(cls, track: PositionArrays) -> "_Extent":
+        return cls(
+            float(track.t[0]), float(track.t[-1]),
+            float(track.lat.min()), float(track.lat.max()),
+            float(track.lon.min()), float(track.lon.max()),
+            float(np.abs(track.lat).max()),
+        )
+
+
+def _apart(a: _Extent, b: _Extent, distance_m: float) -> bool:
+    """True if two tracks do not overlap in time or their boxes are further apart than `distance_m`."""
+    if max(a.t_min, b.t_min) > min(a.t_max, b.t_max):
+        return True
+    margin_lat = np.degrees(distance_m / EARTH_RADIUS_M)
+    margin_lon = margin_lat / max(np.cos(np.radians(max(a.abs_lat, b.abs_lat))), 1e-6)
+    return bool(
+        a.lat_min - margin_lat > b.lat_max or b.lat_min - margin_lat > a.lat_max
+        or a.lon_min - margin_lon > b.lon_max or b.lon_min - margin_lon > a.lon_max
+    )
+
+
+def pair_encounters(
+    id_a: int,
+    a: PositionArrays,
+    id_b: int,
+    b: PositionArrays,
+    distance_m: float = 20.0,
+    max_gap: timedelta = timedelta(minutes=2),
+    merge_gap: Optional[timedelta] = None,
+    min_duration: timedelta = timedelta(0),
+) -> List[Encounter]:
+    """Find encounter intervals between two time-ordered tracks.
+
+    Args:
+        id_a, a: first device id and its positions
+        id_b, b: second device id and its positions
+        distance_m: maximum separation in metres to count as together
+        max_gap: do not interpolate across fixes further apart than this
+        merge_gap: join encounters separated by less than this (defaults to `max_gap`)
+        min_duration: drop encounters shorter than this
+
+    Returns:
+        List of Encounter in time order
+    """
+    if len(a) == 0 or len(b) == 0 or _apart(_Extent.of(a), _Extent.of(b), distance_m):
+        return []
+    return _sweep(id_a, a, id_b, b, distance_m, max_gap, merge_gap, min_duration)
+
+
+def _sweep(
+    id_a: int,
+    a: PositionArrays,
+    id_b: int,
+    b: PositionArrays,
+    distance_m: float,
+    max_gap: timedelta,
+    merge_gap: Optional[timedelta],
+    min_duration: timedelta,
+) -> List[Encounter]:
+    """Sweep two tracks that overlap in time over their merged timeline."""
+    lo, hi = max(a.t[0], b.t[0]), min(a.t[-1], b.t[-1])
+    times = np.union1d(a.t[(a.t >= lo) & (a.t <= hi)], b.t[(b.t >= lo) & (b.t <= hi)])
+    max_gap_s = max_gap.total_seconds()
+    lat_a, lon_a, ok_a = _interp_at(a, times, max_gap_s)
+    lat_b, lon_b, ok_b = _interp_at(b, times, max_gap_s)
+    dist = haversine(lat_a, lon_a, lat_b, lon_b)
+    close = ok_a & ok_b & (dist <= distance_m)
+    if not close.any():
+        return []
+
+    # runs of consecutive close samples, broken where the timeline has a hole
+    linked = close[1:] & close[:-1] & (np.diff(times) <= max_gap_s)
+    run_start = close & np.concatenate(([True], ~linked))
+    run_end = close & np.concatenate((~linked, [True]))
+    starts = np.flatnonzero(run_start)
+    ends = np.flatnonzero(run_end) + 1
+
+    merge_s = (merge_gap if merge_gap is not None else max_gap).total_seconds()
+    intervals: List[List[int]] = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        if intervals and times[s] - times[intervals[-1][1] - 1] <= merge_s:
+            intervals[-1][1] = e
+        else:
+            intervals.append([s, e])
+
+    min_s = min_duration.total_seconds()
+    result = []
+    for s, e in intervals:
+        if times[e - 1] - times[s] < min_s:
+            continue
+        window = close[s:e]
+        result.append(Encounter(
+            device_a=id_a,
+            device_b=id_b,
+            start=datetime.fromtimestamp(times[s], tz=timezone.utc),
+            end=datetime.fromtimestamp(times[e - 1], tz=timezone.utc),
+            min_distance_m=float(dist[s:e][window].min()),
+            samples=int(window.sum()),
+        ))
+    return result
+
+
+def find_encounters(
+    tracks: Dict[int, object],
+    distance_m: float = 20.0,
+    max_gap: timedelta = timedelta(minutes=2),
+    merge_gap: Optional[timedelta] = None,
+    min_duration: timedelta = timedelta(0),
+) -> List[Encounter]:
+    """Find encounters between every pair of devices.
+
+    Each device's time span and bounding box are computed once; pairs that
+    do not overlap in time, or whose boxes are further apart than
+    `distance_m`, are skipped without a sweep.
+
+    Args:
+        tracks: mapping of device id to `PositionArrays` or `LastPos` sequence
+
+    Returns:
+        List of Encounter sorted by start time
+    """
+    arrays = {
+        dev: t if isinstance(t, PositionArrays) else PositionArrays.from_positions(t)
+        for dev, t in tracks.items()
+    }
+    extents = {dev: _Extent.of(a) for dev, a in arrays.items() if len(a)}
+    result: List[Encounter] = []
+    for id_a, id_b in combinations(sorted(extents), 2):
+        if _apart(extents[id_a], extents[id_b], distance_m):
+            continue
+        result.extend(_sweep(id_a, arrays[id_a], id_b, arrays[id_b], distance_m, max_gap, merge_gap, min_duration))
+    result.sort(key=lambda e: (e.start, e.device_a, e.device_b))
+    return result
@@ -0,0 +1,10 @@
+""" Exception types shared by the client modules. """
+
+
+class PetTracerError(Exception):
+    pass
+
+
+class CircuitOpenError(PetTracerError):
+    """Raised without a request while the circuit breaker is open."""
+    pass
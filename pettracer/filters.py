@@ -0,0 +1,281 @@
+""" GPS quality filtering and smoothing for position histories.
+
+    Works on whole histories as `PositionArrays`:
+
+    1. `quality_mask` drops fixes whose `horiPrec`, `sat`, `fixS`, `fixP`,
+       `acc` or `rssi` fall outside configurable limits.
+    2. `speed_gate` removes short excursions that imply physically impossible speeds.
+    3. `kalman_smooth` runs a constant-velocity Kalman filter with an RTS
+       backward pass, using per-fix measurement noise derived from the quality
+       fields so that poor fixes are down-weighted rather than dropped.
+
+    `filter_track` chains the three steps.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .simplify import project_local
+from .trajectory import EARTH_RADIUS_M, PositionArrays, haversine
+
+
+@dataclass
+class QualityThresholds:
+    """Limits applied by `quality_mask`. A limit of None disables that check.
+
+    Fixes with a missing value for a field are not rejected by that field's check.
+    """
+    max_hori_prec: Optional[float] = None
+    min_sat: Optional[float] = 4
+    min_fix_s: Optional[float] = None
+    min_fix_p: Optional[float] = None
+    max_acc: Optional[float] = None
+    min_rssi: Optional[float] = None
+
+
+def _passes(values: np.ndarray, limit: Optional[float], upper: bool) -> np.ndarray:
+    if limit is None:
+        return np.ones(values.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        ok = values <= limit if upper else values >= limit
+    return ok | np.isnan(values)
+
+
+def quality_mask(arrays: PositionArrays, thresholds: Optional[QualityThresholds] = None) -> np.ndarray:
+    """Return a boolean mask of fixes that satisfy the quality thresholds."""
+    th = thresholds or QualityThresholds()
+    return (
+        _passes(arrays.horiPrec, th.max_hori_prec, upper=True)
+        & _passes(arrays.sat, th.min_sat, upper=False)
+        & _passes(arrays.fixS, th.min_fix_s, upper=False)
+        & _passes(arrays.fixP, th.min_fix_p, upper=False)
+        & _passes(arrays.acc, th.max_acc, upper=True)
+        & _passes(arrays.rssi, th.min_rssi, upper=False)
+    )
+
+
+def measurement_sigma(arrays: PositionArrays, base_sigma: float = 5.0, hori_prec_ref: float = 10.0, sat_ref: float = 8.0) -> np.ndarray:
+    """Per-fix measurement standard deviation in metres.
+
+    `base_sigma` applies to a fix with `horiPrec == hori_prec_ref` and
+    `sat >= sat_ref`; worse precision or fewer satellites scale it up.
+    Missing quality values use the reference.
+    """
+    hp = np.where(np.isnan(arrays.horiPrec), hori_prec_ref, arrays.horiPrec)
+    sat = np.where(np.isnan(arrays.sat), sat_ref, arrays.sat)
+    scale = np.maximum(hp / hori_prec_ref, 1.0) * np.sqrt(sat_ref / np.clip(sat, 1.0, sat_ref))
+    return base_sigma * scale
+
+
+def _hop_too_fast(arrays: PositionArrays, i: np.ndarray, j: np.ndarray, max_speed: float) -> np.ndarray:
+    d = haversine(arrays.lat[i], arrays.lon[i], arrays.lat[j], arrays.lon[j])
+    dt = arrays.t[j] - arrays.t[i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(dt > 0, d > max_speed * dt, d > 0)
+
+
+def speed_gate(arrays: PositionArrays, max_speed: float, max_run: int = 3, max_iterations: int = 5) -> np.ndarray:
+    """Mask out fixes that imply a speed above `max_speed` (m/s).
+
+    The track is cut at every impossible hop. A resulting run of at most
+    `max_run` fixes is rejected when the hop that skips over it is plausible
+    (an excursion that returns to where it left), or when it sits at either end
+    of the track next to a longer run. Genuine relocations, where the pet stays
+    at the new place, are kept. Each pass is vectorized; passes repeat on the
+    surviving fixes until nothing changes.
+
+    Returns:
+        Boolean mask of fixes to keep
+    """
+    n = len(arrays)
+    keep = np.ones(n, dtype=bool)
+    if n < 2:
+        return keep
+    for _ in range(max_iterations):
+        idx = np.flatnonzero(keep)
+        if idx.size < 2:
+            break
+        fast = _hop_too_fast(arrays, idx[:-1], idx[1:], max_speed)
+        if not fast.any():
+            break
+        # runs of fixes joined by plausible hops
+        run_id = np.concatenate(([0], np.cumsum(fast)))
+        run_start = np.concatenate(([0], np.flatnonzero(fast) + 1))
+        run_end = np.concatenate((run_start[1:], [idx.size]))
+        run_len = run_end - run_start
+        n_runs = run_len.size
+        short = run_len <= max_run
+
+        bad_run = np.zeros(n_runs, dtype=bool)
+        if n_runs > 2:
+            inner = np.arange(1, n_runs - 1)
+            skip_ok = ~_hop_too_fast(arrays, idx[run_start[inner] - 1], idx[run_end[inner]], max_speed)
+            bad_run[inner] = short[inner] & skip_ok
+        bad_run[0] |= short[0] and run_len[0] < run_len[1]
+        bad_run[-1] |= short[-1] and run_len[-1] < run_len[-2]
+        if not bad_run.any():
+            break
+        keep[idx[bad_run[run_id]]] = False
+    return keep
+
+
+def kalman_smooth(
+    arrays: PositionArrays,
+    sigma: Optional[np.ndarray] = None,
+    process_noise: float = 0.5,
+) -> PositionArrays:
+    """Smooth a track with a constant-velocity Kalman filter and RTS smoother.
+
+    The filter runs in a local metric plane. East and north share the same
+    dynamics and noise, so the covariance recursion is computed once and its
+    gains are applied to both axes. The recursion is inherently sequential and
+    runs as a scalar loop over the arrays (a few microseconds per fix).
+
+    Args:
+        arrays: time-ordered positions
+        sigma: per-fix measurement std in metres (defaults to `measurement_sigma`)
+        process_noise: acceleration noise spectral density in m^2/s^3
+
+    Returns:
+        A copy of `arrays` with smoothed `lat`/`lon`
+    """
+    n = len(arrays)
+    if n < 2:
+        return arrays.take(np.arange(n))
+    if sigma is None:
+        sigma = measurement_sigma(arrays)
+    xy = project_local(arrays.lat, arrays.lon)
+    r = (np.asarray(sigma, dtype=np.float64) ** 2).tolist()
+    dts = np.diff(arrays.t, prepend=arrays.t[0]).tolist()
+    zx = xy[:, 0].tolist()
+    zy = xy[:, 1].tolist()
+    q = process_noise
+
+    # filtered state per axis [p, v] and shared covariance [[a, b], [b, c]]
+    fx = [0.0] * n
+    fvx = [0.0] * n
+    fy = [0.0] * n
+    fvy = [0.0] * n
+    pa = [0.0] * n
+    pb = [0.0] * n
+    pc = [0.0] * n
+    # predicted covariance for step i (used by the smoother)
+    qa = [0.0] * n
+    qb = [0.0] * n
+    qc = [0.0] * n
+
+    px, vx, py, vy = zx[0], 0.0, zy[0], 0.0
+    a, b, c = r[0], 0.0, 100.0
+    fx[0], fvx[0], fy[0], fvy[0] = px, vx, py, vy
+    pa[0], pb[0], pc[0] = a, b, c
+    for i in range(1, n):
+        dt = dts[i]
+        # predict
+        px += vx * dt
+        py += vy * dt
+        a = a + 2 * dt * b + dt * dt * c + q * dt ** 3 / 3
+        b = b + dt * c + q * dt * dt / 2
+        c = c + q * dt
+        qa[i], qb[i], qc[i] = a, b, c
+        # update
+        s = a + r[i]
+        k0 = a / s
+        k1 = b / s
+        ex = zx[i] - px
+        ey = zy[i] - py
+        px += k0 * ex
+        vx += k1 * ex
+        py += k0 * ey
+        vy += k1 * ey
+        a, b, c = (1 - k0) * a, (1 - k0) * b, c - k1 * b
+        fx[i], fvx[i], fy[i], fvy[i] = px, vx, py, vy
+        pa[i], pb[i], pc[i] = a, b, c
+
+    # Rauch-Tung-Striebel backward pass: G = P_f F^T P_pred^-1
+    sx, svx, sy, svy = fx[-1], fvx[-1], fy[-1], fvy[-1]
+    out_x = [0.0] * n
+    out_y = [0.0] * n
+    out_x[-1], out_y[-1] = sx, sy
+    for i in range(n - 2, -1, -1):
+        dt = dts[i + 1]
+        a, b, c = pa[i], pb[i], pc[i]
+        # P_f F^T
+        m00, m01 = a + dt * b, b
+        m10, m11 = b + dt * c, c
+        na, nb, nc = qa[i + 1], qb[i + 1], qc[i + 1]
+        det = na * nc - nb * nb
+        if det <= 0:
+            g00 = g01 = g10 = g11 = 0.0
+        else:
+            ia, ib, ic = nc / det, -nb / det, na / det
+            g00, g01 = m00 * ia + m01 * ib, m00 * ib + m01 * ic
+            g10, g11 = m10 * ia + m11 * ib, m10 * ib + m11 * ic
+        # differences between smoothed and predicted state at i + 1
+        dpx = sx - (fx[i] + fvx[i] * dt)
+        dvx = svx - fvx[i]
+        dpy = sy - (fy[i] + fvy[i] * dt)
+        dvy = svy - fvy[i]
+        sx, svx = fx[i] + g00 * dpx + g01 * dvx, fvx[i] + g10 * dpx + g11 * dvx
+        sy, svy = fy[i] + g00 * dpy + g01 * dvy, fvy[i] + g10 * dpy + g11 * dvy
+        out_x[i], out_y[i] = sx, sy
+
+    k = np.pi / 180.0 * EARTH_RADIUS_M
+    cos_lat0 = np.cos(np.radians(arrays.lat.mean()))
+    smoothed = arrays.take(np.arange(n))
+    smoothed.lat = arrays.lat[0] + np.asarray(out_y) / k
+    smoothed.lon = arrays.lon[0] + np.asarray(out_x) / (k * cos_lat0)
+    return smoothed
+
+
+@dataclass
+class FilterResult:
+    """Output of `filter_track`.
+
+    `index` holds the row numbers of the retained fixes in the input arrays.
+    """
+    arrays: PositionArrays
+    index: np.ndarray
+    rejected_quality: int
+    rejected_speed: int
+
+
+def filter_track(
+    track,
+    thresholds: Optional[QualityThresholds] = None,
+    max_speed: Optional[float] = 15.0,
+    smooth: bool = True,
+    base_sigma: float = 5.0,
+    process_noise: float = 0.5,
+) -> FilterResult:
+    """Run quality filtering, speed gating and smoothing over a whole history.
+
+    Args:
+        track: `PositionArrays` or a sequence of `LastPos` records
+        thresholds: quality limits (defaults to `QualityThresholds()`)
+        max_speed: maximum plausible speed in m/s, or None to skip the gate
+        smooth: apply `kalman_smooth` to the surviving fixes
+        base_sigma: measurement std in metres for a good-quality fix
+        process_noise: Kalman acceleration noise in m^2/s^3
+
+    Returns:
+        FilterResult with the cleaned arrays and rejection counts
+    """
+    arrays = track if isinstance(track, PositionArrays) else PositionArrays.from_positions(track)
+    q_mask = quality_mask(arrays, thresholds)
+    index = np.flatnonzero(q_mask)
+    kept = arrays.take(index)
+    rejected_speed = 0
+    if max_speed is not None:
+        s_mask = speed_gate(kept, max_speed)
+        rejected_speed = int((~s_mask).sum())
+        index = index[s_mask]
+        kept = kept.take(s_mask)
+    if smooth:
+        kept = kalman_smooth(kept, measurement_sigma(kept, base_sigma=base_sigma), process_noise=process_noise)
+    return FilterResult(
+        arrays=kept,
+        index=index,
+        rejected_quality=int((~q_mask).sum()),
+        rejected_speed=rejected_speed,
+    )
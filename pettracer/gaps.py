@@ -0,0 +1,180 @@
+""" Coverage-gap detection and targeted refetch.
+
+    A stored track has a hole wherever two consecutive fixes (sorted by
+    `timeMeasure`) are further apart than the device's reporting interval
+    allows. `find_gaps` locates those holes in one vectorized pass, including
+    missing data at the start and end of the requested range. `fetch_windows`
+    merges nearby holes into a small number of `getccpositions` windows and
+    `refetch_gaps` fetches only those windows instead of whole days.
+
+    The interval per reporting mode (`Device.mode`) is not published; pass a
+    `mode_intervals` mapping for your collars, otherwise the interval is
+    estimated from the median spacing of the track itself.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .scheduler import Priority
+from .types import LastPos
+
+if TYPE_CHECKING:
+    from .client import PetTracerDevice
+
+
+@dataclass
+class Gap:
+    """Interval with no fixes, between the surrounding fixes (or range bounds)."""
+    start: datetime
+    end: datetime
+    expected_missing: int
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+def _times(track) -> np.ndarray:
+    if isinstance(track, np.ndarray):
+        return np.sort(track.astype(np.float64))
+    t = [p.timeMeasure.timestamp() for p in track if p is not None and p.timeMeasure is not None]
+    return np.sort(np.asarray(t, dtype=np.float64))
+
+
+def estimate_interval(track) -> Optional[timedelta]:
+    """Median spacing between consecutive fixes, or None with fewer than two fixes."""
+    t = np.unique(_times(track))
+    if t.size < 2:
+        return None
+    return timedelta(seconds=float(np.median(np.diff(t))))
+
+
+def expected_interval(
+    mode: Optional[int],
+    track=(),
+    mode_intervals: Optional[Dict[int, timedelta]] = None,
+    default: timedelta = timedelta(minutes=1),
+) -> timedelta:
+    """Reporting interval for a device: mode mapping, else track estimate, else `default`."""
+    if mode_intervals and mode in mode_intervals:
+        return mode_intervals[mode]
+    return estimate_interval(track) or default
+
+
+def find_gaps(
+    track,
+    start: datetime,
+    end: datetime,
+    interval: timedelta,
+    tolerance: float = 2.0,
+) -> List[Gap]:
+    """Find holes in a track relative to the expected reporting interval.
+
+    Args:
+        track: `LastPos` records or an array of epoch seconds (any order)
+        start: start of the range the track should cover
+        end: end of the range the track should cover
+        interval: expected time between fixes
+        tolerance: a hole is reported when the spacing exceeds `tolerance * interval`
+
+    Returns:
+        List of Gap in time order
+    """
+    step = interval.total_seconds()
+    if step <= 0:
+        raise ValueError("interval must be positive")
+    t0, t1 = start.timestamp(), end.timestamp()
+    t = _times(track)
+    t = t[(t >= t0) & (t <= t1)]
+    # range bounds act as virtual fixes so leading / trailing holes are found too
+    bounds = np.concatenate(([t0], t, [t1]))
+    spacing = np.diff(bounds)
+    limit = tolerance * step
+    # a hole touching a range bound only needs one interval of slack
+    limit_arr = np.full(spacing.shape, limit)
+    limit_arr[0] = limit_arr[-1] = step * max(tolerance - 1.0, 1.0)
+    if t.size == 0:
+        limit_arr[:] = 0.0
+    idx = np.flatnonzero(spacing > limit_arr)
+    gaps = []
+    for i in idx.tolist():
+        a, b = float(bounds[i]), float(bounds[i + 1])
+        gaps.append(Gap(
+            start=datetime.fromtimestamp(a, tz=timezone.utc),
+            end=datetime.fromtimestamp(b, tz=timezone.utc),
+            expected_missing=max(int(np.ceil((b - a) / step)) - 1, 1),
+        ))
+    return gaps
+
+
+def fetch_windows(
+    gaps: Sequence[Gap],
+    merge_within: timedelta = timedelta(minutes=30),
+    max_window: timedelta = timedelta(days=1),
+) -> List[Tuple[int, int]]:
+    """Turn gaps into `getccpositions` windows in milliseconds.
+
+    Gaps closer than `merge_within` share one request; windows longer than
+    `max_window` are split.
+    """
+    merged: List[List[float]] = []
+    merge_s = merge_within.total_seconds()
+    for g in sorted(gaps, key=lambda g: g.start):
+        a, b = g.start.timestamp(), g.end.timestamp()
+        if merged and a - merged[-1][1] <= merge_s:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    max_s = max_window.total_seconds()
+    windows = []
+    for a, b in merged:
+        while a < b:
+            stop = min(b, a + max_s)
+            windows.append((int(a * 1000), int(np.ceil(stop * 1000))))
+            a = stop
+    return windows
+
+
+async def refetch_gaps(
+    device: "PetTracerDevice",
+    positions: Iterable[LastPos],
+    start: datetime,
+    end: datetime,
+    interval: Optional[timedelta] = None,
+    mode: Optional[int] = None,
+    mode_intervals: Optional[Dict[int, timedelta]] = None,
+    tolerance: float = 2.0,
+    merge_within: timedelta = timedelta(minutes=30),
+    max_window: timedelta = timedelta(days=1),
+    timeout: int = 10,
+) -> Tuple[List[LastPos], List[Tuple[int, int]]]:
+    """Fetch only the windows where the stored track has holes.
+
+    Args:
+        device: PetTracerDevice to fetch from
+        positions: positions already stored for [start, end]
+        interval: expected reporting interval (default: from `mode` / the track)
+
+    Returns:
+        (new positions not already stored, windows requested in milliseconds)
+
+    Raises:
+        PetTracerError: if a request fails
+    """
+    stored = list(positions)
+    if interval is None:
+        interval = expected_interval(mode, stored, mode_intervals)
+    windows = fetch_windows(find_gaps(stored, start, end, interval, tolerance), merge_within, max_window)
+    known_ids = {p.id for p in stored if p is not None and p.id is not None}
+    fresh: List[LastPos] = []
+    for from_ms, to_ms in windows:
+        for p in await device.get_positions(from_ms, to_ms, timeout=timeout, priority=Priority.BULK):
+            if p.id is not None:
+                if p.id in known_ids:
+                    continue
+                known_ids.add(p.id)
+            fresh.append(p)
+    fresh.sort(key=lambda p: (p.timeMeasure is None, p.timeMeasure))
+    return fresh, windows
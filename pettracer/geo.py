@@ -0,0 +1,18 @@
+""" Plain-Python geodesy helpers.
+
+    Scalar great-circle math shared by the modules that work on one fix at a
+    time (rollups, segmentation, coverage). Unlike `trajectory` this module
+    does not need the optional `numpy` dependency.
+"""
+import math
+
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def point_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres between two points given in degrees."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = math.sin((p2 - p1) * 0.5) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) * 0.5) ** 2
+    return 2.0 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
@@ -0,0 +1,312 @@
+""" Client-side geofencing for live and historical positions.
+
+    Zones are circles or polygons. `GeofenceEngine` indexes their bounding boxes
+    in a regular lat/lon grid; each evaluation bins the points into grid cells,
+    looks up only the zones overlapping those cells, applies a vectorized
+    bounding-box test and finally an exact (haversine or point-in-polygon) test
+    on the surviving candidates. Enter/exit events are emitted by comparing each
+    device's inside/outside state over time.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+import time
+
+import numpy as np
+
+from .trajectory import EARTH_RADIUS_M, PositionArrays, haversine
+from .types import Device
+
+
+@dataclass
+class CircleZone:
+    """Circular zone given by centre and radius in metres."""
+    zone_id: str
+    lat: float
+    lon: float
+    radius_m: float
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lon, max_lat, max_lon) enclosing the circle."""
+        dlat = np.degrees(self.radius_m / EARTH_RADIUS_M)
+        cos_lat = max(np.cos(np.radians(self.lat)), 1e-6)
+        dlon = np.degrees(self.radius_m / (EARTH_RADIUS_M * cos_lat))
+        return (self.lat - dlat, self.lon - dlon, self.lat + dlat, self.lon + dlon)
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        return haversine(self.lat, self.lon, lat, lon) <= self.radius_m
+
+
+@dataclass
+class PolygonZone:
+    """Polygon zone given as a list of (lat, lon) vertices; closing is implicit."""
+    zone_id: str
+    vertices: List[Tuple[float, float]]
+
+    def __post_init__(self):
+        if len(self.vertices) < 3:
+            raise ValueError("PolygonZone needs at least three vertices")
+        v = np.asarray(self.vertices, dtype=np.float64)
+        self._lat = v[:, 0]
+        self._lon = v[:, 1]
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lon, max_lat, max_lon) of the vertices."""
+        return (float(self._lat.min()), float(self._lon.min()), float(self._lat.max()), float(self._lon.max()))
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Even-odd ray casting, vectorized over points (one pass per edge)."""
+        inside = np.zeros(np.shape(lat), dtype=bool)
+        ys, xs = self._lat, self._lon
+        j = len(ys) - 1
+        for i in range(len(ys)):
+            yi, xi, yj, xj = ys[i], xs[i], ys[j], xs[j]
+            crosses = (yi > lat) != (yj > lat)
+            if crosses.any():
+                x_at = xi + (lat - yi) * (xj - xi) / (yj - yi)
+                inside ^= crosses & (lon < x_at)
+            j = i
+        return inside
+
+
+Zone = Union[CircleZone, PolygonZone]
+
+
+@dataclass
+class EvaluationStats:
+    """Cost of one `GeofenceEngine.contains` call."""
+    points: int = 0
+    zones: int = 0
+    occupied_cells: int = 0
+    candidate_pairs: int = 0
+    exact_tests: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def pruned_ratio(self) -> float:
+        """Fraction of point/zone pairs never tested exactly."""
+        total = self.points * self.zones
+        return 1.0 - self.exact_tests / total if total else 0.0
+
+
+@dataclass
+class GeofenceEvent:
+    device_id: int
+    zone_id: str
+    kind: str  # "enter" or "exit"
+    time: Optional[datetime]
+    lat: float
+    lon: float
+
+
+@dataclass
+class _DeviceState:
+    inside: np.ndarray
+    last_t: float = field(default=-np.inf)
+
+
+class GeofenceEngine:
+    """Evaluate many zones against positions with grid-index prefiltering.
+
+    Example:
+        >>> engine = GeofenceEngine([CircleZone("home", 51.4, -1.08, 50)])
+        >>> events = engine.process_devices(await client.get_all_devices())
+        >>> history_events = engine.process_track(14758, positions)
+    """
+
+    def __init__(self, zones: Iterable[Zone] = (), cell_size_deg: float = 0.01):
+        """Initialize the engine.
+
+        Args:
+            zones: initial zones
+            cell_size_deg: grid cell size in degrees for the zone index
+        """
+        if cell_size_deg <= 0:
+            raise ValueError("cell_size_deg must be positive")
+        self._cell = cell_size_deg
+        self._zones: List[Zone] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._bboxes = np.empty((0, 4))
+        self._states: Dict[int, _DeviceState] = {}
+        self._last_stats = EvaluationStats()
+        for zone in zones:
+            self._zones.append(zone)
+        self._rebuild()
+
+    @property
+    def zones(self) -> List[Zone]:
+        """Zones currently registered, in column order of `contains` results."""
+        return list(self._zones)
+
+    @property
+    def last_stats(self) -> EvaluationStats:
+        """Stats for the most recent evaluation."""
+        return self._last_stats
+
+    def add_zone(self, zone: Zone) -> None:
+        """Register a zone. Existing per-device state is extended (outside)."""
+        if any(z.zone_id == zone.zone_id for z in self._zones):
+            raise ValueError(f"Duplicate zone id: {zone.zone_id}")
+        self._zones.append(zone)
+        for state in self._states.values():
+            state.inside = np.append(state.inside, False)
+        self._rebuild()
+
+    def remove_zone(self, zone_id: str) -> None:
+        """Remove a zone by id; no exit events are emitted for it."""
+        keep = [i for i, z in enumerate(self._zones) if z.zone_id != zone_id]
+        if len(keep) == len(self._zones):
+            raise KeyError(zone_id)
+        self._zones = [self._zones[i] for i in keep]
+        for state in self._states.values():
+            state.inside = state.inside[keep]
+        self._rebuild()
+
+    def inside_zones(self, device_id: int) -> Set[str]:
+        """Zone ids the device was last seen inside."""
+        state = self._states.get(device_id)
+        if state is None:
+            return set()
+        return {self._zones[i].zone_id for i in np.flatnonzero(state.inside)}
+
+    def _rebuild(self) -> None:
+        self._grid = {}
+        self._bboxes = np.array([z.bbox for z in self._zones], dtype=np.float64).reshape(-1, 4)
+        for zi, (lat0, lon0, lat1, lon1) in enumerate(self._bboxes):
+            for ci in range(int(np.floor(lat0 / self._cell)), int(np.floor(lat1 / self._cell)) + 1):
+                for cj in range(int(np.floor(lon0 / self._cell)), int(np.floor(lon1 / self._cell)) + 1):
+                    self._grid.setdefault((ci, cj), []).append(zi)
+
+    def contains(self, lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+        """Return an (n_points, n_zones) boolean matrix of zone membership.
+
+        Cost figures for the call are available from `last_stats`.
+        """
+        start = time.perf_counter()
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        n, z = lat.size, len(self._zones)
+        result = np.zeros((n, z), dtype=bool)
+        stats = EvaluationStats(points=n, zones=z)
+        if n == 0 or z == 0:
+            stats.elapsed_s = time.perf_counter() - start
+            self._last_stats = stats
+            return result
+
+        ci = np.floor(lat / self._cell).astype(np.int64)
+        cj = np.floor(lon / self._cell).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        ci_s, cj_s = ci[order], cj[order]
+        boundary = np.flatnonzero((np.diff(ci_s) != 0) | (np.diff(cj_s) != 0)) + 1
+        starts = np.concatenate(([0], boundary))
+        ends = np.concatenate((boundary, [n]))
+        stats.occupied_cells = starts.size
+
+        # gather candidate points per zone from the cells it overlaps
+        candidates: Dict[int, List[np.ndarray]] = {}
+        for s, e in zip(starts, ends):
+            zone_ids = self._grid.get((int(ci_s[s]), int(cj_s[s])))
+            if zone_ids:
+                rows = order[s:e]
+                for zi in zone_ids:
+                    candidates.setdefault(zi, []).append(rows)
+
+        for zi, parts in candidates.items():
+            rows = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            stats.candidate_pairs += rows.size
+            lat0, lon0, lat1, lon1 = self._bboxes[zi]
+            plat, plon = lat[rows], lon[rows]
+            in_box = (plat >= lat0) & (plat <= lat1) & (plon >= lon0) & (plon <= lon1)
+            rows = rows[in_box]
+            if rows.size:
+                stats.exact_tests += rows.size
+                result[rows, zi] = self._zones[zi].contains(lat[rows], lon[rows])
+
+        stats.elapsed_s = time.perf_counter() - start
+        self._last_stats = stats
+        return result
+
+    def _transitions(self, device_id: int, t: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> List[GeofenceEvent]:
+        if t.size == 0:
+            return []
+        inside = self.contains(lat, lon)
+        state = self._states.get(device_id)
+        if state is None:
+            # first observation establishes the state without emitting events
+            state = _DeviceState(inside=inside[0].copy())
+            self._states[device_id] = state
+        # ignore fixes not newer than what we have already processed
+        fresh = t > state.last_t
+        if not fresh.any():
+            return []
+        t, lat, lon, inside = t[fresh], lat[fresh], lon[fresh], inside[fresh]
+
+        stacked = np.vstack((state.inside[np.newaxis, :], inside))
+        change = stacked[1:] != stacked[:-1]
+        rows, cols = np.nonzero(change)
+        events = [
+            GeofenceEvent(
+                device_id=device_id,
+                zone_id=self._zones[c].zone_id,
+                kind="enter" if inside[r, c] else "exit",
+                time=datetime.fromtimestamp(t[r], tz=timezone.utc),
+                lat=float(lat[r]),
+                lon=float(lon[r]),
+            )
+            for r, c in zip(rows, cols)
+        ]
+        state.inside = inside[-1].copy()
+        state.last_t = float(t[-1])
+        return events
+
+    def process_track(self, device_id: int, track) -> List[GeofenceEvent]:
+        """Evaluate a position history and return enter/exit events in time order.
+
+        Args:
+            device_id: device the positions belong to
+            track: `PositionArrays` or a sequence of `LastPos` records
+
+        Returns:
+            List of GeofenceEvent
+        """
+        arrays = track if isinstance(track, PositionArrays) else PositionArrays.from_positions(track)
+        return self._transitions(device_id, arrays.t, arrays.lat, arrays.lon)
+
+    def process_devices(self, devices: Iterable[Device]) -> List[GeofenceEvent]:
+        """Evaluate the `lastPos` of each device (e.g. from `get_all_devices`).
+
+        All devices are evaluated in one `contains` call.
+        """
+        live = [
+            d for d in devices
+            if d.lastPos is not None and d.lastPos.posLat is not None
+            and d.lastPos.posLong is not None and d.lastPos.timeMeasure is not None
+        ]
+        if not live:
+            return []
+        lat = np.array([d.lastPos.posLat for d in live])
+        lon = np.array([d.lastPos.posLong for d in live])
+        inside = self.contains(lat, lon)
+        events: List[GeofenceEvent] = []
+        for row, d in enumerate(live):
+            t = d.lastPos.timeMeasure.timestamp()
+            state = self._states.get(d.id)
+            if state is None:
+                self._states[d.id] = _DeviceState(inside=inside[row].copy(), last_t=t)
+                continue
+            if t <= state.last_t:
+                continue
+            for c in np.flatnonzero(inside[row] != state.inside):
+                events.append(GeofenceEvent(
+                    device_id=d.id,
+                    zone_id=self._zones[c].zone_id,
+                    kind="enter" if inside[row, c] else "exit",
+                    time=d.lastPos.timeMeasure,
+                    lat=float(lat[row]),
+                    lon=float(lon[row]),
+                ))
+            state.inside = inside[row].copy()
+            state.last_t = t
+        return events
@@ -0,0 +1,193 @@
+""" Heatmap aggregation of position density on web-mercator tiles.
+
+    Positions are projected to web-mercator pixel space and histogrammed into
+    fixed-size grids per tile (`bins` x `bins` cells per 256 px tile) at several
+    zoom levels in a single vectorized pass per zoom. `HeatmapCache` keeps the
+    pre-aggregated grids per device and UTC day, merges new positions into them
+    incrementally, and memoizes summed query results so repeated map views do
+    not touch the raw positions again.
+"""
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .types import LastPos
+
+
+MAX_MERCATOR_LAT = 85.05112878
+
+TileKey = Tuple[int, int, int]  # (zoom, x, y)
+
+
+def mercator_tile_coords(lat: np.ndarray, lon: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fractional tile coordinates (x, y) of points at `zoom` (slippy-map convention)."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = float(1 << zoom)
+    x = (lon + 180.0) / 360.0 * n
+    phi = np.radians(lat)
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / np.pi) / 2.0 * n
+    return np.clip(x, 0, np.nextafter(n, 0)), np.clip(y, 0, np.nextafter(n, 0))
+
+
+def bin_positions(lat: np.ndarray, lon: np.ndarray, zoom: int, bins: int = 64) -> Dict[TileKey, np.ndarray]:
+    """Histogram points into `bins` x `bins` grids per tile at one zoom level.
+
+    Returns:
+        Mapping of (zoom, x, y) to a uint32 array of shape (bins, bins) indexed [row, col]
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    if lat.size == 0:
+        return {}
+    x, y = mercator_tile_coords(lat, lon, zoom)
+    gx = (x * bins).astype(np.int64)
+    gy = (y * bins).astype(np.int64)
+    tx, ty = gx // bins, gy // bins
+    cell = (gy - ty * bins) * bins + (gx - tx * bins)
+    # one flat key per (tile, cell) so a single unique() does the histogramming
+    tiles_per_axis = np.int64(1) << zoom
+    key = (ty * tiles_per_axis + tx) * (bins * bins) + cell
+    uniq, counts = np.unique(key, return_counts=True)
+    tile_id, cell_id = np.divmod(uniq, bins * bins)
+    result: Dict[TileKey, np.ndarray] = {}
+    boundaries = np.flatnonzero(np.diff(tile_id)) + 1
+    for s, e in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [tile_id.size]))):
+        t_y, t_x = divmod(int(tile_id[s]), int(tiles_per_axis))
+        grid = np.zeros(bins * bins, dtype=np.uint32)
+        grid[cell_id[s:e]] = counts[s:e]
+        result[(zoom, t_x, t_y)] = grid.reshape(bins, bins)
+    return result
+
+
+def utc_day(ts: datetime) -> date:
+    """UTC calendar day of a timestamp, as used for cache keys."""
+    return ts.astimezone(timezone.utc).date()
+
+
+class HeatmapCache:
+    """Per-device, per-day pre-aggregated heatmap tiles.
+
+    Example:
+        >>> cache = HeatmapCache(zooms=range(12, 18))
+        >>> cache.add_positions(14758, positions)
+        >>> grid = cache.tile([14758], date(2025, 12, 1), date(2025, 12, 31), 16, 32571, 21823)
+    """
+
+    def __init__(self, zooms: Iterable[int] = range(10, 18), bins: int = 64, max_cached_queries: int = 256):
+        """Initialize the cache.
+
+        Args:
+            zooms: zoom levels to pre-aggregate
+            bins: grid cells per tile side
+            max_cached_queries: size of the LRU cache for summed tile queries
+        """
+        self.zooms = sorted(set(zooms))
+        self.bins = bins
+        self._tiles: Dict[Tuple[int, date, int], Dict[Tuple[int, int], np.ndarray]] = {}
+        self._seen: Dict[Tuple[int, date], Set[int]] = {}
+        self._version = 0
+        self._queries: "OrderedDict[tuple, Tuple[int, np.ndarray]]" = OrderedDict()
+        self._max_queries = max_cached_queries
+        self.hits = 0
+        self.misses = 0
+
+    def days(self, device_id: int) -> List[date]:
+        """Days with aggregated data for a device."""
+        return sorted({d for (dev, d) in self._seen if dev == device_id})
+
+    def add_positions(self, device_id: int, positions: Iterable[LastPos]) -> int:
+        """Aggregate new positions into the per-day tiles of a device.
+
+        Records already aggregated (by `id`) are skipped, so overlapping syncs
+        do not double count.
+
+        Returns:
+            Number of positions aggregated
+        """
+        by_day: Dict[date, List[Tuple[float, float]]] = {}
+        for p in positions:
+            if p is None or p.posLat is None or p.posLong is None or p.timeMeasure is None:
+                continue
+            day = utc_day(p.timeMeasure)
+            if p.id is not None:
+                seen = self._seen.setdefault((device_id, day), set())
+                if p.id in seen:
+                    continue
+                seen.add(p.id)
+            else:
+                self._seen.setdefault((device_id, day), set())
+            by_day.setdefault(day, []).append((p.posLat, p.posLong))
+
+        added = 0
+        for day, coords in by_day.items():
+            arr = np.asarray(coords, dtype=np.float64)
+            self._add_arrays(device_id, day, arr[:, 0], arr[:, 1])
+            added += len(coords)
+        if added:
+            self._version += 1
+        return added
+
+    def add_arrays(self, device_id: int, day: date, lat: Sequence[float], lon: Sequence[float]) -> None:
+        """Aggregate raw coordinate arrays for one device and day (no de-duplication)."""
+        lat = np.asarray(lat, dtype=np.float64)
+        if lat.size:
+            self._seen.setdefault((device_id, day), set())
+            self._add_arrays(device_id, day, lat, np.asarray(lon, dtype=np.float64))
+            self._version += 1
+
+    def _add_arrays(self, device_id: int, day: date, lat: np.ndarray, lon: np.ndarray) -> None:
+        for z in self.zooms:
+            store = self._tiles.setdefault((device_id, day, z), {})
+            for (_, x, y), grid in bin_positions(lat, lon, z, self.bins).items():
+                existing = store.get((x, y))
+                store[(x, y)] = grid if existing is None else existing + grid
+
+    def tile(
+        self,
+        device_ids: Iterable[int],
+        start: date,
+        end: date,
+        zoom: int,
+        x: int,
+        y: int,
+    ) -> Optional[np.ndarray]:
+        """Summed density grid for one tile over devices and days [start, end].
+
+        Returns:
+            Read-only uint32 array of shape (bins, bins), or None if no data falls in the tile
+
+        Raises:
+            ValueError: if `zoom` is not pre-aggregated
+        """
+        if zoom not in self.zooms:
+            raise ValueError(f"Zoom {zoom} is not aggregated (available: {self.zooms})")
+        devices = tuple(sorted(set(device_ids)))
+        key = (devices, start, end, zoom, x, y)
+        cached = self._queries.get(key)
+        if cached is not None and cached[0] == self._version:
+            self._queries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+
+        total: Optional[np.ndarray] = None
+        for (dev, day) in self._seen:
+            if dev not in devices or not (start <= day <= end):
+                continue
+            grid = self._tiles.get((dev, day, zoom), {}).get((x, y))
+            if grid is not None:
+                total = grid.copy() if total is None else total + grid
+        if total is not None:
+            # shared with later cache hits
+            total.setflags(write=False)
+        self._queries[key] = (self._version, total)
+        self._queries.move_to_end(key)
+        while len(self._queries) > self._max_queries:
+            self._queries.popitem(last=False)
+        return total
+
+    def tiles_for(self, device_id: int, day: date, zoom: int) -> List[Tuple[int, int]]:
+        """(x, y) of tiles with data for a device/day at `zoom`."""
+        return sorted(self._tiles.get((device_id, day, zoom), {}))
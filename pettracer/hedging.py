@@ -0,0 +1,177 @@
+""" Hedged requests for the read endpoints.
+
+    A hedged request sends a second, identical request when the first one has
+    not answered within a delay taken from recent latencies of the same
+    endpoint (the `percentile` of the last `window` responses), then keeps
+    whichever response arrives first and cancels the other. Only the slow tail
+    is duplicated, and a budget (`max_extra_ratio` hedges per request, like the
+    retry budget) caps the extra load on the portal.
+
+    Hedging is opt-in (`PetTracerClient(hedge_policy=HedgePolicy())`) and is
+    only applied to idempotent reads; login is never hedged. With a request
+    scheduler the hedge needs a free slot of the request's priority class and
+    is skipped when there is none, so hedging never exceeds the scheduler's
+    limits.
+"""
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+import asyncio
+import time
+
+from .resilience import RetryBudget
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """Hedging settings.
+
+    Args:
+        percentile: latency percentile (0-1) used as the hedge delay
+        window: number of recent latencies kept per endpoint
+        min_samples: latencies needed before an endpoint is hedged
+        min_delay: lower bound of the hedge delay in seconds
+        max_delay: upper bound of the hedge delay in seconds
+        max_extra_ratio: hedges earned per request (0.05 = at most ~5% extra)
+        budget_cap: maximum hedges that can be saved up
+    """
+    percentile: float = 0.95
+    window: int = 200
+    min_samples: int = 20
+    min_delay: float = 0.05
+    max_delay: float = 5.0
+    max_extra_ratio: float = 0.05
+    budget_cap: float = 5.0
+
+
+class LatencyWindow:
+    """Sliding window of recent latencies with percentile lookup."""
+
+    def __init__(self, size: int):
+        self._recent: Deque[float] = deque()
+        self._sorted: List[float] = []
+        self._size = size
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def add(self, latency: float) -> None:
+        if len(self._recent) == self._size:
+            old = self._recent.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._recent.append(latency)
+        insort(self._sorted, latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile (None when empty)."""
+        if not self._sorted:
+            return None
+        index = min(len(self._sorted) - 1, max(0, int(q * len(self._sorted))))
+        return self._sorted[index]
+
+
+class Hedger:
+    """Per-endpoint latency tracking and hedged execution of request attempts.
+
+    Example:
+        >>> client = PetTracerClient(hedge_policy=HedgePolicy(percentile=0.9))
+        >>> hedger = client.resilience.hedger
+        >>> hedger.delay("getccinfo"), hedger.hedged, hedger.hedge_wins
+    """
+
+    def __init__(self, policy: HedgePolicy = HedgePolicy(), clock: Callable[[], float] = time.monotonic):
+        if not 0 < policy.percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.policy = policy
+        self._clock = clock
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self.budget = RetryBudget(policy.max_extra_ratio, 0.0, policy.budget_cap)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.no_capacity = 0
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """Add an observed response time for `endpoint`."""
+        window = self._latencies.get(endpoint)
+        if window is None:
+            window = self._latencies[endpoint] = LatencyWindow(self.policy.window)
+        window.add(latency)
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """Current hedge delay for `endpoint` (None until enough samples)."""
+        window = self._latencies.get(endpoint)
+        count = len(window) if window is not None else 0
+        if count < self.policy.min_samples:
+            return None
+        if count == 0:
+            return self.policy.max_delay
+        p = window.percentile(self.policy.percentile)
+        return min(self.policy.max_delay, max(self.policy.min_delay, p))
+
+    async def _timed(self, endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        started = self._clock()
+        result = await attempt()
+        self.record(endpoint, self._clock() - started)
+        return result
+
+    async def run(
+        self,
+        endpoint: str,
+        attempt: Callable[[], Awaitable[T]],
+        reserve: Optional[Callable[[], Optional[Callable[[], None]]]] = None,
+    ) -> T:
+        """Run `attempt`, hedging it with a second call if it is slow.
+
+        The first successful response wins and the other call is cancelled.
+        If both calls fail, the error of the original call is raised.
+
+        Args:
+            endpoint: endpoint name the latencies are tracked under
+            attempt: coroutine function making one request
+            reserve: optional callable claiming capacity for the hedge without
+                waiting; it returns a callable that frees it again, or None
+                when nothing is free (the hedge is then skipped)
+        """
+        self.requests += 1
+        self.budget.on_request()
+        delay = self.delay(endpoint)
+        if delay is None:
+            return await self._timed(endpoint, attempt)
+        primary = asyncio.ensure_future(self._timed(endpoint, attempt))
+        hedge: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            release = reserve() if reserve is not None else None
+            if reserve is not None and release is None:
+                self.no_capacity += 1
+                return await primary
+            if not self.budget.try_spend():
+                self.budget_exhausted += 1
+                if release is not None:
+                    release()
+                return await primary
+            self.hedged += 1
+            hedge = asyncio.ensure_future(self._timed(endpoint, attempt))
+            if release is not None:
+                hedge.add_done_callback(lambda _: release())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    if primary in winners:
+                        return primary.result()
+                    self.hedge_wins += 1
+                    return hedge.result()
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
@@ -0,0 +1,214 @@
+""" Per-endpoint request instrumentation.
+
+    `RequestMetrics` aggregates, per endpoint:
+
+    - `latency`: whole calls as the caller sees them, retries included
+      (measured by the metrics middleware);
+    - `wait`: per attempt, from sending the request to receiving the
+      response headers (queueing, DNS, connect/TLS and server time);
+    - `download`: per attempt, from the headers to the decoded body;
+    - `parse`: turning the decoded JSON into typed objects (`from_dict`);
+    - `bytes`: response body sizes;
+    - `statuses`: HTTP status code counts.
+
+    On sessions created with `trace_config()` (the client does this for
+    sessions it owns) aiohttp trace hooks split `wait` further into
+    `queued` (waiting for a pool slot), `dns`, `connect` (TCP + TLS) and
+    `server` (request sent to headers received), and body sizes come from
+    the bytes actually read. Histograms use fixed buckets so they can be
+    exported as-is.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import math
+import time
+import weakref
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from .pipeline import Handler, Request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Fixed-bucket histogram (bucket bounds are inclusive upper limits)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +inf."""
+        out = []
+        total = 0
+        for bound, count in zip(self.buckets + (math.inf,), self._counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile `q` (None when empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target and total > 0:
+                return bound
+        return math.inf
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+def _latency() -> Histogram:
+    return Histogram(LATENCY_BUCKETS)
+
+
+@dataclass
+class EndpointMetrics:
+    """Request counters and histograms for one endpoint."""
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    latency: Histogram = field(default_factory=_latency)
+    wait: Histogram = field(default_factory=_latency)
+    download: Histogram = field(default_factory=_latency)
+    parse: Histogram = field(default_factory=_latency)
+    queued: Histogram = field(default_factory=_latency)
+    dns: Histogram = field(default_factory=_latency)
+    connect: Histogram = field(default_factory=_latency)
+    server: Histogram = field(default_factory=_latency)
+    bytes: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+class RequestMetrics:
+    """Per-endpoint instrumentation; also the middleware timing whole calls.
+
+    Example:
+        >>> client = PetTracerClient()
+        >>> await client.login("username", "password")
+        >>> devices = await client.get_all_devices()
+        >>> stats = client.metrics.endpoint("getccs")
+        >>> stats.latency.quantile(0.99), stats.parse.mean, stats.statuses
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        # client-level counters (see `PetTracerClient.get_all_devices` / `login`)
+        self.devices_polled = 0
+        self.token_refreshes = 0
+        # trace data of responses still being read, keyed by response
+        self._traces: "weakref.WeakKeyDictionary[Any, SimpleNamespace]" = weakref.WeakKeyDictionary()
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    async def __call__(self, request: "Request", call_next: "Handler") -> Any:
+        metrics = self.endpoint(request.endpoint)
+        metrics.requests += 1
+        started = self._clock()
+        try:
+            return await call_next(request)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            elapsed = self._clock() - started
+            metrics.seconds += elapsed
+            metrics.latency.observe(elapsed)
+
+    def observe_status(self, endpoint: str, status: int) -> None:
+        statuses = self.endpoint(endpoint).statuses
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def observe_response(self, endpoint: str, response: Any, wait: float, download: float) -> None:
+        """Record one successful attempt (called by the pipeline transport)."""
+        metrics = self.endpoint(endpoint)
+        metrics.wait.observe(wait)
+        metrics.download.observe(download)
+        trace = self._traces.pop(response, None) if _weakrefable(response) else None
+        size = trace.bytes if trace is not None and trace.bytes is not None else getattr(response, "content_length", None)
+        if isinstance(size, int):
+            metrics.bytes.observe(size)
+        if trace is None:
+            return
+        for phase in ("queued", "dns", "connect", "server"):
+            value = getattr(trace, phase)
+            if value is not None:
+                getattr(metrics, phase).observe(value)
+
+    def observe_parse(self, endpoint: str, seconds: float) -> None:
+        self.endpoint(endpoint).parse.observe(seconds)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig adding phase timings and body sizes for a session."""
+        clock = self._clock
+
+        async def on_request_start(session, ctx, params):
+            ctx.queued = ctx.dns = ctx.connect = ctx.server = ctx.bytes = None
+            ctx.sent = clock()
+
+        def phase_start(name):
+            async def hook(session, ctx, params):
+                setattr(ctx, name + "_start", clock())
+            return hook
+
+        def phase_end(name):
+            async def hook(session, ctx, params):
+                elapsed = clock() - getattr(ctx, name + "_start")
+                if name == "connect" and ctx.dns is not None:
+                    # DNS resolution happens inside connection creation
+                    elapsed -= ctx.dns
+                setattr(ctx, name, elapsed)
+            return hook
+
+        async def on_headers_sent(session, ctx, params):
+            ctx.sent = clock()
+
+        async def on_request_end(session, ctx, params):
+            ctx.server = clock() - ctx.sent
+            if _weakrefable(params.response):
+                self._traces[params.response] = ctx
+
+        async def on_chunk(session, ctx, params):
+            ctx.bytes = (ctx.bytes or 0) + len(params.chunk)
+
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(on_request_start)
+        for name, start, end in (
+            ("queued", config.on_connection_queued_start, config.on_connection_queued_end),
+            ("dns", config.on_dns_resolvehost_start, config.on_dns_resolvehost_end),
+            ("connect", config.on_connection_create_start, config.on_connection_create_end),
+        ):
+            start.append(phase_start(name))
+            end.append(phase_end(name))
+        config.on_request_headers_sent.append(on_headers_sent)
+        config.on_request_end.append(on_request_end)
+        config.on_response_chunk_received.append(on_chunk)
+        return config
+
+
+def _weakrefable(obj: Any) -> bool:
+    try:
+        weakref.ref(obj)
+    except TypeError:
+        return False
+    return True
@@ -0,0 +1,310 @@
+""" Internal request pipeline shared by all endpoint helpers.
+
+    Every portal call is described by a `Request` and sent through a
+    `Pipeline`, a chain of middleware. Each middleware is an async callable
+    `(request, call_next) -> data` that may change the request, short-cut the
+    call, or wrap `call_next`. The chain ends in the transport, which sends one
+    HTTP request, checks the status and decodes the body with the pipeline's
+    `decoder` (JSON by default).
+
+    The default chain is `retry_middleware` (the request's `Resilience`:
+    retries, breaker, throttle, hedging, scheduling and adaptive timeouts)
+    then `auth_middleware` (headers). `PetTracerClient` puts `RequestMetrics`
+    (see `pettracer.instrumentation`), any user middleware and an optional
+    `ResponseCache` in front. After the chain, `Request.parse` turns the
+    decoded data into typed objects; the pipeline's metrics time it.
+
+    Header dicts are built once per token and reused read-only. The
+    `PETTRACER_TOKEN` environment variable is only consulted when a request
+    carries no token.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+import asyncio
+import json
+import os
+import time
+
+import aiohttp
+
+from .errors import PetTracerError
+from .scheduler import Priority
+
+if TYPE_CHECKING:
+    from .instrumentation import RequestMetrics
+    from .resilience import Resilience
+
+
+@dataclass
+class Request:
+    """One portal call as seen by the middleware.
+
+    Args:
+        endpoint: short endpoint name (`getccs`, `getccinfo`, ...)
+        method: HTTP method (`GET` or `POST`)
+        url: full URL
+        description: what the call does, used in error messages
+        json: JSON body for POST requests
+        token: bearer token (falls back to `PETTRACER_TOKEN`)
+        authenticate: send the Authorization header (False for login)
+        timeout: fixed timeout in seconds (used until timeouts are adaptive)
+        idempotent: safe to retry, hedge and cache
+        resilience: retry / breaker / throttling state to use
+        priority: scheduling class
+        scale: work scale for adaptive timeouts (position range size)
+        parse: turns the decoded data into the helper's result (timed)
+        headers: request headers, set by `auth_middleware`
+    """
+    endpoint: str
+    method: str
+    url: str
+    description: str
+    json: Optional[Any] = None
+    token: Optional[str] = None
+    authenticate: bool = True
+    timeout: float = 10
+    idempotent: bool = True
+    resilience: Optional["Resilience"] = None
+    priority: Optional[Priority] = None
+    scale: float = 1.0
+    parse: Optional[Callable[[Any], Any]] = None
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+Handler = Callable[[Request], Awaitable[Any]]
+Middleware = Callable[[Request, Handler], Awaitable[Any]]
+Decoder = Callable[[Request, aiohttp.ClientResponse], Awaitable[Any]]
+
+_BASE_HEADERS = MappingProxyType({
+    "Accept": "application/json, text/plain, */*",
+    "Content-Type": "application/json",
+    "User-Agent": "pettracer-python-client/0.1",
+    "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
+})
+
+
+@lru_cache(maxsize=16)
+def _token_headers(token: str) -> Mapping[str, str]:
+    return MappingProxyType({**_BASE_HEADERS, "Authorization": f"Bearer {token}"})
+
+
+def request_headers(token: Optional[str]) -> Mapping[str, str]:
+    """Prebuilt, read-only headers for `token` (or `PETTRACER_TOKEN` when None)."""
+    t = token or os.environ.get("PETTRACER_TOKEN")
+    return _token_headers(t) if t else _BASE_HEADERS
+
+
+def login_headers(body: Any) -> Dict[str, str]:
+    """Headers for the login request: no Authorization, Content-Length matching `body`."""
+    headers = dict(_BASE_HEADERS)
+    headers["Content-Length"] = str(len(json.dumps(body).encode("utf-8")))
+    return headers
+
+
+async def auth_middleware(request: Request, call_next: Handler) -> Any:
+    """Attach request headers (prebuilt per token)."""
+    request.headers = request_headers(request.token) if request.authenticate else login_headers(request.json)
+    return await call_next(request)
+
+
+async def retry_middleware(request: Request, call_next: Handler) -> Any:
+    """Run the rest of the chain through the request's `Resilience`, once per attempt."""
+    if request.resilience is None:
+        return await call_next(request)
+    return await request.resilience.call(
+        lambda: call_next(request),
+        idempotent=request.idempotent,
+        endpoint=request.endpoint,
+        priority=request.priority,
+        scale=request.scale,
+    )
+
+
+async def decode_json(request: Request, response: aiohttp.ClientResponse) -> Any:
+    """Default decoder: parse the body as JSON."""
+    try:
+        return await response.json()
+    except ValueError as exc:
+        raise PetTracerError(f"Invalid JSON response while {request.description}") from exc
+
+
+def _client_timeout(request: Request) -> aiohttp.ClientTimeout:
+    """Adaptive timeout for the request's endpoint if tracked, else `timeout` in total."""
+    resilience = request.resilience
+    if resilience is not None and resilience.timeouts is not None:
+        return resilience.timeouts.timeout(request.endpoint, request.timeout, request.scale)
+    return aiohttp.ClientTimeout(total=request.timeout)
+
+
+class Pipeline:
+    """Middleware chain ending in one HTTP request.
+
+    Example:
+        >>> async def log_calls(request, call_next):
+        ...     print(request.endpoint)
+        ...     return await call_next(request)
+        >>> client = PetTracerClient(middleware=[log_calls])
+    """
+
+    def __init__(
+        self,
+        middleware: Optional[Sequence[Middleware]] = None,
+        decoder: Decoder = decode_json,
+        metrics: Optional["RequestMetrics"] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            middleware: chain, outermost first (defaults to retry then auth)
+            decoder: turns an OK response into data
+            metrics: optional RequestMetrics fed with per-attempt timings,
+                status codes, body sizes and parse times
+        """
+        self.middleware: List[Middleware] = list(middleware) if middleware is not None else default_middleware()
+        self.decoder = decoder
+        self.metrics = metrics
+        self._clock = clock
+
+    async def _transport(self, request: Request, session: aiohttp.ClientSession) -> Any:
+        kwargs: Dict[str, Any] = {"timeout": _client_timeout(request), "headers": request.headers}
+        if request.method == "GET":
+            send = session.get
+        else:
+            send = session.post
+            kwargs["json"] = request.json
+        metrics = self.metrics
+        started = self._clock()
+        async with send(request.url, **kwargs) as resp:
+            received = self._clock()
+            if metrics is not None:
+                metrics.observe_status(request.endpoint, getattr(resp, "status", 0))
+            resp.raise_for_status()
+            data = await self.decoder(request, resp)
+        if metrics is not None:
+            metrics.observe_response(request.endpoint, resp, received - started, self._clock() - received)
+        return data
+
+    async def send(self, request: Request, session: Optional[aiohttp.ClientSession] = None) -> Any:
+        """Send `request` through the chain.
+
+        Opens (and closes) a session if none is given. Returns the decoded
+        data, passed through `request.parse` if set.
+
+        Raises:
+            PetTracerError: for HTTP errors or undecodable responses
+        """
+        close_session = session is None
+        sess = session or aiohttp.ClientSession()
+
+        async def transport(req: Request) -> Any:
+            return await self._transport(req, sess)
+
+        handler: Handler = transport
+        for middleware in reversed(self.middleware):
+            handler = _bind(middleware, handler)
+        try:
+            data = await handler(request)
+        except aiohttp.ClientError as exc:
+            raise PetTracerError(f"HTTP error while {request.description}: {exc}") from exc
+        finally:
+            if close_session:
+                await sess.close()
+        if request.parse is None:
+            return data
+        started = self._clock()
+        result = request.parse(data)
+        if self.metrics is not None:
+            self.metrics.observe_parse(request.endpoint, self._clock() - started)
+        return result
+
+
+def _bind(middleware: Middleware, call_next: Handler) -> Handler:
+    async def handler(request: Request) -> Any:
+        return await middleware(request, call_next)
+    return handler
+
+
+def default_middleware() -> List[Middleware]:
+    """The core chain every pipeline needs: retry, then auth."""
+    return [retry_middleware, auth_middleware]
+
+
+DEFAULT_PIPELINE = Pipeline()
+
+
+class ResponseCache:
+    """Middleware caching idempotent responses for `ttl` seconds.
+
+    Identical requests made while one is in flight share its result
+    (coalescing), even with `ttl=0`. Cached data is shared between callers
+    and must not be mutated.
+
+    Example:
+        >>> client = PetTracerClient(response_cache=ResponseCache(ttl=5))
+        >>> client.response_cache.hits, client.response_cache.coalesced
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        if ttl < 0:
+            raise ValueError("ttl must not be negative")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(request: Request) -> Hashable:
+        body = json.dumps(request.json, sort_keys=True) if request.json is not None else None
+        return (request.method, request.url, body, request.token)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def __call__(self, request: Request, call_next: Handler) -> Any:
+        if not request.idempotent:
+            return await call_next(request)
+        key = self._key(request)
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # the request we joined was cancelled; make our own
+                return await call_next(request)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            data = await call_next(request)
+        except Exception as exc:
+            future.set_exception(exc)
+            # waiters see the error; nobody else needs to retrieve it
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(data)
+            if self.ttl > 0:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = (self._clock(), data)
+            return data
+        finally:
+            del self._in_flight[key]
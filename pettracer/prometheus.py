@@ -0,0 +1,197 @@
+""" Prometheus text-format metrics for a PetTracerClient.
+
+    `render_metrics(client)` renders the client's request metrics,
+    retry/breaker counters, cache and hedging counters, devices polled and
+    token refreshes in the Prometheus text exposition format (0.0.4).
+    `MetricsServer` serves that text from a tiny aiohttp web endpoint so the
+    portal's health can be scraped and alerted on:
+
+        >>> async with MetricsServer(client, port=9464):
+        ...     await run_forever()
+
+    Only counters the client actually has are exported; for example the
+    cache and hedging families appear only when those features are enabled.
+"""
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+import math
+
+from aiohttp import web
+
+from .instrumentation import Histogram
+
+if TYPE_CHECKING:
+    from .client import PetTracerClient
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Writer:
+    """Collects metric families in exposition order."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, histograms: Iterable[Tuple[Labels, Histogram]]) -> None:
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            for bound, count in histogram.cumulative():
+                self.lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            self.lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(client: "PetTracerClient", prefix: str = "pettracer_") -> str:
+    """Render `client`'s metrics in the Prometheus text exposition format."""
+    out = _Writer(prefix)
+    endpoints = sorted(client.metrics.endpoints.items())
+
+    def per_endpoint(attr: str) -> List[Tuple[Labels, float]]:
+        return [((("endpoint", name),), getattr(stats, attr)) for name, stats in endpoints]
+
+    def endpoint_histograms(attr: str) -> List[Tuple[Labels, Histogram]]:
+        return [((("endpoint", name),), getattr(stats, attr)) for name, stats in endpoints]
+
+    out.family("requests_total", "counter", "Portal calls by endpoint.", per_endpoint("requests"))
+    out.family("request_errors_total", "counter", "Portal calls that failed, by endpoint.", per_endpoint("errors"))
+    statuses: List[Tuple[Labels, float]] = [
+        ((("endpoint", name), ("code", str(code))), count)
+        for name, stats in endpoints
+        for code, count in sorted(stats.statuses.items())
+    ]
+    out.family("responses_total", "counter", "HTTP responses by endpoint and status code.", statuses)
+    out.histogram("request_duration_seconds", "Call latency including retries.", endpoint_histograms("latency"))
+    out.histogram("response_wait_seconds", "Per-attempt time from sending to response headers.", endpoint_histograms("wait"))
+    out.histogram("response_download_seconds", "Per-attempt time from response headers to decoded body.",
+                  endpoint_histograms("download"))
+    out.histogram("connection_queued_seconds", "Time waiting for a free pooled connection.", endpoint_histograms("queued"))
+    out.histogram("dns_seconds", "DNS resolution time.", endpoint_histograms("dns"))
+    out.histogram("connect_seconds", "TCP and TLS connection setup time.", endpoint_histograms("connect"))
+    out.histogram("server_seconds", "Time from request sent to response headers received.", endpoint_histograms("server"))
+    out.histogram("parse_duration_seconds", "Time spent turning responses into typed objects.", endpoint_histograms("parse"))
+    out.histogram("response_size_bytes", "Response body sizes.", endpoint_histograms("bytes"))
+
+    resilience = client.resilience
+    out.family("retries_total", "counter", "Request attempts retried after a transient error.", [((), resilience.retries)])
+    out.family("retry_budget_exhausted_total", "counter", "Retries skipped because the retry budget was empty.",
+               [((), resilience.budget_exhausted)])
+    out.family("circuit_rejected_total", "counter", "Calls rejected while the circuit was open.", [((), resilience.rejected)])
+    breaker = resilience.breaker
+    if breaker is not None:
+        state = breaker.state
+        states = (breaker.CLOSED, breaker.OPEN, breaker.HALF_OPEN)
+        out.family("circuit_state", "gauge", "Circuit breaker state (1 for the current one).",
+                   [((("state", name),), 1 if name == state else 0) for name in states])
+        out.family("circuit_open", "gauge", "1 while the circuit breaker rejects calls.",
+                   [((), 1 if breaker.rejecting else 0)])
+    cache = client.response_cache
+    if cache is not None:
+        out.family("cache_hits_total", "counter", "Reads answered from the response cache.", [((), cache.hits)])
+        out.family("cache_misses_total", "counter", "Reads sent to the portal by the response cache.", [((), cache.misses)])
+        out.family("coalesced_requests_total", "counter", "Reads that joined an identical request in flight.",
+                   [((), cache.coalesced)])
+    if resilience.hedger is not None:
+        out.family("hedged_requests_total", "counter", "Reads that sent a hedge request.", [((), resilience.hedger.hedged)])
+        out.family("hedge_wins_total", "counter", "Hedged reads answered by the hedge.", [((), resilience.hedger.hedge_wins)])
+    if resilience.timeouts is not None:
+        out.family("timeouts_total", "counter", "Attempts that ran out of their timeout.", [((), resilience.timeouts.timeouts)])
+
+    out.family("devices_polled_total", "counter", "Devices returned by device polls (cached reads included).", [((), client.metrics.devices_polled)])
+    out.family("token_refreshes_total", "counter", "Logins made while already authenticated.",
+               [((), client.metrics.token_refreshes)])
+    stats = client.connection_stats
+    if stats is not None:
+        out.family("connections_created_total", "counter", "New portal connections.", [((), stats.created)])
+        out.family("connections_reused_total", "counter", "Requests that reused a pooled connection.", [((), stats.reused)])
+    return out.text()
+
+
+class MetricsServer:
+    """Tiny aiohttp server exposing `render_metrics(client)` for scraping.
+
+    Example:
+        >>> server = MetricsServer(client, host="0.0.0.0", port=9464)
+        >>> await server.start()
+        >>> ...
+        >>> await server.stop()
+    """
+
+    def __init__(self, client: "PetTracerClient", host: str = "127.0.0.1", port: int = 9464, path: str = "/metrics"):
+        """Initialize the server.
+
+        Args:
+            client: client whose metrics are served
+            host: interface to bind
+            port: TCP port (0 picks a free port, see `port` after `start`)
+            path: URL path of the metrics page
+        """
+        self.client = client
+        self.host = host
+        self.path = path
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def port(self) -> int:
+        """Bound port (the requested one until started)."""
+        if self._runner is not None and self._runner.addresses:
+            return self._runner.addresses[0][1]
+        return self._port
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=render_metrics(self.client).encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get(self.path, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self._port).start()
+        self._runner = runner
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MetricsServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        await self.stop()
+        return False
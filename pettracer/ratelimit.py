@@ -0,0 +1,205 @@
+""" Client-side rate limiting and adaptive concurrency.
+
+    `TokenBucket` caps the request rate (with a burst allowance) and can be
+    shared by several clients to keep a whole process polite to the portal.
+    `AdaptiveConcurrency` limits requests in flight with AIMD: the limit grows
+    by one per window of healthy responses and is cut multiplicatively on
+    429/5xx, timeouts, or when latency rises well above its long-run average.
+    `Throttle` combines both around one request attempt and is plugged into a
+    client through `Resilience`, so every attempt, retries included, is paced.
+"""
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import time
+
+import aiohttp
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Token-bucket rate limiter.
+
+    Example:
+        >>> bucket = TokenBucket(rate=5, burst=10)       # share between clients if needed
+        >>> client = PetTracerClient(rate_limiter=bucket)
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """Initialize the bucket.
+
+        Args:
+            rate: tokens (requests) added per second
+            burst: bucket size (defaults to `rate`, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting; False if too few are left or `acquire` is waiting."""
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until `tokens` are available and take them (FIFO among waiters)."""
+        async with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            deficit = -self._tokens
+            if deficit > 0:
+                delay = deficit / self.rate
+                self.waited += delay
+                try:
+                    await self._sleep(delay)
+                except asyncio.CancelledError:
+                    # the tokens were never used; do not leave the debt to later callers
+                    self._tokens += tokens
+                    raise
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on requests in flight.
+
+    Example:
+        >>> limiter = AdaptiveConcurrency(initial=4, max_limit=32)
+        >>> client = PetTracerClient(adaptive_concurrency=limiter)
+        >>> limiter.limit, limiter.in_flight
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            initial: starting limit
+            min_limit: lower bound of the limit
+            max_limit: upper bound of the limit
+            backoff: multiplicative decrease factor on overload
+            latency_tolerance: a response slower than this multiple of the
+                long-run average latency counts as overload
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("need 1 <= min_limit <= initial <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._avg_latency: Optional[float] = None
+        self._since_decrease = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, latency: Optional[float], overloaded: bool) -> None:
+        """Free a slot and adapt the limit.
+
+        Args:
+            latency: response time in seconds (None if the request failed)
+            overloaded: the portal signalled overload (429/5xx/timeout)
+        """
+        async with self._cond:
+            self._in_flight -= 1
+            self._since_decrease += 1
+            slow = False
+            if latency is not None and not overloaded:
+                avg = self._avg_latency
+                slow = avg is not None and latency > self.latency_tolerance * avg
+                self._avg_latency = latency if avg is None else avg + 0.05 * (latency - avg)
+            if overloaded or slow:
+                # at most one decrease per window of `limit` completions
+                if self._since_decrease >= self.limit:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._since_decrease = 0
+                    self.decreases += 1
+            elif latency is not None:
+                # additive increase: about +1 per `limit` successful responses
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+
+def is_overload(exc: BaseException) -> bool:
+    """True for errors that mean the portal is overloaded or unreachable in time."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, asyncio.TimeoutError)
+
+
+class Throttle:
+    """Rate limit and adaptive concurrency around one request attempt."""
+
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucket] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self._clock = clock
+
+    async def run(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        if self.concurrency is not None:
+            await self.concurrency.acquire()
+        latency: Optional[float] = None
+        overloaded = False
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            started = self._clock()
+            try:
+                result = await attempt()
+            except BaseException as exc:
+                overloaded = is_overload(exc)
+                raise
+            latency = self._clock() - started
+            return result
+        finally:
+            if self.concurrency is not None:
+                await self.concurrency.release(latency, overloaded)
@@ -0,0 +1,323 @@
+""" Retry with backoff and a circuit breaker for portal requests.
+
+    `Resilience` wraps one request attempt at a time:
+
+    - idempotent requests that fail with a transient error (connection error,
+      timeout, or a status in `RetryPolicy.retry_statuses`) are retried with
+      exponential backoff and full jitter, up to `max_attempts`;
+    - retries draw from a `RetryBudget` that only grows with new requests, so
+      an outage cannot multiply the load on the portal;
+    - a `CircuitBreaker` opens after `failure_threshold` consecutive transient
+      failures and rejects calls with `CircuitOpenError` until
+      `reset_timeout` has passed, then lets a probe request through.
+
+    Non-idempotent requests (login) are never retried but still go through the
+    breaker. An optional `Throttle` (see `pettracer.ratelimit`) paces every
+    attempt, an optional `Hedger` (see `pettracer.hedging`) duplicates slow
+    idempotent attempts, an optional `RequestScheduler` (see
+    `pettracer.scheduler`) orders attempts by priority class, and optional
+    `AdaptiveTimeouts` (see `pettracer.timeouts`) learn from each attempt's
+    latency. Policies are immutable; the state lives in the `Resilience`
+    object owned by each `PetTracerClient`.
+"""
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Awaitable, Callable, FrozenSet, Optional, TypeVar
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from .errors import CircuitOpenError, PetTracerError
+from .scheduler import Priority
+
+if TYPE_CHECKING:
+    from .hedging import Hedger
+    from .ratelimit import Throttle
+    from .scheduler import RequestScheduler
+    from .timeouts import AdaptiveTimeouts
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry settings for idempotent requests.
+
+    Args:
+        max_attempts: total attempts including the first one
+        base_delay: backoff base in seconds (attempt n waits up to base * 2**n)
+        max_delay: cap on a single backoff in seconds
+        retry_statuses: HTTP statuses treated as transient
+        budget_ratio: retry tokens earned per request
+        budget_min_retries: retry tokens available from the start
+        budget_cap: maximum retry tokens that can be saved up
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 8.0
+    retry_statuses: FrozenSet[int] = frozenset({408, 429, 500, 502, 503, 504})
+    budget_ratio: float = 0.2
+    budget_min_retries: float = 10.0
+    budget_cap: float = 20.0
+
+    def backoff(self, retry: int, rng: random.Random) -> float:
+        """Full-jitter delay before retry number `retry` (0-based)."""
+        return rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Circuit breaker settings.
+
+    Args:
+        failure_threshold: consecutive transient failures that open the circuit
+        reset_timeout: seconds the circuit stays open before a probe is allowed
+    """
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+DEFAULT_BREAKER_POLICY = BreakerPolicy()
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of recent requests."""
+
+    def __init__(self, ratio: float, min_retries: float, cap: float):
+        self.ratio = ratio
+        self.cap = max(cap, min_retries)
+        self.balance = float(min_retries)
+
+    def on_request(self) -> None:
+        self.balance = min(self.cap, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, policy: BreakerPolicy = DEFAULT_BREAKER_POLICY, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.policy.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def rejecting(self) -> bool:
+        """True while `before_call` would reject calls (open, or half-open with a probe running)."""
+        state = self.state
+        return state == self.OPEN or (state == self.HALF_OPEN and self._probe_in_flight)
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call must not be made.
+
+        Returns:
+            True if the call is the half-open probe (see `release`)
+        """
+        state = self.state
+        if self.rejecting:
+            remaining = max(0.0, self.policy.reset_timeout - (self._clock() - self._opened_at))
+            raise CircuitOpenError(f"PetTracer portal circuit is open; retry in {remaining:.0f}s")
+        if state == self.HALF_OPEN:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def on_success(self) -> None:
+        self._failures = 0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.policy.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """End the probe without a verdict (e.g. cancelled) so another can run."""
+        self._probe_in_flight = False
+
+
+class Resilience:
+    """Retry and circuit-breaker state for one client.
+
+    Example:
+        >>> resilience = Resilience(RetryPolicy(max_attempts=4), BreakerPolicy(failure_threshold=3))
+        >>> devices = await get_ccs_status(token=token, resilience=resilience)
+    """
+
+    def __init__(
+        self,
+        retry_policy: Optional[RetryPolicy] = DEFAULT_RETRY_POLICY,
+        breaker_policy: Optional[BreakerPolicy] = DEFAULT_BREAKER_POLICY,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        throttle: Optional["Throttle"] = None,
+        hedger: Optional["Hedger"] = None,
+        scheduler: Optional["RequestScheduler"] = None,
+        timeouts: Optional["AdaptiveTimeouts"] = None,
+    ):
+        """Initialize retry/breaker state.
+
+        Args:
+            retry_policy: retry settings (None disables retries)
+            breaker_policy: breaker settings (None disables the breaker)
+            rng: random source for jitter
+            sleep: coroutine used to wait between attempts
+            throttle: optional rate limit / adaptive concurrency applied to every attempt
+            hedger: optional hedging of slow idempotent attempts
+            scheduler: optional priority scheduler; each attempt holds one slot
+            timeouts: optional adaptive timeouts fed with attempt latencies
+        """
+        self.retry_policy = retry_policy
+        self.breaker = CircuitBreaker(breaker_policy) if breaker_policy is not None else None
+        self.budget = (
+            RetryBudget(retry_policy.budget_ratio, retry_policy.budget_min_retries, retry_policy.budget_cap)
+            if retry_policy is not None else None
+        )
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self.throttle = throttle
+        self.hedger = hedger
+        self.scheduler = scheduler
+        self.timeouts = timeouts
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.rejected = 0
+
+    def _transient(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            statuses = self.retry_policy.retry_statuses if self.retry_policy else DEFAULT_RETRY_POLICY.retry_statuses
+            return exc.status in statuses
+        return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def _throttled(self, attempt: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+        return self.throttle.run(attempt) if self.throttle is not None else attempt()
+
+    async def _observed(self, attempt: Callable[[], Awaitable[T]], endpoint: str, scale: float) -> T:
+        started = time.monotonic()
+        try:
+            result = await attempt()
+        except asyncio.TimeoutError:
+            self.timeouts.observe_timeout(endpoint, time.monotonic() - started, scale)
+            raise
+        self.timeouts.observe(endpoint, time.monotonic() - started, scale)
+        return result
+
+    def _reserve_slot(self, priority: Priority) -> Optional[Callable[[], None]]:
+        if not self.scheduler.try_acquire(priority):
+            return None
+        return partial(self.scheduler.release, priority)
+
+    async def _run(
+        self,
+        attempt: Callable[[], Awaitable[T]],
+        idempotent: bool,
+        endpoint: Optional[str],
+        scale: float,
+        priority: Priority,
+    ) -> T:
+        if self.timeouts is not None and endpoint is not None:
+            attempt = partial(self._observed, attempt, endpoint, scale)
+        if self.hedger is not None and idempotent and endpoint is not None:
+            reserve = partial(self._reserve_slot, priority) if self.scheduler is not None else None
+            return await self.hedger.run(endpoint, lambda: self._throttled(attempt), reserve)
+        return await self._throttled(attempt)
+
+    async def call(
+        self,
+        attempt: Callable[[], Awaitable[T]],
+        idempotent: bool = True,
+        endpoint: Optional[str] = None,
+        priority: Optional[Priority] = None,
+        scale: float = 1.0,
+    ) -> T:
+        """Run `attempt` with retries (if idempotent) behind the circuit breaker.
+
+        The last error is re-raised unchanged when attempts or budget run out.
+        With a hedger, idempotent calls naming their `endpoint` are hedged; each
+        hedge counts as one attempt for the breaker and retries. With a
+        scheduler, every attempt waits for a slot of its `priority` class
+        (polling when not given), and a hedge is only sent if a second slot is
+        free right away. With adaptive timeouts, attempt latencies
+        are recorded for `endpoint`, normalized by the request's work `scale`.
+        A `PetTracerError` from the attempt (an undecodable body) counts as a
+        breaker success; a cancelled probe only frees the probe slot.
+
+        Raises:
+            CircuitOpenError: if the circuit is open
+        """
+        policy = self.retry_policy
+        if priority is None:
+            priority = Priority.POLLING
+        if self.budget is not None:
+            self.budget.on_request()
+        retry = 0
+        while True:
+            probe = False
+            if self.breaker is not None:
+                try:
+                    probe = self.breaker.before_call()
+                except CircuitOpenError:
+                    self.rejected += 1
+                    raise
+            try:
+                if self.scheduler is not None:
+                    async with self.scheduler.slot(priority):
+                        result = await self._run(attempt, idempotent, endpoint, scale, priority)
+                else:
+                    result = await self._run(attempt, idempotent, endpoint, scale, priority)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                transient = self._transient(exc)
+                if self.breaker is not None:
+                    if transient:
+                        self.breaker.on_failure()
+                    else:
+                        # the portal answered, so it is up
+                        self.breaker.on_success()
+                if not (transient and idempotent and policy is not None and retry + 1 < policy.max_attempts):
+                    raise
+                if not self.budget.try_spend():
+                    self.budget_exhausted += 1
+                    raise
+                await self._sleep(policy.backoff(retry, self._rng))
+                retry += 1
+                self.retries += 1
+                continue
+            except PetTracerError:
+                # the portal answered, just not with a usable body
+                if self.breaker is not None:
+                    self.breaker.on_success()
+                raise
+            except BaseException:
+                # cancelled or failed before reaching the portal: no verdict
+                if probe:
+                    self.breaker.release()
+                raise
+            if self.breaker is not None:
+                self.breaker.on_success()
+            return result
+
@@ -0,0 +1,285 @@
+""" Incrementally maintained daily summaries per device.
+
+    `RollupEngine` folds synced `LastPos` fixes and polled `Device` snapshots
+    into one `DailyRollup` per device and UTC day: fix count, distance walked,
+    time at home, battery min/max and mean signal quality. Dashboards query the
+    rollups (one row per day) instead of re-reading raw fixes.
+
+    Fixes for the most recent `open_days` days are kept so that late or
+    out-of-order data (positions arriving via `timeDb` after newer ones) is
+    slotted into the right place and the day's distance stays exact. Days
+    older than that are closed once their data has been folded in: their
+    fixes are dropped and further data for them is ignored (counted in
+    `late_fixes` / `late_snapshots`) unless the day is rebuilt with
+    `replace_day`. Days never seen before are accepted however old they are,
+    so history can be fed newest-first or in any window order. Snapshots are
+    de-duplicated by their time, fixes by `id`.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .geo import point_distance
+from .types import Device, LastPos
+
+
+def _day(ts: float) -> date:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+
+
+def _day_start(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+@dataclass
+class DailyRollup:
+    """Summary of one device for one UTC day."""
+    device_id: int
+    day: date
+    fix_count: int = 0
+    distance_m: float = 0.0
+    home_seconds: float = 0.0
+    battery_min: Optional[int] = None
+    battery_max: Optional[int] = None
+    snapshots: int = 0
+    rssi_sum: float = 0.0
+    rssi_count: int = 0
+    sat_sum: float = 0.0
+    sat_count: int = 0
+    hori_prec_sum: float = 0.0
+    hori_prec_count: int = 0
+
+    @property
+    def time_at_home(self) -> timedelta:
+        return timedelta(seconds=self.home_seconds)
+
+    @property
+    def rssi_mean(self) -> Optional[float]:
+        return self.rssi_sum / self.rssi_count if self.rssi_count else None
+
+    @property
+    def sat_mean(self) -> Optional[float]:
+        return self.sat_sum / self.sat_count if self.sat_count else None
+
+    @property
+    def hori_prec_mean(self) -> Optional[float]:
+        return self.hori_prec_sum / self.hori_prec_count if self.hori_prec_count else None
+
+
+class _OpenDay:
+    """Fixes of a day that can still receive late data."""
+    __slots__ = ("t", "lat", "lon", "ids", "snapshots")
+
+    def __init__(self):
+        self.t: List[float] = []
+        self.lat: List[float] = []
+        self.lon: List[float] = []
+        self.ids: Set[int] = set()
+        self.snapshots: Set[float] = set()
+
+
+class RollupEngine:
+    """Maintain `DailyRollup` rows per device as data is synced.
+
+    Example:
+        >>> engine = RollupEngine()
+        >>> engine.add_positions(14758, await device.get_positions(start_ms, end_ms))
+        >>> engine.add_devices(await client.get_all_devices())   # on every poll
+        >>> rows = engine.daily(14758, date(2025, 1, 1), date(2025, 12, 31))
+    """
+
+    def __init__(self, open_days: int = 2, max_snapshot_gap: timedelta = timedelta(minutes=30)):
+        """Initialize the engine.
+
+        Args:
+            open_days: number of most recent days per device that accept late fixes
+            max_snapshot_gap: snapshots further apart than this do not add home time
+        """
+        self.open_days = open_days
+        self.max_snapshot_gap_s = max_snapshot_gap.total_seconds()
+        self._rows: Dict[Tuple[int, date], DailyRollup] = {}
+        self._open: Dict[Tuple[int, date], _OpenDay] = {}
+        self._closed: Set[Tuple[int, date]] = set()
+        self._newest: Dict[int, date] = {}
+        self._last_snapshot: Dict[int, Tuple[float, Optional[bool]]] = {}
+        self.late_fixes = 0
+        self.late_snapshots = 0
+
+    def _row(self, device_id: int, day: date) -> DailyRollup:
+        row = self._rows.get((device_id, day))
+        if row is None:
+            row = self._rows[(device_id, day)] = DailyRollup(device_id=device_id, day=day)
+        return row
+
+    def _open_day(self, device_id: int, day: date) -> Optional[_OpenDay]:
+        """Open state of a day (created on first data), None once the day is closed."""
+        key = (device_id, day)
+        open_day = self._open.get(key)
+        if open_day is None and key not in self._closed:
+            open_day = self._open[key] = _OpenDay()
+        return open_day
+
+    def _close_old_days(self, device_id: int, newest: date) -> None:
+        if newest > self._newest.get(device_id, date.min):
+            self._newest[device_id] = newest
+        cutoff = self._newest[device_id] - timedelta(days=self.open_days - 1)
+        for key in [k for k in self._open if k[0] == device_id and k[1] < cutoff]:
+            del self._open[key]
+            self._closed.add(key)
+
+    def add_positions(self, device_id: int, positions: Iterable[LastPos]) -> int:
+        """Fold new fixes into the daily rollups.
+
+        Fixes already seen (by `id`) are skipped; fixes for closed days are
+        skipped and counted in `late_fixes`.
+
+        Returns:
+            Number of fixes applied
+        """
+        valid = [
+            p for p in positions
+            if p is not None and p.posLat is not None and p.posLong is not None and p.timeMeasure is not None
+        ]
+        if not valid:
+            return 0
+        applied = 0
+        newest = date.min
+        for p in valid:
+            ts = p.timeMeasure.timestamp()
+            day = _day(ts)
+            newest = max(newest, day)
+            open_day = self._open_day(device_id, day)
+            if open_day is None:
+                self.late_fixes += 1
+                continue
+            if p.id is not None:
+                if p.id in open_day.ids:
+                    continue
+                open_day.ids.add(p.id)
+            row = self._row(device_id, day)
+            self._apply_fix(open_day, row, ts, p)
+            applied += 1
+        # close after folding, so a batch for a day not seen before is kept whole
+        self._close_old_days(device_id, newest)
+        return applied
+
+    @staticmethod
+    def _apply_fix(open_day: _OpenDay, row: DailyRollup, ts: float, p: LastPos) -> None:
+        """Insert a fix in time order, adjusting the day's distance by the changed hops."""
+        lat, lon = p.posLat, p.posLong
+        i = bisect_left(open_day.t, ts)
+        has_prev = i > 0
+        has_next = i < len(open_day.t)
+        if has_prev and has_next:
+            row.distance_m -= point_distance(open_day.lat[i - 1], open_day.lon[i - 1], open_day.lat[i], open_day.lon[i])
+        if has_prev:
+            row.distance_m += point_distance(open_day.lat[i - 1], open_day.lon[i - 1], lat, lon)
+        if has_next:
+            row.distance_m += point_distance(lat, lon, open_day.lat[i], open_day.lon[i])
+        open_day.t.insert(i, ts)
+        open_day.lat.insert(i, lat)
+        open_day.lon.insert(i, lon)
+        row.fix_count += 1
+        if p.rssi is not None:
+            row.rssi_sum += p.rssi
+            row.rssi_count += 1
+        if p.sat is not None:
+            row.sat_sum += p.sat
+            row.sat_count += 1
+        if p.horiPrec is not None:
+            row.hori_prec_sum += p.horiPrec
+            row.hori_prec_count += 1
+
+    def add_device_snapshot(self, device: Device, at: Optional[datetime] = None) -> None:
+        """Fold one polled `Device` into the rollups.
+
+        Battery min/max are recorded for the snapshot's day. Time between two
+        consecutive snapshots is counted as home time when the earlier snapshot
+        had `home` set and the snapshots are at most `max_snapshot_gap` apart.
+        A snapshot with the same time as one already folded (the device did not
+        report between two polls) is ignored; snapshots for closed days are
+        counted in `late_snapshots`.
+
+        Args:
+            device: device as returned by `get_all_devices` / `get_info`
+            at: snapshot time (defaults to `device.lastContact`, then now)
+        """
+        when = at or device.lastContact or datetime.now(timezone.utc)
+        ts = when.timestamp()
+        day = _day(ts)
+        open_day = self._open_day(device.id, day)
+        if open_day is None:
+            self.late_snapshots += 1
+            return
+        if ts in open_day.snapshots:
+            return
+        open_day.snapshots.add(ts)
+        row = self._row(device.id, day)
+        row.snapshots += 1
+        if device.bat is not None:
+            row.battery_min = device.bat if row.battery_min is None else min(row.battery_min, device.bat)
+            row.battery_max = device.bat if row.battery_max is None else max(row.battery_max, device.bat)
+
+        last = self._last_snapshot.get(device.id)
+        if last is None or ts > last[0]:
+            if last is not None and last[1] and ts - last[0] <= self.max_snapshot_gap_s:
+                self._add_home_time(device.id, last[0], ts)
+            self._last_snapshot[device.id] = (ts, device.home)
+        self._close_old_days(device.id, day)
+
+    def _add_home_time(self, device_id: int, start: float, end: float) -> None:
+        """Add [start, end) to home time, split at UTC midnight."""
+        while start < end:
+            day = _day(start)
+            boundary = _day_start(day + timedelta(days=1))
+            stop = min(end, boundary)
+            self._row(device_id, day).home_seconds += stop - start
+            start = stop
+
+    def add_devices(self, devices: Iterable[Device], at: Optional[datetime] = None) -> None:
+        """Fold a whole poll (e.g. `get_all_devices()`), including each `lastPos`."""
+        for device in devices:
+            self.add_device_snapshot(device, at=at)
+            if device.lastPos is not None:
+                self.add_positions(device.id, [device.lastPos])
+
+    def replace_day(self, device_id: int, day: date, positions: Iterable[LastPos]) -> DailyRollup:
+        """Rebuild the position part of one day from a complete set of fixes.
+
+        Snapshot-derived fields (battery, home time) are kept.
+        """
+        key = (device_id, day)
+        old = self._rows.get(key)
+        row = self._rows[key] = DailyRollup(device_id=device_id, day=day)
+        if old is not None:
+            row.home_seconds = old.home_seconds
+            row.battery_min, row.battery_max, row.snapshots = old.battery_min, old.battery_max, old.snapshots
+        open_day = _OpenDay()
+        previous = self._open.get(key)
+        if previous is not None:
+            open_day.snapshots = previous.snapshots
+        for p in positions:
+            if p is None or p.posLat is None or p.posLong is None or p.timeMeasure is None:
+                continue
+            ts = p.timeMeasure.timestamp()
+            if _day(ts) != day or (p.id is not None and p.id in open_day.ids):
+                continue
+            if p.id is not None:
+                open_day.ids.add(p.id)
+            self._apply_fix(open_day, row, ts, p)
+        self._closed.discard(key)
+        self._open[key] = open_day
+        self._close_old_days(device_id, day)
+        return row
+
+    def daily(self, device_id: int, start: date, end: date) -> List[DailyRollup]:
+        """Rollup rows for a device between `start` and `end` (inclusive), by day."""
+        return sorted(
+            (r for (dev, day), r in self._rows.items() if dev == device_id and start <= day <= end),
+            key=lambda r: r.day,
+        )
+
+    def get(self, device_id: int, day: date) -> Optional[DailyRollup]:
+        """Rollup row for one device and day, if any data was seen."""
+        return self._rows.get((device_id, day))
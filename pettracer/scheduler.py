@@ -0,0 +1,136 @@
+""" Priority scheduling of portal requests.
+
+    `RequestScheduler` hands out a fixed number of request slots by priority
+    class instead of arrival order:
+
+    - `Priority.INTERACTIVE` (a user waiting, e.g. `get_info()`) always goes
+      first;
+    - `Priority.POLLING` (periodic refreshes) comes next;
+    - `Priority.BULK` (backfills, bulk `get_positions`) only uses spare
+      capacity and never holds more than `bulk_limit` slots, so an interactive
+      request finds a free slot even while a backfill is running.
+
+    Within a class, requests start in arrival order. Slots are taken per
+    attempt, so a request waiting out a retry backoff does not hold one, and
+    a hedge (see `pettracer.hedging`) needs a slot of its own.
+"""
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+
+
+class Priority(IntEnum):
+    """Request priority classes (lower value starts first)."""
+    INTERACTIVE = 0
+    POLLING = 1
+    BULK = 2
+
+
+class RequestScheduler:
+    """Slot-based priority scheduler shared by a client's requests.
+
+    Example:
+        >>> scheduler = RequestScheduler(max_concurrent=4, bulk_limit=2)
+        >>> client = PetTracerClient(scheduler=scheduler)
+        >>> info = await client.get_device(14758).get_info()   # interactive by default
+        >>> scheduler.active, scheduler.queued(Priority.BULK)
+    """
+
+    def __init__(self, max_concurrent: int = 4, bulk_limit: Optional[int] = None):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrent: requests allowed in flight at once
+            bulk_limit: slots bulk requests may hold (defaults to
+                `max_concurrent - 1`, leaving one slot for other classes)
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if bulk_limit is None:
+            bulk_limit = max(1, max_concurrent - 1)
+        if not 1 <= bulk_limit <= max_concurrent:
+            raise ValueError("bulk_limit must be between 1 and max_concurrent")
+        self.max_concurrent = max_concurrent
+        self.bulk_limit = bulk_limit
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._active_bulk = 0
+        self.started: Dict[Priority, int] = {p: 0 for p in Priority}
+
+    @property
+    def active(self) -> int:
+        """Requests currently holding a slot."""
+        return self._active
+
+    def queued(self, priority: Optional[Priority] = None) -> int:
+        """Requests waiting for a slot (optionally of one class)."""
+        return sum(1 for p, _, _ in self._waiters if priority is None or p == priority)
+
+    def _can_start(self, priority: int) -> bool:
+        if self._active >= self.max_concurrent:
+            return False
+        return priority != Priority.BULK or self._active_bulk < self.bulk_limit
+
+    def _take(self, priority: int) -> None:
+        self._active += 1
+        if priority == Priority.BULK:
+            self._active_bulk += 1
+        self.started[Priority(priority)] += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, fut = self._waiters[0]
+            if not self._can_start(priority):
+                # the head has the highest priority waiting; if it cannot start,
+                # nothing behind it may either
+                return
+            heapq.heappop(self._waiters)
+            self._take(priority)
+            fut.set_result(None)
+
+    def try_acquire(self, priority: Priority = Priority.POLLING) -> bool:
+        """Take a slot without waiting; False if none is free or one is queued for."""
+        head = self._waiters[0][0] if self._waiters else None
+        if (head is None or head > priority) and self._can_start(priority):
+            self._take(priority)
+            return True
+        return False
+
+    async def acquire(self, priority: Priority = Priority.POLLING) -> None:
+        """Wait for a slot; higher classes waiting always go first."""
+        if self.try_acquire(priority):
+            return
+        fut = asyncio.get_running_loop().create_future()
+        entry = (int(priority), next(self._seq), fut)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # the slot was granted just before cancellation; hand it on
+                self.release(priority)
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake()
+            raise
+
+    def release(self, priority: Priority = Priority.POLLING) -> None:
+        """Return a slot taken with `acquire` or `try_acquire`."""
+        self._active -= 1
+        if priority == Priority.BULK:
+            self._active_bulk -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.POLLING) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
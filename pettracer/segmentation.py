@@ -0,0 +1,255 @@
+""" Stay-point and trip segmentation in a single streaming pass.
+
+    `StaySegmenter` consumes fixes one at a time and keeps O(1) state: the
+    running centroid of the current candidate stay and the accumulators of the
+    open trip. A candidate becomes a stay once the pet has remained within
+    `radius_m` of its centroid for at least `min_dwell`; everything between two
+    stays is a trip. The same object can replay stored history
+    (`push_positions`) and then keep going on new fixes from polling
+    (`push_device`). `FleetSegmenter` keeps one segmenter per device.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+from .geo import point_distance
+from .types import Device, LastPos
+
+
+@dataclass
+class StayPoint:
+    start: datetime
+    end: datetime
+    lat: float
+    lon: float
+    count: int
+
+    @property
+    def dwell(self) -> timedelta:
+        return self.end - self.start
+
+
+@dataclass
+class Trip:
+    start: datetime
+    end: datetime
+    start_lat: float
+    start_lon: float
+    end_lat: float
+    end_lon: float
+    distance_m: float
+    count: int
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+Segment = Union[StayPoint, Trip]
+
+
+def _dt(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class StaySegmenter:
+    """Streaming stay-point / trip segmentation for one device.
+
+    Example:
+        >>> seg = StaySegmenter(radius_m=50, min_dwell=timedelta(minutes=10))
+        >>> segments = seg.push_positions(history)
+        >>> segments += seg.push_device(latest_device)  # on every poll
+        >>> segments += seg.flush()                     # at end of day / history
+    """
+
+    def __init__(self, radius_m: float = 50.0, min_dwell: timedelta = timedelta(minutes=10)):
+        """Initialize the segmenter.
+
+        Args:
+            radius_m: maximum distance from the stay centroid in metres
+            min_dwell: minimum time spent within `radius_m` to count as a stay
+        """
+        self.radius_m = radius_m
+        self.min_dwell_s = min_dwell.total_seconds()
+        self._prev: Optional[tuple] = None
+        self._reset_cluster()
+        self._trip_open = False
+        self._trip_start_t = 0.0
+        self._trip_start_lat = 0.0
+        self._trip_start_lon = 0.0
+        self._trip_distance = 0.0
+        self._trip_count = 0
+
+    def _reset_cluster(self) -> None:
+        self._c_n = 0
+        self._c_sum_lat = 0.0
+        self._c_sum_lon = 0.0
+        self._c_start_t = 0.0
+        self._c_first_lat = 0.0
+        self._c_first_lon = 0.0
+        self._c_last_t = 0.0
+        self._c_last_lat = 0.0
+        self._c_last_lon = 0.0
+        self._c_entry = 0.0
+        self._c_path = 0.0
+
+    @property
+    def last_time(self) -> Optional[datetime]:
+        """Time of the most recently accepted fix."""
+        return _dt(self._prev[0]) if self._prev else None
+
+    def push(self, ts: float, lat: float, lon: float) -> List[Segment]:
+        """Consume one fix (time in epoch seconds) and return any completed segments.
+
+        Fixes not newer than the previous one are ignored, so repeated polls
+        that return the same `lastPos` are harmless.
+        """
+        prev = self._prev
+        if prev is not None and ts <= prev[0]:
+            return []
+        hop = point_distance(prev[1], prev[2], lat, lon) if prev is not None else 0.0
+        self._prev = (ts, lat, lon)
+
+        out: List[Segment] = []
+        if self._c_n:
+            c_lat = self._c_sum_lat / self._c_n
+            c_lon = self._c_sum_lon / self._c_n
+            if point_distance(c_lat, c_lon, lat, lon) <= self.radius_m:
+                self._c_n += 1
+                self._c_sum_lat += lat
+                self._c_sum_lon += lon
+                self._c_last_t, self._c_last_lat, self._c_last_lon = ts, lat, lon
+                self._c_path += hop
+                return out
+            self._close_cluster(out)
+        self._start_cluster(ts, lat, lon, hop)
+        return out
+
+    def _start_cluster(self, ts: float, lat: float, lon: float, entry: float) -> None:
+        self._c_n = 1
+        self._c_sum_lat, self._c_sum_lon = lat, lon
+        self._c_start_t, self._c_first_lat, self._c_first_lon = ts, lat, lon
+        self._c_last_t, self._c_last_lat, self._c_last_lon = ts, lat, lon
+        self._c_entry = entry
+        self._c_path = 0.0
+
+    def _close_cluster(self, out: List[Segment]) -> None:
+        if self._c_last_t - self._c_start_t >= self.min_dwell_s:
+            if self._trip_open:
+                out.append(Trip(
+                    start=_dt(self._trip_start_t),
+                    end=_dt(self._c_start_t),
+                    start_lat=self._trip_start_lat,
+                    start_lon=self._trip_start_lon,
+                    end_lat=self._c_first_lat,
+                    end_lon=self._c_first_lon,
+                    distance_m=self._trip_distance + self._c_entry,
+                    count=self._trip_count,
+                ))
+            out.append(StayPoint(
+                start=_dt(self._c_start_t),
+                end=_dt(self._c_last_t),
+                lat=self._c_sum_lat / self._c_n,
+                lon=self._c_sum_lon / self._c_n,
+                count=self._c_n,
+            ))
+            # the next trip leaves from the last fix of this stay
+            self._trip_open = True
+            self._trip_start_t = self._c_last_t
+            self._trip_start_lat, self._trip_start_lon = self._c_last_lat, self._c_last_lon
+            self._trip_distance = 0.0
+            self._trip_count = 0
+        else:
+            if not self._trip_open:
+                self._trip_open = True
+                self._trip_start_t = self._c_start_t
+                self._trip_start_lat, self._trip_start_lon = self._c_first_lat, self._c_first_lon
+                self._trip_distance = 0.0
+                self._trip_count = 0
+                self._c_entry = 0.0
+            self._trip_distance += self._c_entry + self._c_path
+            self._trip_count += self._c_n
+        self._reset_cluster()
+
+    def flush(self) -> List[Segment]:
+        """Close the open candidate stay and trip, returning the final segments.
+
+        The segmenter can keep consuming fixes afterwards; it starts fresh but
+        still ignores fixes older than the last one seen.
+        """
+        out: List[Segment] = []
+        if self._c_n:
+            last_t, last_lat, last_lon = self._c_last_t, self._c_last_lat, self._c_last_lon
+            stay = self._c_last_t - self._c_start_t >= self.min_dwell_s
+            self._close_cluster(out)
+            if not stay and self._trip_open:
+                out.append(Trip(
+                    start=_dt(self._trip_start_t),
+                    end=_dt(last_t),
+                    start_lat=self._trip_start_lat,
+                    start_lon=self._trip_start_lon,
+                    end_lat=last_lat,
+                    end_lon=last_lon,
+                    distance_m=self._trip_distance,
+                    count=self._trip_count,
+                ))
+        self._trip_open = False
+        return out
+
+    def push_positions(self, positions: Iterable[LastPos]) -> List[Segment]:
+        """Consume `LastPos` records in time order and return completed segments."""
+        out: List[Segment] = []
+        for p in positions:
+            if p is None or p.posLat is None or p.posLong is None or p.timeMeasure is None:
+                continue
+            out.extend(self.push(p.timeMeasure.timestamp(), p.posLat, p.posLong))
+        return out
+
+    def push_device(self, device: Device) -> List[Segment]:
+        """Consume `device.lastPos` from a poll and return completed segments."""
+        if device.lastPos is None:
+            return []
+        return self.push_positions([device.lastPos])
+
+
+def segment_track(
+    positions: Iterable[LastPos],
+    radius_m: float = 50.0,
+    min_dwell: timedelta = timedelta(minutes=10),
+) -> List[Segment]:
+    """Segment a complete, time-ordered history into stays and trips."""
+    seg = StaySegmenter(radius_m=radius_m, min_dwell=min_dwell)
+    out = seg.push_positions(sorted(
+        (p for p in positions if p is not None and p.timeMeasure is not None),
+        key=lambda p: p.timeMeasure,
+    ))
+    return out + seg.flush()
+
+
+class FleetSegmenter:
+    """One `StaySegmenter` per device, fed from polls or history syncs."""
+
+    def __init__(self, radius_m: float = 50.0, min_dwell: timedelta = timedelta(minutes=10)):
+        self.radius_m = radius_m
+        self.min_dwell = min_dwell
+        self._segmenters: Dict[int, StaySegmenter] = {}
+
+    def segmenter(self, device_id: int) -> StaySegmenter:
+        """Return (creating if needed) the segmenter for a device."""
+        seg = self._segmenters.get(device_id)
+        if seg is None:
+            seg = self._segmenters[device_id] = StaySegmenter(self.radius_m, self.min_dwell)
+        return seg
+
+    def push_devices(self, devices: Iterable[Device]) -> Dict[int, List[Segment]]:
+        """Feed the `lastPos` of each polled device; returns new segments per device."""
+        out: Dict[int, List[Segment]] = {}
+        for d in devices:
+            segments = self.segmenter(d.id).push_device(d)
+            if segments:
+                out[d.id] = segments
+        return out
+
+    def push_positions(self, device_id: int, positions: Iterable[LastPos]) -> List[Segment]:
+        """Feed synced history for one device."""
+        return self.segmenter(device_id).push_positions(positions)
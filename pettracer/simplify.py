@@ -0,0 +1,183 @@
+""" Track simplification for map rendering.
+
+    Douglas-Peucker (optionally time-aware, using the synchronized Euclidean
+    distance) and radial-distance simplification over position histories such
+    as those returned by `get_ccpositions`. Both are iterative, work on NumPy
+    arrays and return the indices of the fixes to keep, so callers can select
+    from the original `LastPos` list or from `PositionArrays`.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .trajectory import EARTH_RADIUS_M, PositionArrays
+from .types import LastPos
+
+
+def project_local(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Project coordinates to a local equirectangular plane in metres.
+
+    The projection is centred on the mean latitude of the track, which keeps the
+    distortion well below typical GPS error for tracks spanning a few tens of km.
+
+    Returns:
+        (n, 2) array of x (east) and y (north) in metres
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if lat.size == 0:
+        return np.empty((0, 2))
+    k = np.pi / 180.0 * EARTH_RADIUS_M
+    cos_lat0 = np.cos(np.radians(lat.mean()))
+    xy = np.empty((lat.size, 2))
+    xy[:, 0] = (lon - lon[0]) * k * cos_lat0
+    xy[:, 1] = (lat - lat[0]) * k
+    return xy
+
+
+def _segment_distances(xy: np.ndarray, t: Optional[np.ndarray], start: int, end: int) -> np.ndarray:
+    """Distances of points start+1..end-1 from the segment start-end.
+
+    With `t` the synchronized Euclidean distance is used: each point is compared
+    with the position interpolated along the segment at its own timestamp.
+    """
+    inner = xy[start + 1:end]
+    a = xy[start]
+    ab = xy[end] - a
+    if t is not None:
+        span = t[end] - t[start]
+        frac = (t[start + 1:end] - t[start]) / span if span > 0 else np.zeros(end - start - 1)
+    else:
+        denom = ab[0] * ab[0] + ab[1] * ab[1]
+        if denom == 0.0:
+            frac = np.zeros(end - start - 1)
+        else:
+            frac = np.clip(((inner[:, 0] - a[0]) * ab[0] + (inner[:, 1] - a[1]) * ab[1]) / denom, 0.0, 1.0)
+    dx = inner[:, 0] - (a[0] + frac * ab[0])
+    dy = inner[:, 1] - (a[1] + frac * ab[1])
+    return np.hypot(dx, dy)
+
+
+def douglas_peucker(xy: np.ndarray, tolerance: float, t: Optional[np.ndarray] = None) -> np.ndarray:
+    """Douglas-Peucker simplification using an explicit stack (no recursion).
+
+    Args:
+        xy: (n, 2) planar coordinates in metres (see `project_local`)
+        tolerance: maximum allowed deviation in metres
+        t: optional timestamps; when given the time-aware (SED) variant is used
+
+    Returns:
+        Sorted integer indices of the points to keep (always includes the endpoints)
+    """
+    n = xy.shape[0]
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        d = _segment_distances(xy, t, start, end)
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def radial_distance(
+    xy: np.ndarray,
+    tolerance: float,
+    t: Optional[np.ndarray] = None,
+    max_interval: Optional[float] = None,
+) -> np.ndarray:
+    """Keep a point once it is `tolerance` metres from the last kept point.
+
+    When `t` and `max_interval` are given the filter is time-aware: a point is
+    also kept if more than `max_interval` seconds passed since the last kept
+    point, so long rests remain visible on a time slider.
+
+    The search for the next kept point scans forward in vectorized windows that
+    grow geometrically, so the Python-level work is proportional to the number of
+    kept points rather than the number of input points.
+
+    Returns:
+        Sorted integer indices of the points to keep (always includes the endpoints)
+    """
+    n = xy.shape[0]
+    if n <= 2:
+        return np.arange(n)
+    time_aware = t is not None and max_interval is not None
+    tol2 = tolerance * tolerance
+    kept: List[int] = [0]
+    last = 0
+    window = 64
+    while True:
+        start = last + 1
+        if start >= n:
+            break
+        hit = -1
+        while start < n:
+            stop = min(n, start + window)
+            dx = xy[start:stop, 0] - xy[last, 0]
+            dy = xy[start:stop, 1] - xy[last, 1]
+            far = dx * dx + dy * dy > tol2
+            if time_aware:
+                far |= t[start:stop] - t[last] > max_interval
+            j = int(np.argmax(far))
+            if far[j]:
+                hit = start + j
+                window = max(64, window // 2)
+                break
+            start = stop
+            window *= 2
+        if hit < 0:
+            break
+        kept.append(hit)
+        last = hit
+    if kept[-1] != n - 1:
+        kept.append(n - 1)
+    return np.asarray(kept, dtype=np.int64)
+
+
+def simplify_positions(
+    positions: Sequence[LastPos],
+    tolerance: float,
+    method: str = "douglas_peucker",
+    time_aware: bool = False,
+    max_interval: Optional[float] = None,
+) -> List[LastPos]:
+    """Simplify a `LastPos` history and return the retained records.
+
+    Args:
+        positions: position records, e.g. from `get_ccpositions`
+        tolerance: deviation tolerance in metres
+        method: "douglas_peucker" or "radial"
+        time_aware: use the synchronized Euclidean distance for Douglas-Peucker
+        max_interval: for "radial", always keep a point after this many seconds
+
+    Returns:
+        List of the kept LastPos records in time order
+
+    Raises:
+        ValueError: for an unknown method or negative tolerance
+    """
+    if tolerance < 0:
+        raise ValueError("tolerance must be non-negative")
+    valid = sorted(
+        (p for p in positions if p is not None and p.posLat is not None and p.posLong is not None and p.timeMeasure is not None),
+        key=lambda p: p.timeMeasure,
+    )
+    arrays = PositionArrays.from_positions(valid, sort=False)
+    xy = project_local(arrays.lat, arrays.lon)
+    if method == "douglas_peucker":
+        idx = douglas_peucker(xy, tolerance, t=arrays.t if time_aware else None)
+    elif method == "radial":
+        idx = radial_distance(xy, tolerance, t=arrays.t, max_interval=max_interval)
+    else:
+        raise ValueError(f"Unknown simplification method: {method}")
+    return [valid[i] for i in idx]
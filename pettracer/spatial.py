@@ -0,0 +1,227 @@
+""" Spatial index over stored position history.
+
+    `PositionIndex` buckets `LastPos` records per device into a fixed lat/lon
+    grid. Each bucket keeps its row numbers sorted by `timeMeasure`, so a
+    bounding-box or radius query only visits the cells it overlaps and narrows
+    each cell to the requested time window with a binary search. New positions
+    can be added at any time (e.g. after each `get_ccpositions` sync); records
+    already indexed are skipped by their `id`.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .trajectory import EARTH_RADIUS_M, haversine
+from .types import LastPos
+
+
+class _Bucket:
+    """Rows of one grid cell with their time and coordinates, sorted by time once consolidated."""
+    __slots__ = ("t", "lat", "lon", "rows", "_pending")
+
+    def __init__(self):
+        self.t = np.empty(0, dtype=np.float64)
+        self.lat = np.empty(0, dtype=np.float64)
+        self.lon = np.empty(0, dtype=np.float64)
+        self.rows = np.empty(0, dtype=np.int64)
+        self._pending: List[Tuple[float, float, float, int]] = []
+
+    def append(self, t: float, lat: float, lon: float, row: int) -> None:
+        self._pending.append((t, lat, lon, row))
+
+    def consolidate(self) -> None:
+        if not self._pending:
+            return
+        new = np.array(self._pending, dtype=np.float64)
+        self._pending = []
+        t = np.concatenate((self.t, new[:, 0]))
+        lat = np.concatenate((self.lat, new[:, 1]))
+        lon = np.concatenate((self.lon, new[:, 2]))
+        rows = np.concatenate((self.rows, new[:, 3].astype(np.int64)))
+        # typical syncs append newer data, so a sort is only needed on overlap
+        if np.any(np.diff(t) < 0):
+            order = np.argsort(t, kind="stable")
+            t, lat, lon, rows = t[order], lat[order], lon[order], rows[order]
+        self.t, self.lat, self.lon, self.rows = t, lat, lon, rows
+
+    def window(self, start: float, end: float) -> slice:
+        self.consolidate()
+        return slice(np.searchsorted(self.t, start, side="left"), np.searchsorted(self.t, end, side="right"))
+
+
+class _DeviceIndex:
+    __slots__ = ("records", "ids", "buckets")
+
+    def __init__(self):
+        self.records: List[LastPos] = []
+        self.ids: Set[int] = set()
+        self.buckets: Dict[Tuple[int, int], _Bucket] = {}
+
+
+def _timestamp(value: Optional[datetime], default: float) -> float:
+    return default if value is None else value.timestamp()
+
+
+class PositionIndex:
+    """Grid index over `LastPos` history for bounding-box and radius queries.
+
+    Example:
+        >>> index = PositionIndex()
+        >>> index.add_positions(14758, await device.get_positions(start_ms, end_ms))
+        >>> visits = index.query_radius(14758, 51.4003, -1.0848, 25, start=jan_1)
+    """
+
+    def __init__(self, cell_size_deg: float = 0.002):
+        """Initialize an empty index.
+
+        Args:
+            cell_size_deg: grid cell size in degrees (0.002 is roughly 200 m)
+        """
+        if cell_size_deg <= 0:
+            raise ValueError("cell_size_deg must be positive")
+        self._cell = cell_size_deg
+        self._devices: Dict[int, _DeviceIndex] = {}
+
+    @property
+    def device_ids(self) -> List[int]:
+        """Devices with at least one indexed position."""
+        return [d for d, idx in self._devices.items() if idx.records]
+
+    def __len__(self) -> int:
+        return sum(len(idx.records) for idx in self._devices.values())
+
+    def count(self, device_id: int) -> int:
+        """Number of positions indexed for a device."""
+        idx = self._devices.get(device_id)
+        return len(idx.records) if idx else 0
+
+    def add_positions(self, device_id: int, positions: Iterable[LastPos]) -> int:
+        """Index new positions for a device.
+
+        Records without coordinates or `timeMeasure`, and records whose `id`
+        is already indexed for this device, are skipped.
+
+        Returns:
+            Number of positions added
+        """
+        idx = self._devices.setdefault(device_id, _DeviceIndex())
+        cell = self._cell
+        added = 0
+        for p in positions:
+            if p is None or p.posLat is None or p.posLong is None or p.timeMeasure is None:
+                continue
+            if p.id is not None:
+                if p.id in idx.ids:
+                    continue
+                idx.ids.add(p.id)
+            row = len(idx.records)
+            idx.records.append(p)
+            key = (int(np.floor(p.posLat / cell)), int(np.floor(p.posLong / cell)))
+            bucket = idx.buckets.get(key)
+            if bucket is None:
+                bucket = idx.buckets[key] = _Bucket()
+            bucket.append(p.timeMeasure.timestamp(), p.posLat, p.posLong, row)
+            added += 1
+        return added
+
+    def _cells(self, idx: _DeviceIndex, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        c0, c1 = int(np.floor(min_lat / self._cell)), int(np.floor(max_lat / self._cell))
+        d0, d1 = int(np.floor(min_lon / self._cell)), int(np.floor(max_lon / self._cell))
+        span = (c1 - c0 + 1) * (d1 - d0 + 1)
+        if span > len(idx.buckets):
+            return [b for (ci, cj), b in idx.buckets.items() if c0 <= ci <= c1 and d0 <= cj <= d1]
+        buckets = []
+        for ci in range(c0, c1 + 1):
+            for cj in range(d0, d1 + 1):
+                b = idx.buckets.get((ci, cj))
+                if b is not None:
+                    buckets.append(b)
+        return buckets
+
+    def _query_rows(
+        self,
+        idx: _DeviceIndex,
+        box: Tuple[float, float, float, float],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        centre: Optional[Tuple[float, float, float]] = None,
+    ) -> np.ndarray:
+        t0 = _timestamp(start, -np.inf)
+        t1 = _timestamp(end, np.inf)
+        min_lat, min_lon, max_lat, max_lon = box
+        parts = []
+        for b in self._cells(idx, *box):
+            w = b.window(t0, t1)
+            lat, lon = b.lat[w], b.lon[w]
+            if not lat.size:
+                continue
+            inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+            if centre is not None:
+                inside &= haversine(centre[0], centre[1], lat, lon) <= centre[2]
+            parts.append(b.rows[w][inside])
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def _devices_for(self, device_id: Optional[int]) -> List[Tuple[int, _DeviceIndex]]:
+        if device_id is None:
+            return list(self._devices.items())
+        idx = self._devices.get(device_id)
+        return [(device_id, idx)] if idx else []
+
+    def query_bbox(
+        self,
+        device_id: Optional[int],
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[LastPos]:
+        """Return positions inside a bounding box, optionally within [start, end].
+
+        Args:
+            device_id: device to search, or None for all devices
+
+        Returns:
+            Matching LastPos records in time order (per device)
+        """
+        results: List[LastPos] = []
+        for _, idx in self._devices_for(device_id):
+            rows = self._query_rows(idx, (min_lat, min_lon, max_lat, max_lon), start, end)
+            results.extend(self._ordered(idx, rows))
+        return results
+
+    def query_radius(
+        self,
+        device_id: Optional[int],
+        lat: float,
+        lon: float,
+        radius_m: float,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[LastPos]:
+        """Return positions within `radius_m` metres of a point, optionally within [start, end].
+
+        Args:
+            device_id: device to search, or None for all devices
+
+        Returns:
+            Matching LastPos records in time order (per device)
+        """
+        dlat = np.degrees(radius_m / EARTH_RADIUS_M)
+        dlon = np.degrees(radius_m / (EARTH_RADIUS_M * max(np.cos(np.radians(lat)), 1e-6)))
+        box = (lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        results: List[LastPos] = []
+        for _, idx in self._devices_for(device_id):
+            rows = self._query_rows(idx, box, start, end, centre=(lat, lon, radius_m))
+            results.extend(self._ordered(idx, rows))
+        return results
+
+    @staticmethod
+    def _ordered(idx: _DeviceIndex, rows: np.ndarray) -> List[LastPos]:
+        records = [idx.records[r] for r in rows]
+        records.sort(key=lambda p: p.timeMeasure)
+        return records
@@ -0,0 +1,141 @@
+""" Incremental ingestion of device telegrams (`fiFo`).
+
+    Every device poll returns the device's recent `fiFo` telegram list, which
+    is mostly unchanged between polls. `TelegramTracker` remembers the highest
+    `TelegramPacket.id` and the `lastTlgNr` seen per device and parses only
+    the entries that are new, so repeated polls cost a dict lookup per device
+    when nothing changed. A bounded history of parsed entries can be kept per
+    device with `max_retained`.
+
+    `peek` computes a `TelegramUpdate` without changing the tracker and
+    `commit` applies it, so a caller parsing a whole response can commit only
+    once every device in it has parsed; `ingest` does both at once.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from .types import FifoEntry
+
+
+def _telegram_id(raw: Any) -> Optional[int]:
+    if not isinstance(raw, dict):
+        return None
+    telegram = raw.get("telegram")
+    if not isinstance(telegram, dict):
+        return None
+    return telegram.get("id")
+
+
+@dataclass
+class TelegramUpdate:
+    """Tracker changes for one device dict, computed by `TelegramTracker.peek`."""
+    device_id: Any
+    entries: List[FifoEntry] = field(default_factory=list)
+    last_id: Optional[int] = None
+    tlg_nr: Optional[int] = None
+    skipped: bool = False
+
+
+class TelegramTracker:
+    """Track the newest telegram per device and emit only unseen ones.
+
+    Entries without a telegram id cannot be de-duplicated and are skipped.
+
+    Example:
+        >>> tracker = TelegramTracker(max_retained=100)
+        >>> client = PetTracerClient(telegram_tracker=tracker)
+        >>> devices = await client.get_all_devices()   # device.fiFo holds only new telegrams
+        >>> history = tracker.retained(14758)
+    """
+
+    def __init__(self, max_retained: Optional[int] = None):
+        """Initialize the tracker.
+
+        Args:
+            max_retained: number of parsed entries kept per device (None keeps none)
+        """
+        self.max_retained = max_retained
+        self._last_id: Dict[int, int] = {}
+        self._last_tlg_nr: Dict[int, int] = {}
+        self._retained: Dict[int, Deque[FifoEntry]] = {}
+        self.skipped_polls = 0
+
+    def last_id(self, device_id: int) -> Optional[int]:
+        """Highest telegram id ingested for a device."""
+        return self._last_id.get(device_id)
+
+    def peek(self, item: Dict[str, Any]) -> TelegramUpdate:
+        """Parse the unseen `fiFo` entries of one raw device dict without recording them.
+
+        Args:
+            item: device JSON object as returned by `getccs` / `getccinfo`
+
+        Returns:
+            TelegramUpdate whose `entries` are the new FifoEntry objects in
+            telegram id order; pass it to `commit` to mark them as seen
+        """
+        device_id = item.get("id")
+        tlg_nr = item.get("lastTlgNr")
+        if tlg_nr is not None and device_id in self._last_tlg_nr and self._last_tlg_nr[device_id] == tlg_nr:
+            # no new telegram since the previous poll
+            return TelegramUpdate(device_id, skipped=True)
+
+        last = self._last_id.get(device_id)
+        fresh = []
+        for raw in item.get("fiFo") or ():
+            tid = _telegram_id(raw)
+            if tid is not None and (last is None or tid > last):
+                fresh.append((tid, raw))
+        fresh.sort(key=lambda x: x[0])
+
+        # de-duplicate within one response as well
+        entries: List[FifoEntry] = []
+        for tid, raw in fresh:
+            if last is not None and tid <= last:
+                continue
+            entries.append(FifoEntry.from_dict(raw))
+            last = tid
+        return TelegramUpdate(device_id, entries, last, tlg_nr)
+
+    def commit(self, updates: Iterable[TelegramUpdate]) -> None:
+        """Record updates from `peek`, in order."""
+        for update in updates:
+            device_id = update.device_id
+            if update.skipped:
+                self.skipped_polls += 1
+                continue
+            if update.last_id is not None:
+                self._last_id[device_id] = update.last_id
+            if update.tlg_nr is not None:
+                self._last_tlg_nr[device_id] = update.tlg_nr
+            if update.entries and self.max_retained:
+                store = self._retained.get(device_id)
+                if store is None:
+                    store = self._retained[device_id] = deque(maxlen=self.max_retained)
+                store.extend(update.entries)
+
+    def ingest(self, item: Dict[str, Any]) -> List[FifoEntry]:
+        """Parse and record the unseen `fiFo` entries of one raw device dict.
+
+        Args:
+            item: device JSON object as returned by `getccs` / `getccinfo`
+
+        Returns:
+            New FifoEntry objects in telegram id order
+        """
+        update = self.peek(item)
+        self.commit([update])
+        return update.entries
+
+    def retained(self, device_id: int) -> List[FifoEntry]:
+        """Retained entries of a device, oldest first."""
+        return list(self._retained.get(device_id, ()))
+
+    def reset(self, device_id: Optional[int] = None) -> None:
+        """Forget state for one device (or all), so the next poll re-emits its telegrams."""
+        for store in (self._last_id, self._last_tlg_nr, self._retained):
+            if device_id is None:
+                store.clear()
+            else:
+                store.pop(device_id, None)
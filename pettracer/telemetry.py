@@ -0,0 +1,234 @@
+""" Bounded in-memory time series for polled device telemetry.
+
+    `RingSeries` keeps the last `capacity` samples of one value in fixed-size
+    `array('d')` buffers. Rolling min/max use monotonic deques and mean/slope
+    use running sums, so every query is O(1) and every push is O(1) amortized.
+    `TelemetryStore` keeps one `DeviceTelemetry` per device with series for
+    `bat`, `chg`, `lastRssi`, `status` and `masterHs.bat`, fed from each poll,
+    e.g. to estimate when a battery will run flat.
+"""
+from array import array
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .types import Device
+
+
+class RingSeries:
+    """Fixed-capacity series of (time, value) samples with rolling statistics.
+
+    Statistics cover the samples currently held (the last `capacity` pushes).
+    Times are seconds since the Unix epoch; slope is in value units per second.
+
+    Example:
+        >>> bat = RingSeries(capacity=288)
+        >>> bat.push(ts, 4012)
+        >>> bat.min, bat.max, bat.mean, bat.slope
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._t = array("d", bytes(8 * capacity))
+        self._v = array("d", bytes(8 * capacity))
+        self._count = 0      # samples pushed so far (sequence number of the next one)
+        self._t0: Optional[float] = None
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._reset_sums()
+
+    def _reset_sums(self) -> None:
+        self._st = self._sv = self._stt = self._stv = 0.0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        """Time of the newest sample."""
+        return self._t[(self._count - 1) % self.capacity] + self._t0 if self._count else None
+
+    @property
+    def latest(self) -> Optional[float]:
+        """Value of the newest sample."""
+        return self._v[(self._count - 1) % self.capacity] if self._count else None
+
+    def push(self, ts: float, value: float) -> bool:
+        """Append a sample, evicting the oldest one when full.
+
+        Samples not newer than the newest one are ignored, so repeated polls
+        with the same `lastContact` do not add duplicates.
+
+        Returns:
+            True if the sample was stored
+        """
+        if self._count and ts <= self.last_time:
+            return False
+        if self._t0 is None:
+            # times are stored relative to the first sample to keep the sums well conditioned
+            self._t0 = ts
+        t = ts - self._t0
+        value = float(value)
+        seq = self._count
+        slot = seq % self.capacity
+        if seq >= self.capacity:
+            old_t, old_v = self._t[slot], self._v[slot]
+            self._st -= old_t
+            self._sv -= old_v
+            self._stt -= old_t * old_t
+            self._stv -= old_t * old_v
+        self._t[slot] = t
+        self._v[slot] = value
+        self._st += t
+        self._sv += value
+        self._stt += t * t
+        self._stv += t * value
+        self._count += 1
+
+        # monotonic deques: the front is the min / max of the current window
+        oldest = self._count - len(self)
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+
+        if self._count % self.capacity == 0:
+            # once per buffer turn: recompute sums to stop floating-point drift
+            self._recompute_sums()
+        return True
+
+    def _recompute_sums(self) -> None:
+        self._reset_sums()
+        for t, v in zip(self._t, self._v):
+            self._st += t
+            self._sv += v
+            self._stt += t * t
+            self._stv += t * v
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        n = len(self)
+        return self._sv / n if n else None
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Least-squares slope of value over time (units per second)."""
+        n = len(self)
+        if n < 2:
+            return None
+        denom = n * self._stt - self._st * self._st
+        if denom <= 0:
+            return None
+        return (n * self._stv - self._st * self._sv) / denom
+
+    def time_to(self, threshold: float) -> Optional[timedelta]:
+        """Estimated time from the newest sample until the fitted trend reaches `threshold`.
+
+        Returns:
+            timedelta, or None when the trend does not reach the threshold in the future
+        """
+        slope = self.slope
+        if slope is None or slope == 0:
+            return None
+        intercept = (self._sv - slope * self._st) / len(self)
+        t_last = self._t[(self._count - 1) % self.capacity]
+        remaining = (threshold - intercept) / slope - t_last
+        if remaining < 0:
+            return None
+        return timedelta(seconds=remaining)
+
+    def times(self) -> array:
+        """Sample times (epoch seconds), oldest first."""
+        return array("d", (t + self._t0 for t in self._ordered(self._t)))
+
+    def values(self) -> array:
+        """Sample values, oldest first."""
+        return array("d", self._ordered(self._v))
+
+    def _ordered(self, buf: array) -> array:
+        if self._count <= self.capacity:
+            return buf[:self._count]
+        slot = self._count % self.capacity
+        return buf[slot:] + buf[:slot]
+
+
+class DeviceTelemetry:
+    """Telemetry series of one device."""
+
+    def __init__(self, capacity: int = 1024):
+        self.bat = RingSeries(capacity)
+        self.chg = RingSeries(capacity)
+        self.lastRssi = RingSeries(capacity)
+        self.status = RingSeries(capacity)
+        self.hs_bat = RingSeries(capacity)
+
+    def push_device(self, device: Device, at: Optional[datetime] = None) -> int:
+        """Record the telemetry fields of one polled `Device`.
+
+        Args:
+            device: device as returned by `get_all_devices` / `get_info`
+            at: sample time (defaults to `device.lastContact`, then now)
+
+        Returns:
+            Number of series that stored a new sample
+        """
+        when = at or device.lastContact or datetime.now(timezone.utc)
+        ts = when.timestamp()
+        hs_bat = device.masterHs.bat if device.masterHs is not None else None
+        stored = 0
+        for series, value in (
+            (self.bat, device.bat),
+            (self.chg, device.chg),
+            (self.lastRssi, device.lastRssi),
+            (self.status, device.status),
+            (self.hs_bat, hs_bat),
+        ):
+            if value is not None and series.push(ts, value):
+                stored += 1
+        return stored
+
+
+class TelemetryStore:
+    """One `DeviceTelemetry` per device, fed from polls.
+
+    Example:
+        >>> store = TelemetryStore(capacity=288)
+        >>> store.push_devices(await client.get_all_devices())   # on every poll
+        >>> store.get(14758).bat.time_to(3600)                   # time until 3.6 V
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._devices: Dict[int, DeviceTelemetry] = {}
+
+    def get(self, device_id: int) -> DeviceTelemetry:
+        """Return (creating if needed) the telemetry of a device."""
+        telemetry = self._devices.get(device_id)
+        if telemetry is None:
+            telemetry = self._devices[device_id] = DeviceTelemetry(self.capacity)
+        return telemetry
+
+    def push_devices(self, devices: Iterable[Device], at: Optional[datetime] = None) -> None:
+        """Record one poll of devices."""
+        for device in devices:
+            self.get(device.id).push_device(device, at=at)
+
+    def device_ids(self) -> List[int]:
+        """Devices with recorded telemetry."""
+        return sorted(self._devices)
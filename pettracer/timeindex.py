@@ -0,0 +1,204 @@
+""" Time index over position history.
+
+    `TimeIndex` keeps one device's positions sorted by `timeMeasure` in NumPy
+    arrays. Point lookups ("where was the pet at 14:32?") use a binary search,
+    interpolation uses the two bracketing fixes, and `resample` maps the whole
+    track onto a regular time grid in one vectorized call for charting.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .types import LastPos
+
+
+@dataclass
+class InterpolatedPosition:
+    """Position estimated at `time` between the fixes `before` and `after`.
+
+    When `time` falls exactly on a fix, `before` and `after` are the same record.
+    """
+    time: datetime
+    lat: float
+    lon: float
+    before: LastPos
+    after: LastPos
+
+
+@dataclass
+class ResampledTrack:
+    """Track resampled onto a regular grid. Samples with no data are NaN."""
+    times: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+
+
+class TimeIndex:
+    """Sorted index of positions keyed by `timeMeasure`.
+
+    Example:
+        >>> index = TimeIndex(await device.get_positions(start_ms, end_ms))
+        >>> fix = index.nearest(datetime(2025, 12, 31, 14, 32, tzinfo=timezone.utc))
+        >>> where = index.interpolate(datetime(2025, 12, 31, 14, 32, tzinfo=timezone.utc))
+    """
+
+    def __init__(self, positions: Iterable[LastPos] = ()):
+        self._t = np.empty(0, dtype=np.float64)
+        self._lat = np.empty(0, dtype=np.float64)
+        self._lon = np.empty(0, dtype=np.float64)
+        self._records: List[LastPos] = []
+        self._ids = set()
+        self.add(positions)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def start(self) -> Optional[datetime]:
+        """Time of the earliest fix."""
+        return self._records[0].timeMeasure if self._records else None
+
+    @property
+    def end(self) -> Optional[datetime]:
+        """Time of the latest fix."""
+        return self._records[-1].timeMeasure if self._records else None
+
+    def add(self, positions: Iterable[LastPos]) -> int:
+        """Merge a batch of positions into the index.
+
+        Records without coordinates or `timeMeasure`, and records whose `id`
+        is already present, are skipped. Batches newer than the index are
+        appended without re-sorting.
+
+        Returns:
+            Number of positions added
+        """
+        batch: List[LastPos] = []
+        for p in positions:
+            if p is None or p.posLat is None or p.posLong is None or p.timeMeasure is None:
+                continue
+            if p.id is not None:
+                if p.id in self._ids:
+                    continue
+                self._ids.add(p.id)
+            batch.append(p)
+        if not batch:
+            return 0
+
+        t = np.array([p.timeMeasure.timestamp() for p in batch], dtype=np.float64)
+        lat = np.array([p.posLat for p in batch], dtype=np.float64)
+        lon = np.array([p.posLong for p in batch], dtype=np.float64)
+        all_t = np.concatenate((self._t, t))
+        all_lat = np.concatenate((self._lat, lat))
+        all_lon = np.concatenate((self._lon, lon))
+        records = self._records + batch
+        if np.any(np.diff(all_t) < 0):
+            order = np.argsort(all_t, kind="stable")
+            all_t, all_lat, all_lon = all_t[order], all_lat[order], all_lon[order]
+            records = [records[i] for i in order]
+        self._t, self._lat, self._lon, self._records = all_t, all_lat, all_lon, records
+        return len(batch)
+
+    def _bracket(self, ts: float) -> Tuple[int, int]:
+        """Indices (i, j) with t[i] <= ts <= t[j]; -1 / len when outside the range."""
+        j = int(np.searchsorted(self._t, ts, side="left"))
+        if j < len(self._t) and self._t[j] == ts:
+            return j, j
+        return j - 1, j
+
+    def nearest(self, when: datetime, max_gap: Optional[timedelta] = None) -> Optional[LastPos]:
+        """Return the fix closest in time to `when`.
+
+        Args:
+            when: timezone-aware time to look up
+            max_gap: if given, return None when the nearest fix is further away
+
+        Returns:
+            LastPos record or None if the index is empty or no fix is close enough
+        """
+        if not self._records:
+            return None
+        ts = when.timestamp()
+        i, j = self._bracket(ts)
+        candidates = [k for k in (i, j) if 0 <= k < len(self._records)]
+        best = min(candidates, key=lambda k: abs(self._t[k] - ts))
+        if max_gap is not None and abs(self._t[best] - ts) > max_gap.total_seconds():
+            return None
+        return self._records[best]
+
+    def interpolate(self, when: datetime, max_gap: Optional[timedelta] = None) -> Optional[InterpolatedPosition]:
+        """Linearly interpolate the position at `when` from the bracketing fixes.
+
+        Args:
+            when: timezone-aware time to look up
+            max_gap: if given, return None when the bracketing fixes are further apart
+
+        Returns:
+            InterpolatedPosition, or None outside the indexed time range
+        """
+        ts = when.timestamp()
+        i, j = self._bracket(ts)
+        if i < 0 or j >= len(self._records):
+            return None
+        if i == j:
+            p = self._records[i]
+            return InterpolatedPosition(when, float(self._lat[i]), float(self._lon[i]), p, p)
+        span = self._t[j] - self._t[i]
+        if max_gap is not None and span > max_gap.total_seconds():
+            return None
+        f = (ts - self._t[i]) / span
+        return InterpolatedPosition(
+            time=when,
+            lat=float(self._lat[i] + f * (self._lat[j] - self._lat[i])),
+            lon=float(self._lon[i] + f * (self._lon[j] - self._lon[i])),
+            before=self._records[i],
+            after=self._records[j],
+        )
+
+    def range(self, start: datetime, end: datetime) -> List[LastPos]:
+        """Return the fixes with `start <= timeMeasure <= end` in time order."""
+        lo = int(np.searchsorted(self._t, start.timestamp(), side="left"))
+        hi = int(np.searchsorted(self._t, end.timestamp(), side="right"))
+        return self._records[lo:hi]
+
+    def resample(
+        self,
+        start: datetime,
+        end: datetime,
+        step: timedelta,
+        max_gap: Optional[timedelta] = None,
+    ) -> ResampledTrack:
+        """Interpolate the track onto a regular grid from `start` to `end` inclusive.
+
+        Samples outside the indexed range, or between fixes further apart than
+        `max_gap`, are NaN.
+
+        Returns:
+            ResampledTrack with `times` as seconds since the Unix epoch
+        """
+        step_s = step.total_seconds()
+        if step_s <= 0:
+            raise ValueError("step must be positive")
+        t0 = start.timestamp()
+        count = int(np.floor((end.timestamp() - t0) / step_s)) + 1
+        times = t0 + np.arange(max(count, 0)) * step_s
+        lat = np.full(times.shape, np.nan)
+        lon = np.full(times.shape, np.nan)
+        if len(self._records) == 0 or times.size == 0:
+            return ResampledTrack(times, lat, lon)
+
+        valid = (times >= self._t[0]) & (times <= self._t[-1])
+        if max_gap is not None and len(self._t) > 1:
+            j = np.clip(np.searchsorted(self._t, times, side="left"), 1, len(self._t) - 1)
+            on_fix = (self._t[j] == times) | (self._t[j - 1] == times)
+            valid &= on_fix | (self._t[j] - self._t[j - 1] <= max_gap.total_seconds())
+        lat[valid] = np.interp(times[valid], self._t, self._lat)
+        lon[valid] = np.interp(times[valid], self._t, self._lon)
+        return ResampledTrack(times, lat, lon)
+
+    @staticmethod
+    def to_datetimes(times: np.ndarray) -> List[datetime]:
+        """Convert epoch-second arrays (e.g. `ResampledTrack.times`) to UTC datetimes."""
+        return [datetime.fromtimestamp(float(ts), tz=timezone.utc) for ts in times]
@@ -0,0 +1,151 @@
+""" Adaptive per-endpoint request timeouts.
+
+    `AdaptiveTimeouts` keeps a running, log-bucketed latency histogram per
+    endpoint and derives the read budget of the next request from it:
+    `multiplier` x the `percentile` latency, clamped to
+    `[min_read, max_read]`. The connect budget is fixed by `connect`, so a
+    dead host fails fast while a slow response still gets time to arrive. The
+    caller's `timeout` stays a ceiling: adaptive budgets only ever shorten it.
+
+    `getccpositions` latency grows with the requested range, so its samples
+    are normalized by `range_scale(span)` (the span in `range_unit`s, at least
+    1) and the read budget is multiplied back for the next request's span
+    (still capped by `max_read`).
+    Until an endpoint has `min_samples` observations the caller's fixed
+    `timeout` is used. Timed-out requests are recorded at the time they
+    took, so the timeout grows when the portal slows down. Older samples are
+    halved away every `window` observations.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional
+import math
+
+import aiohttp
+
+
+@dataclass(frozen=True)
+class TimeoutPolicy:
+    """Adaptive timeout settings.
+
+    Args:
+        connect: connection budget in seconds (pool wait + connect)
+        percentile: latency percentile (0-1) the read budget is based on
+        multiplier: read budget as a multiple of that percentile
+        min_read: lower bound of the read budget in seconds
+        max_read: upper bound of the read budget in seconds (after range scaling)
+        min_samples: observations needed before an endpoint is adaptive
+        window: observations after which older samples are down-weighted
+        range_unit: position range that counts as one unit of work
+    """
+    connect: float = 5.0
+    percentile: float = 0.99
+    multiplier: float = 3.0
+    min_read: float = 1.0
+    max_read: float = 60.0
+    min_samples: int = 20
+    window: int = 500
+    range_unit: timedelta = timedelta(days=1)
+
+
+DEFAULT_TIMEOUT_POLICY = TimeoutPolicy()
+
+
+class LatencyHistogram:
+    """Log-spaced latency histogram (1 ms .. ~1000 s) with periodic decay."""
+
+    BUCKETS_PER_DECADE = 20
+    MIN_LATENCY = 0.001
+    DECADES = 6
+
+    def __init__(self, window: int = 500):
+        self._counts: List[float] = [0.0] * (self.BUCKETS_PER_DECADE * self.DECADES + 1)
+        self._total = 0.0
+        self._window = window
+        self.observations = 0
+
+    def _bucket(self, latency: float) -> int:
+        if latency <= self.MIN_LATENCY:
+            return 0
+        index = math.ceil(math.log10(latency / self.MIN_LATENCY) * self.BUCKETS_PER_DECADE)
+        return min(index, len(self._counts) - 1)
+
+    def _upper(self, index: int) -> float:
+        return self.MIN_LATENCY * 10 ** (index / self.BUCKETS_PER_DECADE)
+
+    def add(self, latency: float) -> None:
+        self._counts[self._bucket(latency)] += 1.0
+        self._total += 1.0
+        self.observations += 1
+        if self.observations % self._window == 0:
+            self._counts = [c * 0.5 for c in self._counts]
+            self._total *= 0.5
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper edge of the bucket holding quantile `q` (None when empty)."""
+        if self._total <= 0:
+            return None
+        target = q * self._total
+        seen = 0.0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= target:
+                return self._upper(index)
+        return self._upper(len(self._counts) - 1)
+
+
+class AdaptiveTimeouts:
+    """Per-endpoint timeouts derived from observed latency.
+
+    Example:
+        >>> client = PetTracerClient(timeout_policy=TimeoutPolicy(percentile=0.95))
+        >>> client.resilience.timeouts.read_budget("getccs")
+    """
+
+    def __init__(self, policy: TimeoutPolicy = DEFAULT_TIMEOUT_POLICY):
+        if not 0 < policy.percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.policy = policy
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.timeouts = 0
+
+    def range_scale(self, span_ms: float) -> float:
+        """Work scale of a position range (spans shorter than `range_unit` count as 1)."""
+        unit_ms = self.policy.range_unit.total_seconds() * 1000
+        return max(1.0, span_ms / unit_ms)
+
+    def observe(self, endpoint: str, latency: float, scale: float = 1.0) -> None:
+        """Record a response time (normalized by `scale`)."""
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            histogram = self._histograms[endpoint] = LatencyHistogram(self.policy.window)
+        histogram.add(latency / scale)
+
+    def observe_timeout(self, endpoint: str, elapsed: float, scale: float = 1.0) -> None:
+        """Record a request that timed out after `elapsed` seconds."""
+        self.timeouts += 1
+        self.observe(endpoint, elapsed, scale)
+
+    def read_budget(self, endpoint: str, scale: float = 1.0) -> Optional[float]:
+        """Read budget in seconds for `endpoint` (None until enough samples)."""
+        histogram = self._histograms.get(endpoint)
+        if histogram is None or histogram.observations < self.policy.min_samples:
+            return None
+        p = histogram.quantile(self.policy.percentile)
+        return min(self.policy.max_read, max(self.policy.min_read, p * self.policy.multiplier) * scale)
+
+    def timeout(self, endpoint: str, default: float, scale: float = 1.0) -> aiohttp.ClientTimeout:
+        """aiohttp timeout for the next request to `endpoint`.
+
+        Args:
+            endpoint: endpoint name
+            default: the caller's total timeout; used until the endpoint is
+                adaptive and never exceeded afterwards
+            scale: work scale of the request (see `range_scale`)
+        """
+        connect = min(self.policy.connect, default)
+        read = self.read_budget(endpoint, scale)
+        if read is None or default - connect <= 0:
+            return aiohttp.ClientTimeout(total=default, connect=connect)
+        read = min(read, default - connect)
+        return aiohttp.ClientTimeout(total=min(default, connect + read), connect=connect, sock_read=read)
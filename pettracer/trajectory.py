@@ -0,0 +1,217 @@
+""" Vectorized trajectory metrics over position histories.
+
+    Converts lists of `LastPos` records into NumPy arrays once, then computes
+    segment distances, speeds, bearings and cumulative distance without a
+    Python-level loop per fix. Requires the optional `numpy` dependency
+    (``pip install pettracer-client[analytics]``).
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_M, point_distance  # noqa: F401 (re-exported)
+from .types import LastPos
+
+
+def _as_float(values: Iterable[Optional[float]]) -> np.ndarray:
+    """Convert an iterable of optional numbers to float64, mapping None to NaN."""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+@dataclass
+class PositionArrays:
+    """Column-oriented view of a position history.
+
+    All arrays have the same length. `t` holds `timeMeasure` as seconds since the
+    Unix epoch; quality fields that were missing in the source are NaN.
+    """
+    t: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    horiPrec: np.ndarray
+    sat: np.ndarray
+    fixS: np.ndarray
+    fixP: np.ndarray
+    acc: np.ndarray
+    rssi: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.t.shape[0])
+
+    @classmethod
+    def from_positions(cls, positions: Sequence[LastPos], sort: bool = True) -> "PositionArrays":
+        """Build arrays from `LastPos` records.
+
+        Records without coordinates or `timeMeasure` are dropped. When `sort` is
+        True the result is ordered by `timeMeasure`.
+        """
+        valid = [
+            p for p in positions
+            if p is not None and p.posLat is not None and p.posLong is not None and p.timeMeasure is not None
+        ]
+        arrays = cls(
+            t=np.array([p.timeMeasure.timestamp() for p in valid], dtype=np.float64),
+            lat=np.array([p.posLat for p in valid], dtype=np.float64),
+            lon=np.array([p.posLong for p in valid], dtype=np.float64),
+            horiPrec=_as_float(p.horiPrec for p in valid),
+            sat=_as_float(p.sat for p in valid),
+            fixS=_as_float(p.fixS for p in valid),
+            fixP=_as_float(p.fixP for p in valid),
+            acc=_as_float(p.acc for p in valid),
+            rssi=_as_float(p.rssi for p in valid),
+        )
+        if sort and len(arrays) > 1 and np.any(np.diff(arrays.t) < 0):
+            arrays = arrays.take(np.argsort(arrays.t, kind="stable"))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, t: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> "PositionArrays":
+        """Build from bare time/coordinate arrays; quality fields are set to NaN."""
+        t = np.asarray(t, dtype=np.float64)
+        nan = np.full(t.shape, np.nan)
+        return cls(
+            t=t,
+            lat=np.asarray(lat, dtype=np.float64),
+            lon=np.asarray(lon, dtype=np.float64),
+            horiPrec=nan, sat=nan.copy(), fixS=nan.copy(), fixP=nan.copy(), acc=nan.copy(), rssi=nan.copy(),
+        )
+
+    def take(self, index: np.ndarray) -> "PositionArrays":
+        """Return a new PositionArrays selecting rows by integer index or boolean mask."""
+        return PositionArrays(
+            t=self.t[index],
+            lat=self.lat[index],
+            lon=self.lon[index],
+            horiPrec=self.horiPrec[index],
+            sat=self.sat[index],
+            fixS=self.fixS[index],
+            fixP=self.fixP[index],
+            acc=self.acc[index],
+            rssi=self.rssi[index],
+        )
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in metres between points given in degrees (broadcasts)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi * 0.5) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb * 0.5) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def initial_bearing(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Initial bearing in degrees clockwise from north, in the range [0, 360)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlmb = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    y = np.sin(dlmb) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlmb)
+    return np.mod(np.degrees(np.arctan2(y, x)), 360.0)
+
+
+@dataclass
+class TrajectoryMetrics:
+    """Per-segment and cumulative metrics for one track.
+
+    Segment arrays (`distance`, `duration`, `speed`, `bearing`) have length n-1,
+    where segment i joins fix i and fix i+1. `cumulative` has length n and starts at 0.
+    Speeds for zero-duration segments are NaN.
+    """
+    distance: np.ndarray
+    duration: np.ndarray
+    speed: np.ndarray
+    bearing: np.ndarray
+    cumulative: np.ndarray
+
+    @property
+    def total_distance(self) -> float:
+        """Total path length in metres."""
+        return float(self.cumulative[-1]) if self.cumulative.size else 0.0
+
+
+def _segment_metrics(t: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # share the trig terms between haversine and bearing: one sin/cos per fix, not per use
+    phi = np.radians(lat)
+    lmb = np.radians(lon)
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    dlmb = np.diff(lmb)
+    sin_dlmb = np.sin(dlmb)
+    cos_dlmb = np.cos(dlmb)
+    sin1, sin2 = sin_phi[:-1], sin_phi[1:]
+    cos1, cos2 = cos_phi[:-1], cos_phi[1:]
+
+    sin_half_dphi = np.sin(np.diff(phi) * 0.5)
+    sin_half_dlmb = np.sin(dlmb * 0.5)
+    a = sin_half_dphi * sin_half_dphi + cos1 * cos2 * sin_half_dlmb * sin_half_dlmb
+    distance = 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    duration = np.diff(t)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(duration > 0, distance / duration, np.nan)
+
+    y = sin_dlmb * cos2
+    x = cos1 * sin2 - sin1 * cos2 * cos_dlmb
+    bearing = np.mod(np.degrees(np.arctan2(y, x)), 360.0)
+    return distance, duration, speed, bearing
+
+
+def compute_metrics(track) -> TrajectoryMetrics:
+    """Compute trajectory metrics for a single track.
+
+    Args:
+        track: `PositionArrays` or a sequence of `LastPos` records
+
+    Returns:
+        TrajectoryMetrics with distances in metres, durations in seconds,
+        speeds in m/s and bearings in degrees
+    """
+    arrays = track if isinstance(track, PositionArrays) else PositionArrays.from_positions(track)
+    if len(arrays) < 2:
+        empty = np.empty(0, dtype=np.float64)
+        return TrajectoryMetrics(empty, empty.copy(), empty.copy(), empty.copy(), np.zeros(len(arrays)))
+    distance, duration, speed, bearing = _segment_metrics(arrays.t, arrays.lat, arrays.lon)
+    cumulative = np.concatenate(([0.0], np.cumsum(distance)))
+    return TrajectoryMetrics(distance, duration, speed, bearing, cumulative)
+
+
+def compute_fleet_metrics(tracks: Dict[int, object]) -> Dict[int, TrajectoryMetrics]:
+    """Compute metrics for many devices in a single vectorized pass.
+
+    All tracks are concatenated, segment metrics are computed once over the
+    combined arrays, and segments that would cross a device boundary are
+    discarded before splitting the result back per device.
+
+    Args:
+        tracks: mapping of device id to `PositionArrays` or `LastPos` sequence
+
+    Returns:
+        Dict mapping device id to its TrajectoryMetrics
+    """
+    ids = list(tracks)
+    arrays = [
+        tracks[i] if isinstance(tracks[i], PositionArrays) else PositionArrays.from_positions(tracks[i])
+        for i in ids
+    ]
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    if lengths.sum() < 2:
+        return {i: compute_metrics(a) for i, a in zip(ids, arrays)}
+
+    t = np.concatenate([a.t for a in arrays])
+    lat = np.concatenate([a.lat for a in arrays])
+    lon = np.concatenate([a.lon for a in arrays])
+    distance, duration, speed, bearing = _segment_metrics(t, lat, lon)
+
+    # segment j joins rows j and j+1; keep it only if both rows belong to the same device
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    results: Dict[int, TrajectoryMetrics] = {}
+    for dev_id, start, end in zip(ids, starts, ends):
+        seg = slice(start, max(start, end - 1))
+        d = distance[seg]
+        cumulative = np.concatenate(([0.0], np.cumsum(d))) if end > start else np.zeros(0)
+        results[dev_id] = TrajectoryMetrics(d, duration[seg], speed[seg], bearing[seg], cumulative)
+    return results
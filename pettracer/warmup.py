@@ -0,0 +1,184 @@
+""" Connection warm-up and keep-warm for the portal host.
+
+    The first request after login, or after the pool's keep-alive connections
+    have expired, pays DNS, TCP and TLS setup. `ConnectionWarmer` hides that:
+
+    - after login it pre-opens `connections` connections by sending that
+      many concurrent `HEAD` requests to the portal, which aiohttp then keeps
+      in its pool;
+    - while the client is in use, a background task pings the portal when no
+      request was made for `idle_after` seconds, keeping the pool alive
+      across short gaps, and stops `keep_warm_for` seconds after the last
+      real request so an unused client goes quiet;
+    - a request arriving after a longer gap re-warms the rest of the pool in
+      the background.
+
+    `ConnectionStats` counts new versus reused connections through an aiohttp
+    `TraceConfig`, so the effect is visible as `reuse_ratio`. The client can
+    only attach it to sessions it creates itself.
+"""
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TYPE_CHECKING
+import asyncio
+import time
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from .pipeline import Handler, Request
+
+
+@dataclass(frozen=True)
+class WarmupPolicy:
+    """Warm-up settings.
+
+    Args:
+        connections: connections to pre-open
+        url: URL pinged to open connections (any cheap URL on the portal host)
+        idle_after: seconds without requests before a keep-warm ping
+        keep_warm_for: seconds after the last request during which the pool is kept warm
+        keepalive_timeout: keep-alive of idle pooled connections in sessions the
+            client creates (must exceed `idle_after`)
+        timeout: timeout of one warm-up request in seconds
+    """
+    connections: int = 2
+    url: str = "https://portal.pettracer.com/"
+    idle_after: float = 10.0
+    keep_warm_for: float = 300.0
+    keepalive_timeout: float = 30.0
+    timeout: float = 5.0
+
+
+class ConnectionStats:
+    """New vs reused connection counts collected with an aiohttp TraceConfig."""
+
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+
+    @property
+    def reuse_ratio(self) -> Optional[float]:
+        """Share of requests that got a pooled connection (None before any request)."""
+        total = self.created + self.reused
+        return self.reused / total if total else None
+
+    async def _on_create(self, session: Any, context: Any, params: Any) -> None:
+        self.created += 1
+
+    async def _on_reuse(self, session: Any, context: Any, params: Any) -> None:
+        self.reused += 1
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig to pass to `aiohttp.ClientSession(trace_configs=[...])`."""
+        config = aiohttp.TraceConfig()
+        config.on_connection_create_end.append(self._on_create)
+        config.on_connection_reuseconn.append(self._on_reuse)
+        return config
+
+
+class ConnectionWarmer:
+    """Pre-connects and keeps the connection pool warm.
+
+    Example:
+        >>> client = PetTracerClient(warmup=WarmupPolicy(connections=2))
+        >>> await client.login("username", "password")     # warms in the background
+        >>> devices = await client.get_all_devices()
+        >>> client.connection_stats.reuse_ratio
+    """
+
+    def __init__(
+        self,
+        policy: WarmupPolicy = WarmupPolicy(),
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        if policy.connections < 1:
+            raise ValueError("connections must be at least 1")
+        self.policy = policy
+        self.stats = ConnectionStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._background: Optional[asyncio.Task] = None
+        self._last_request = clock()
+        self._last_ping = clock()
+        self._active = asyncio.Event()
+        self.warmups = 0
+        self.pings = 0
+
+    def connector(self) -> aiohttp.TCPConnector:
+        """Connector for a client-owned session, keeping idle connections long enough."""
+        return aiohttp.TCPConnector(keepalive_timeout=self.policy.keepalive_timeout)
+
+    async def _ping(self, session: aiohttp.ClientSession) -> bool:
+        try:
+            async with session.head(
+                self.policy.url, timeout=aiohttp.ClientTimeout(total=self.policy.timeout), allow_redirects=False
+            ):
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # warm-up is best effort; the real request will report errors
+            return False
+
+    async def warm(self, session: aiohttp.ClientSession, connections: Optional[int] = None) -> int:
+        """Open up to `connections` pooled connections; returns how many succeeded."""
+        n = self.policy.connections if connections is None else connections
+        if n < 1:
+            return 0
+        self.warmups += 1
+        results = await asyncio.gather(*(self._ping(session) for _ in range(n)))
+        self._last_ping = self._clock()
+        return sum(results)
+
+    def start(self, session: aiohttp.ClientSession) -> None:
+        """Warm `session` in the background and keep it warm until `stop`."""
+        self._session = session
+        self._last_request = self._last_ping = self._clock()
+        self._active.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._keep_warm(session))
+
+    async def stop(self) -> None:
+        """Cancel background warm-up work."""
+        for task in (self._task, self._background):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._background = None
+        self._session = None
+
+    async def _keep_warm(self, session: aiohttp.ClientSession) -> None:
+        await self.warm(session)
+        while True:
+            now = self._clock()
+            if now - self._last_request >= self.policy.keep_warm_for:
+                # idle for long; wait for the next real request
+                self._active.clear()
+                await self._active.wait()
+                continue
+            due = max(self._last_request, self._last_ping) + self.policy.idle_after
+            if now < due:
+                await self._sleep(due - now)
+                continue
+            self.pings += 1
+            await self.warm(session, 1)
+
+    def touch(self) -> None:
+        """Record a real request; re-warm the pool if it went cold."""
+        now = self._clock()
+        cold = now - max(self._last_request, self._last_ping) >= self.policy.keepalive_timeout
+        self._last_request = now
+        self._active.set()
+        session = self._session
+        if cold and session is not None and (self._background is None or self._background.done()):
+            # the request itself opens one connection; warm the others
+            self._background = asyncio.ensure_future(self.warm(session, self.policy.connections - 1))
+
+    async def __call__(self, request: "Request", call_next: "Handler") -> Any:
+        """Middleware hook: record activity, then run the request."""
+        self.touch()
+        return await call_next(request)
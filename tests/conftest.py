@@ -0,0 +1,103 @@
+"""Shared test fixtures."""
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+import inspect
+
+import aiohttp
+import pytest
+
+from pettracer.types import LastPos
+
+
+T0 = datetime(2025, 12, 31, 9, 0, 0, tzinfo=timezone.utc)
+
+
+def make_pos(lat=51.4, lon=-1.08, seconds=0, minutes=0, t0=T0, **fields):
+    """A good-quality `LastPos` fix measured `minutes` and `seconds` after `t0`.
+
+    Keyword `fields` override the other LastPos attributes, e.g. `id=3` or
+    `sat=None`.
+    """
+    values = dict(id=None, fixS=3, fixP=1, horiPrec=10, sat=9, rssi=100, acc=2, flags=0, timeDb=None)
+    values.update(fields)
+    return LastPos(posLat=lat, posLong=lon, timeMeasure=t0 + timedelta(seconds=seconds, minutes=minutes), **values)
+
+
+Call = namedtuple("Call", "method url json headers timeout")
+
+
+class MockResponse:
+    """Mock aiohttp response; non-2xx statuses raise like `raise_for_status`."""
+
+    def __init__(self, json_data, status=200):
+        self._json = json_data
+        self.status = status
+        self.headers = {}
+
+    async def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if not (200 <= self.status < 300):
+            raise aiohttp.ClientResponseError(MagicMock(), (), status=self.status, message=f"HTTP {self.status} error")
+
+
+def default_handler(method, url, json):
+    """Answer login with a token and everything else with an empty list."""
+    if url.endswith("/login"):
+        return {"access_token": "tok"}
+    return []
+
+
+class MockSession:
+    """Stand-in for aiohttp.ClientSession answering requests with `handler`.
+
+    `handler(method, url, json)` (sync or async) returns the JSON data or a
+    response made with `response(data, status)`. Every request is recorded in
+    `calls`.
+    """
+
+    def __init__(self, handler=default_handler):
+        self.handler = handler
+        self.calls = []
+        self.close = AsyncMock()
+
+    @staticmethod
+    def response(json_data, status=200):
+        return MockResponse(json_data, status)
+
+    @asynccontextmanager
+    async def _request(self, method, url, json=None, timeout=None, headers=None):
+        self.calls.append(Call(method, url, json, headers, timeout))
+        result = self.handler(method, url, json)
+        if inspect.isawaitable(result):
+            result = await result
+        yield result if isinstance(result, MockResponse) else MockResponse(result)
+
+    def get(self, url, timeout=None, headers=None):
+        return self._request("GET", url, timeout=timeout, headers=headers)
+
+    def post(self, url, json=None, timeout=None, headers=None):
+        return self._request("POST", url, json=json, timeout=timeout, headers=headers)
+
+    def head(self, url, timeout=None, allow_redirects=True):
+        return self._request("HEAD", url, timeout=timeout)
+
+    def endpoints(self):
+        """Last path segment of every requested URL, in order."""
+        return [call.url.rsplit("/", 1)[-1] for call in self.calls]
+
+
+@pytest.fixture
+def mock_session():
+    """A MockSession that `aiohttp.ClientSession()` returns while the test runs.
+
+    The patched class is available as `mock_session.session_class`.
+    """
+    session = MockSession()
+    with patch("aiohttp.ClientSession") as session_class:
+        session_class.return_value = session
+        session.session_class = session_class
+        yield session
@@ -0,0 +1,141 @@
+"""Tests for the resumable history backfill."""
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+
+import pytest
+
+from pettracer.backfill import BackfillJob
+from pettracer.client import PetTracerClient, PetTracerError
+from pettracer.types import Device
+
+from conftest import make_pos
+
+
+START = datetime(2025, 12, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=4)
+
+
+class FakeDevice:
+    def __init__(self, client, device_id):
+        self.client = client
+        self.device_id = device_id
+
+    async def get_positions(self, filter_time, to_time, timeout=10, priority=None):
+        return await self.client.fetch(self.device_id, filter_time, to_time)
+
+
+class FakeClient:
+    """Stands in for PetTracerClient; one fix per window, optional failures."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_all_devices(self, timeout=10):
+        return [Device.from_dict({"id": 1}), Device.from_dict({"id": 2})]
+
+    def get_device(self, device_id):
+        return FakeDevice(self, device_id)
+
+    async def fetch(self, device_id, filter_time, to_time):
+        self.calls.append((device_id, filter_time))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if (device_id, filter_time) in self.fail:
+            raise PetTracerError("HTTP error while calling getccpositions: 503")
+        when = datetime.fromtimestamp(filter_time / 1000, tz=timezone.utc)
+        return [make_pos(t0=when, id=filter_time)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_plans_windows_for_all_devices():
+    client = FakeClient()
+    job = BackfillJob(client, START, END, concurrency=2, max_rate=None)
+    result = await job.run()
+
+    assert result.planned == 8
+    assert result.completed == 8 and result.done
+    assert sorted(result.collected) == [1, 2]
+    assert len(result.collected[1]) == 4
+    assert client.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "backfill.json")
+    third_day = int((START + timedelta(days=2)).timestamp() * 1000)
+    client = FakeClient(fail={(2, third_day)})
+    seen = []
+
+    async def store(dev, from_ms, to_ms, positions):
+        seen.append((dev, from_ms))
+
+    first = await BackfillJob(client, START, END, device_ids=[1, 2], checkpoint_path=path,
+                              max_rate=None, on_positions=store).run()
+    assert first.completed == 7
+    assert list(first.failed) == [(2, third_day, third_day + 86_400_000)]
+    assert not first.done
+    with open(path) as fh:
+        assert len(json.load(fh)["done"]["2"]) == 3
+
+    client.fail.clear()
+    client.calls.clear()
+    second = await BackfillJob(client, START, END, device_ids=[1, 2], checkpoint_path=path,
+                               max_rate=None, on_positions=store).run()
+    assert client.calls == [(2, third_day)]
+    assert second.skipped == 7 and second.completed == 1 and second.done
+    assert len(seen) == 8
+
+
+@pytest.mark.asyncio
+async def test_backfill_rejects_mismatched_checkpoint(tmp_path):
+    path = str(tmp_path / "backfill.json")
+    await BackfillJob(FakeClient(), START, END, device_ids=[1], checkpoint_path=path, max_rate=None).run()
+    job = BackfillJob(FakeClient(), START, END, device_ids=[1], window=timedelta(hours=12),
+                      checkpoint_path=path, max_rate=None)
+    with pytest.raises(PetTracerError):
+        await job.run()
+    with pytest.raises(PetTracerError):
+        BackfillJob(FakeClient(), END, START)
+
+
+@pytest.mark.asyncio
+async def test_client_backfill_requires_auth():
+    client = PetTracerClient()
+    with pytest.raises(PetTracerError) as exc:
+        await client.backfill(START, END)
+    assert "Not authenticated" in str(exc.value)
+
+
+@pytest.mark.asyncio
+async def test_backfill_records_timeouts_and_callback_errors_per_window(tmp_path):
+    path = str(tmp_path / "backfill.json")
+    first_day = int(START.timestamp() * 1000)
+    second_day = first_day + 86_400_000
+    client = FakeClient()
+
+    async def fetch(device_id, filter_time, to_time):
+        if filter_time == first_day:
+            raise asyncio.TimeoutError()
+        return []
+
+    client.fetch = fetch
+
+    def store(dev, from_ms, to_ms, positions):
+        if from_ms == second_day:
+            raise ValueError("database unavailable")
+
+    job = BackfillJob(client, START, END, device_ids=[1], checkpoint_path=path, max_rate=None,
+                      on_positions=store, checkpoint_every=100)
+    result = await job.run()
+    assert result.completed == 2
+    assert isinstance(result.failed[(1, first_day, second_day)], asyncio.TimeoutError)
+    assert isinstance(result.failed[(1, second_day, second_day + 86_400_000)], ValueError)
+    # batched writes are flushed when the run ends
+    with open(path) as fh:
+        assert len(json.load(fh)["done"]["1"]) == 2
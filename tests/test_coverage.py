@@ -0,0 +1,88 @@
+"""Tests for hotspot coverage analytics."""
+from datetime import timedelta
+import subprocess
+import sys
+
+import pytest
+
+from pettracer.coverage import CoverageEngine
+from pettracer.types import Device, FifoEntry, ReceivedBy, TelegramPacket
+
+from conftest import T0
+
+
+HS_LAT, HS_LON = 51.4, -1.08
+# ~11 m per 1e-4 degrees of latitude
+STEP = 1e-4
+
+
+def poll(pos_id, lat, rssi, minutes):
+    return Device.from_dict({
+        "id": 7,
+        "lastRssi": rssi,
+        "masterHs": {"id": 100, "posLat": HS_LAT, "posLong": HS_LON},
+        "lastPos": {"id": pos_id, "posLat": lat, "posLong": HS_LON,
+                    "timeMeasure": (T0 + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%S%z")},
+    })
+
+
+def entry(tid, lat, receptions):
+    packet = TelegramPacket(id=tid, deviceType=None, deviceId=7, hsId=None, telegram=None, latitude=lat,
+                            longitude=HS_LON, timeDb=None, timeDev=T0 + timedelta(minutes=tid), cmd=None,
+                            charging=None)
+    return FifoEntry(telegram=packet, receivedBy=[ReceivedBy(hs, rssi) for hs, rssi in receptions])
+
+
+def test_polls_record_receptions_once_per_position():
+    engine = CoverageEngine()
+    assert engine.add_devices([poll(1, HS_LAT + 10 * STEP, -60, 0)]) == 1
+    assert engine.add_devices([poll(1, HS_LAT + 10 * STEP, -60, 0)]) == 0
+    assert engine.add_devices([poll(2, HS_LAT + 100 * STEP, -80, 5)]) == 1
+
+    hs = engine.hotspot(100)
+    assert engine.hotspots() == [100]
+    assert (hs.lat, hs.lon) == (HS_LAT, HS_LON)
+    assert hs.receptions == 2
+    assert hs.devices == {7: 2}
+    assert hs.rssi_mean == pytest.approx(-70)
+    assert hs.rssi_histogram() == {-80: 1, -60: 1}
+    assert hs.first_seen == T0 and hs.last_seen == T0 + timedelta(minutes=5)
+    assert hs.coverage_radius(1.0) == pytest.approx(1112, rel=0.01)
+
+
+def test_fifo_receptions_and_quantiles():
+    engine = CoverageEngine()
+    engine.add_device(poll(1, HS_LAT, -50, 0))
+    # 100 telegrams at 10 m .. 1000 m, heard by hotspot 100 and some by 200 (location unknown)
+    entries = [
+        entry(i, HS_LAT + (i + 1) * 0.9 * STEP, [(100, -40 - i // 2)] + ([(200, -90)] if i % 10 == 0 else []))
+        for i in range(100)
+    ]
+    assert engine.add_fifo(entries) == 110
+
+    hs = engine.hotspot(100)
+    assert hs.receptions == 101
+    assert hs.located_receptions == 101
+    assert hs.rssi_min == -89 and hs.rssi_max == -40
+    assert hs.rssi_quantile(0.5) == pytest.approx(-65, abs=1)
+    # log bins: 10 per decade, so the estimate is within ~26% above the true value
+    assert 950 <= hs.coverage_radius(0.95) <= 1000 * 1.26
+    assert hs.coverage_radius(1.0) == pytest.approx(1001, rel=0.01)
+
+    other = engine.hotspot(200)
+    assert other.receptions == 10
+    assert other.located_receptions == 0
+    assert other.coverage_radius() is None
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        CoverageEngine(rssi_range=(0, 0))
+    with pytest.raises(ValueError):
+        CoverageEngine(min_distance_m=10, max_distance_m=1)
+    assert CoverageEngine().hotspot(1) is None
+
+
+def test_imports_without_numpy():
+    code = "import sys; sys.modules['numpy'] = None; import pettracer.coverage"
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,80 @@
+"""Tests for batch telegram decoding."""
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.decoder import FieldSpec, decode_telegrams, rssi_by_hotspot, telegram_bytes
+from pettracer.types import FifoEntry, ReceivedBy, TelegramPacket
+
+
+LAYOUT = [
+    FieldSpec("cmd", 0),
+    FieldSpec("counter", 1, 2),
+    FieldSpec("temp", 3, 2, byteorder="little", signed=True, scale=0.1),
+    FieldSpec("flag_gps", 5, shift=7, bits=1),
+    FieldSpec("mode", 5, bits=3),
+    FieldSpec("delta", 6, signed=True),
+]
+
+
+def packet(pid, payload):
+    return TelegramPacket(id=pid, deviceType=None, deviceId=1, hsId=2, telegram=payload, latitude=None,
+                          longitude=None, timeDb=None, timeDev=None, cmd=None, charging=None)
+
+
+def test_telegram_bytes_pads_rows():
+    matrix, lengths = telegram_bytes(["0102", "", "0a0b0c", "zz"])
+    assert lengths.tolist() == [2, 0, 3, 0]
+    assert matrix.tolist() == [[1, 2, 0], [0, 0, 0], [10, 11, 12], [0, 0, 0]]
+
+
+def test_decode_matches_struct_reference():
+    payloads = []
+    for i in range(50):
+        raw = struct.pack(">BH", i % 7, 1000 + i) + struct.pack("<h", -300 + 13 * i)
+        raw += bytes([(0x80 if i % 2 else 0) | (i % 8), (-i) & 0xFF])
+        payloads.append(raw.hex())
+    packets = [packet(i, p) for i, p in enumerate(payloads)]
+    decoded = decode_telegrams(packets, LAYOUT)
+
+    assert len(decoded) == 50
+    assert decoded.ids.tolist() == list(range(50))
+    assert decoded.fields["cmd"].tolist() == [i % 7 for i in range(50)]
+    assert decoded.fields["counter"].tolist() == [1000 + i for i in range(50)]
+    np.testing.assert_allclose(decoded.fields["temp"], [(-300 + 13 * i) * 0.1 for i in range(50)])
+    assert decoded.fields["flag_gps"].tolist() == [i % 2 for i in range(50)]
+    assert decoded.fields["mode"].tolist() == [i % 8 for i in range(50)]
+    assert decoded.fields["delta"].tolist() == [-i for i in range(50)]
+    assert decoded.present["delta"].all()
+
+
+def test_short_payloads_are_marked_missing():
+    entry = FifoEntry(telegram=packet(9, "01"), receivedBy=[])
+    decoded = decode_telegrams([entry, "0503e8"], LAYOUT)
+    assert decoded.ids.tolist() == [9, -1]
+    assert decoded.fields["cmd"].tolist() == [1, 5]
+    assert decoded.present["counter"].tolist() == [False, True]
+    assert decoded.fields["counter"].tolist() == [0, 1000]
+    assert np.isnan(decoded.fields["temp"]).all()
+
+    with pytest.raises(ValueError):
+        FieldSpec("bad", 0, size=9)
+
+
+def test_rssi_by_hotspot():
+    entries = [
+        FifoEntry(telegram=None, receivedBy=[ReceivedBy(1, -60), ReceivedBy(2, -80)]),
+        FifoEntry(telegram=None, receivedBy=[ReceivedBy(1, -70)]),
+        FifoEntry(telegram=None, receivedBy=[ReceivedBy(1, -50), ReceivedBy(3, None)]),
+        FifoEntry(telegram=None, receivedBy=[ReceivedBy(1, -90)]),
+    ]
+    stats = rssi_by_hotspot(entries)
+    assert sorted(stats) == [1, 2]
+    assert stats[1].count == 4
+    assert stats[1].mean == pytest.approx(-67.5)
+    assert (stats[1].min, stats[1].max) == (-90, -50)
+    assert stats[1].median == pytest.approx(-65)
+    assert stats[2].median == -80
+    assert rssi_by_hotspot([]) == {}
@@ -0,0 +1,85 @@
+"""Tests for multi-pet encounter detection."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.encounters import _Extent, find_encounters, pair_encounters
+from pettracer.trajectory import PositionArrays, haversine
+
+
+T0 = datetime(2025, 12, 31, 8, 0, 0, tzinfo=timezone.utc).timestamp()
+
+
+def track(t, lat, lon):
+    return PositionArrays.from_arrays(T0 + np.asarray(t, dtype=float), lat, lon)
+
+
+def brute_force_close(a, b, distance_m):
+    """Reference: compare fixes taken at identical times only."""
+    common = np.intersect1d(a.t, b.t)
+    ia, ib = np.searchsorted(a.t, common), np.searchsorted(b.t, common)
+    return common[haversine(a.lat[ia], a.lon[ia], b.lat[ib], b.lon[ib]) <= distance_m]
+
+
+def test_pair_encounter_interval_and_distance():
+    t = np.arange(0, 600, 30)
+    a = track(t, np.full(t.size, 51.4), np.full(t.size, -1.08))
+    # b walks past a: far, close between 120 and 300 s, far again
+    b_lat = np.where((t >= 120) & (t <= 300), 51.4 + 1e-4, 51.41)
+    b = track(t, b_lat, np.full(t.size, -1.08))
+
+    result = pair_encounters(1, a, 2, b, distance_m=20)
+    assert len(result) == 1
+    enc = result[0]
+    assert enc.start.timestamp() - T0 == 120
+    assert enc.end.timestamp() - T0 == 300
+    assert enc.samples == 7
+    assert enc.min_distance_m == pytest.approx(11.1, rel=0.01)
+    assert enc.duration == timedelta(minutes=3)
+    np.testing.assert_array_equal(brute_force_close(a, b, 20) - T0, np.arange(120, 301, 30))
+
+
+def test_interpolation_across_unaligned_timestamps():
+    """Fixes at different times are compared through interpolation."""
+    a = track([0, 60, 120], [51.4, 51.4, 51.4], [-1.08, -1.08, -1.08])
+    b = track([30, 90], [51.4, 51.4], [-1.08, -1.08])
+    result = pair_encounters(1, a, 2, b, distance_m=5)
+    assert len(result) == 1
+    assert result[0].start.timestamp() - T0 == 30
+    assert result[0].end.timestamp() - T0 == 90
+
+
+def test_max_gap_and_merge_gap():
+    t = np.array([0, 30, 60, 600, 630])
+    a = track(t, np.full(5, 51.4), np.full(5, -1.08))
+    b = track(t, np.full(5, 51.4), np.full(5, -1.08))
+    # no interpolation across the 9 minute hole
+    assert len(pair_encounters(1, a, 2, b, max_gap=timedelta(minutes=2))) == 2
+    merged = pair_encounters(1, a, 2, b, max_gap=timedelta(minutes=2), merge_gap=timedelta(minutes=10))
+    assert len(merged) == 1
+    assert merged[0].samples == 5
+    assert pair_encounters(1, a, 2, b, min_duration=timedelta(minutes=5)) == []
+
+
+def test_find_encounters_skips_disjoint_pairs():
+    t = np.arange(0, 300, 30)
+    home = track(t, np.full(t.size, 51.4), np.full(t.size, -1.08))
+    together = track(t, np.full(t.size, 51.4), np.full(t.size, -1.08))
+    elsewhere = track(t, np.full(t.size, 52.0), np.full(t.size, -1.08))
+    later = track(t + 10_000, np.full(t.size, 51.4), np.full(t.size, -1.08))
+
+    result = find_encounters({3: together, 1: home, 2: elsewhere, 4: later})
+    assert [(e.device_a, e.device_b) for e in result] == [(1, 3)]
+    assert find_encounters({1: home, 2: []}) == []
+
+
+def test_find_encounters_computes_each_extent_once(monkeypatch):
+    computed = []
+    original = _Extent.of
+    monkeypatch.setattr(_Extent, "of", lambda track: computed.append(track) or original(track))
+    t = np.arange(0, 300, 30)
+    tracks = {dev: track(t, np.full(t.size, 51.4 + dev * 1e-5), np.full(t.size, -1.08)) for dev in range(6)}
+    assert len(find_encounters(tracks)) == 15
+    assert len(computed) == 6
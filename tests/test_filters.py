@@ -0,0 +1,88 @@
+"""Tests for GPS quality filtering and smoothing."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.filters import (
+    QualityThresholds,
+    filter_track,
+    kalman_smooth,
+    measurement_sigma,
+    quality_mask,
+    speed_gate,
+)
+from pettracer.trajectory import PositionArrays, haversine
+
+from conftest import make_pos
+
+
+def test_quality_mask_applies_thresholds_and_ignores_missing():
+    """Fixes outside limits are dropped; missing values are not."""
+    arrays = PositionArrays.from_positions([
+        make_pos(51.0, -1.0, 0, sat=9),
+        make_pos(51.0, -1.0, 10, sat=2),
+        make_pos(51.0, -1.0, 20, sat=None, horiPrec=50),
+        make_pos(51.0, -1.0, 30, rssi=40),
+    ])
+    mask = quality_mask(arrays, QualityThresholds(min_sat=4, max_hori_prec=30, min_rssi=50))
+    assert mask.tolist() == [True, False, False, False]
+    assert quality_mask(arrays, QualityThresholds(min_sat=None)).all()
+
+
+def test_measurement_sigma_downweights_poor_fixes():
+    """Poor precision and few satellites increase measurement noise."""
+    arrays = PositionArrays.from_positions([
+        make_pos(51.0, -1.0, 0, horiPrec=10, sat=8),
+        make_pos(51.0, -1.0, 10, horiPrec=40, sat=8),
+        make_pos(51.0, -1.0, 20, horiPrec=10, sat=2),
+    ])
+    sigma = measurement_sigma(arrays, base_sigma=5.0)
+    assert sigma[0] == pytest.approx(5.0)
+    assert sigma[1] == pytest.approx(20.0)
+    assert sigma[2] == pytest.approx(10.0)
+
+
+def test_speed_gate_removes_spikes():
+    """A single teleporting fix is removed, including one at the end."""
+    lat = [51.0, 51.0001, 51.1, 51.0002, 51.0003, 52.0]
+    arrays = PositionArrays.from_positions([make_pos(v, -1.0, i * 10) for i, v in enumerate(lat)])
+    assert speed_gate(arrays, max_speed=15.0).tolist() == [True, True, False, True, True, False]
+
+
+def test_speed_gate_removes_outlier_runs_but_keeps_relocation():
+    """Short excursions are removed; a jump followed by a stay is kept."""
+    lat = [51.0, 51.0001, 51.2, 51.2001, 51.0002, 51.0003]
+    arrays = PositionArrays.from_positions([make_pos(v, -1.0, i * 10) for i, v in enumerate(lat)])
+    assert speed_gate(arrays, max_speed=15.0).tolist() == [True, True, False, False, True, True]
+
+    lat = [51.0, 51.0001, 51.0002, 51.0003, 51.3, 51.3001, 51.3002, 51.3003]
+    arrays = PositionArrays.from_positions([make_pos(v, -1.0, i * 10) for i, v in enumerate(lat)])
+    assert speed_gate(arrays, max_speed=15.0).all()
+
+
+def test_kalman_smooth_reduces_noise():
+    """Smoothing a noisy straight walk brings fixes closer to the truth."""
+    rng = np.random.default_rng(0)
+    n = 300
+    t = np.arange(n) * 10.0
+    true_lat = 51.0 + np.arange(n) * 1e-5
+    true_lon = np.full(n, -1.0)
+    noisy = PositionArrays.from_arrays(t, true_lat + rng.normal(0, 5e-5, n), true_lon + rng.normal(0, 8e-5, n))
+    smoothed = kalman_smooth(noisy, sigma=np.full(n, 6.0), process_noise=0.01)
+
+    raw_err = haversine(noisy.lat, noisy.lon, true_lat, true_lon).mean()
+    smooth_err = haversine(smoothed.lat, smoothed.lon, true_lat, true_lon).mean()
+    assert smooth_err < raw_err / 2
+    np.testing.assert_array_equal(smoothed.t, noisy.t)
+
+
+def test_filter_track_pipeline_reports_rejections():
+    """filter_track combines all steps and maps back to input rows."""
+    positions = [make_pos(51.0 + i * 1e-5, -1.0, i * 10) for i in range(10)]
+    positions[3] = make_pos(51.0, -1.0, 30, sat=1)
+    positions[6] = make_pos(51.5, -1.0, 60)
+    result = filter_track(positions, smooth=False)
+    assert result.rejected_quality == 1
+    assert result.rejected_speed == 1
+    assert result.index.tolist() == [0, 1, 2, 4, 5, 7, 8, 9]
+    assert len(filter_track(positions).arrays) == 8
@@ -0,0 +1,77 @@
+"""Tests for coverage-gap detection and refetch."""
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.gaps import Gap, estimate_interval, expected_interval, fetch_windows, find_gaps, refetch_gaps
+
+from conftest import T0, make_pos
+
+
+def track_with_hole():
+    """One fix per minute for 0..60 with 20..35 missing."""
+    return [make_pos(minutes=m, id=m) for m in range(61) if not 20 < m < 35]
+
+
+def test_find_gaps_relative_to_interval():
+    track = track_with_hole()
+    gaps = find_gaps(track, T0, T0 + timedelta(minutes=60), timedelta(minutes=1))
+    assert len(gaps) == 1
+    assert gaps[0].start == T0 + timedelta(minutes=20)
+    assert gaps[0].end == T0 + timedelta(minutes=35)
+    assert gaps[0].expected_missing == 14
+    # a coarser reporting interval tolerates the hole
+    assert find_gaps(track, T0, T0 + timedelta(minutes=60), timedelta(minutes=10)) == []
+
+
+def test_find_gaps_at_range_edges_and_empty_track():
+    track = [make_pos(minutes=m, id=m) for m in range(10, 50)]
+    gaps = find_gaps(track, T0, T0 + timedelta(minutes=60), timedelta(minutes=1))
+    assert [(g.start, g.end) for g in gaps] == [
+        (T0, T0 + timedelta(minutes=10)),
+        (T0 + timedelta(minutes=49), T0 + timedelta(minutes=60)),
+    ]
+    empty = find_gaps([], T0, T0 + timedelta(hours=1), timedelta(minutes=1))
+    assert [(g.start, g.end) for g in empty] == [(T0, T0 + timedelta(hours=1))]
+
+
+def test_interval_estimate_and_mode_mapping():
+    track = track_with_hole()
+    assert estimate_interval(track) == timedelta(minutes=1)
+    assert estimate_interval(track[:1]) is None
+    assert expected_interval(3, track, {3: timedelta(minutes=5)}) == timedelta(minutes=5)
+    assert expected_interval(7, [], {3: timedelta(minutes=5)}, default=timedelta(seconds=30)) == timedelta(seconds=30)
+
+
+def test_fetch_windows_merge_and_split():
+    def gap(a, b):
+        return Gap(T0 + timedelta(minutes=a), T0 + timedelta(minutes=b), 1)
+
+    def ms(minutes):
+        return int((T0 + timedelta(minutes=minutes)).timestamp() * 1000)
+
+    windows = fetch_windows([gap(100, 110), gap(0, 10), gap(20, 30)], merge_within=timedelta(minutes=15),
+                            max_window=timedelta(minutes=20))
+    assert windows == [(ms(0), ms(20)), (ms(20), ms(30)), (ms(100), ms(110))]
+
+
+class FakeDevice:
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = []
+
+    async def get_positions(self, filter_time, to_time, timeout=10, priority=None):
+        self.calls.append((filter_time, to_time))
+        return [p for p in self.positions if filter_time <= p.timeMeasure.timestamp() * 1000 <= to_time]
+
+
+@pytest.mark.asyncio
+async def test_refetch_gaps_requests_only_holes():
+    full = [make_pos(minutes=m, id=m) for m in range(61)]
+    device = FakeDevice(full)
+    fresh, windows = await refetch_gaps(device, track_with_hole(), T0, T0 + timedelta(minutes=60))
+
+    assert len(windows) == 1 and device.calls == windows
+    assert [p.id for p in fresh] == list(range(21, 35))
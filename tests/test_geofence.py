@@ -0,0 +1,94 @@
+"""Tests for the geofence engine."""
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.geofence import CircleZone, GeofenceEngine, PolygonZone
+from pettracer.types import Device
+
+from conftest import T0, make_pos
+
+
+GARDEN = PolygonZone("garden", [(51.4000, -1.0850), (51.4000, -1.0830), (51.4010, -1.0830), (51.4010, -1.0850)])
+HOME = CircleZone("home", 51.4005, -1.0800, 30.0)
+
+
+def make_device(dev_id, lat, lon, seconds):
+    return Device.from_dict({"id": dev_id, "lastPos": {
+        "posLat": lat, "posLong": lon, "timeMeasure": (T0 + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%S.000+0000"),
+    }})
+
+
+def test_polygon_contains_vectorized():
+    """Ray casting handles inside, outside and concave shapes."""
+    lshape = PolygonZone("l", [(0, 0), (0, 2), (1, 2), (1, 1), (2, 1), (2, 0)])
+    lat = np.array([0.5, 1.5, 1.5, 3.0])
+    lon = np.array([0.5, 0.5, 1.5, 0.5])
+    assert lshape.contains(lat, lon).tolist() == [True, True, False, False]
+
+
+def test_polygon_requires_three_vertices():
+    with pytest.raises(ValueError):
+        PolygonZone("bad", [(0, 0), (1, 1)])
+
+
+def test_contains_matches_brute_force_and_prunes():
+    """Grid prefiltering gives the same answer as testing every pair."""
+    rng = np.random.default_rng(3)
+    zones = [CircleZone(f"c{i}", 51.0 + i * 0.05, -1.0, 200.0) for i in range(20)]
+    engine = GeofenceEngine(zones, cell_size_deg=0.01)
+    lat = 51.0 + rng.uniform(-0.01, 1.0, 5000)
+    lon = -1.0 + rng.uniform(-0.01, 0.01, 5000)
+
+    result = engine.contains(lat, lon)
+    expected = np.column_stack([z.contains(lat, lon) for z in zones])
+    np.testing.assert_array_equal(result, expected)
+    stats = engine.last_stats
+    assert stats.points == 5000 and stats.zones == 20
+    assert stats.exact_tests < 5000
+    assert stats.pruned_ratio > 0.9
+
+
+def test_process_track_emits_enter_and_exit():
+    """A walk through the garden produces one enter and one exit event."""
+    engine = GeofenceEngine([GARDEN, HOME])
+    track = [
+        make_pos(51.4005, -1.0860, 0),
+        make_pos(51.4005, -1.0840, 10),
+        make_pos(51.4005, -1.0835, 20),
+        make_pos(51.4005, -1.0820, 30),
+    ]
+    events = engine.process_track(7, track)
+    assert [(e.zone_id, e.kind) for e in events] == [("garden", "enter"), ("garden", "exit")]
+    assert events[0].time == T0 + timedelta(seconds=10)
+    assert engine.inside_zones(7) == set()
+
+    # replaying the same history emits nothing new
+    assert engine.process_track(7, track) == []
+
+
+def test_process_devices_tracks_live_state():
+    """Live polling emits events on change and ignores stale fixes."""
+    engine = GeofenceEngine([GARDEN, HOME])
+    assert engine.process_devices([make_device(1, 51.4005, -1.0800, 0)]) == []
+    assert engine.inside_zones(1) == {"home"}
+
+    events = engine.process_devices([make_device(1, 51.4005, -1.0840, 60), make_device(2, 0.0, 0.0, 60)])
+    assert sorted((e.zone_id, e.kind) for e in events) == [("garden", "enter"), ("home", "exit")]
+    assert engine.process_devices([make_device(1, 51.4005, -1.0800, 30)]) == []
+
+
+def test_add_and_remove_zone():
+    engine = GeofenceEngine([HOME])
+    engine.process_devices([make_device(1, 51.4005, -1.0840, 0)])
+    engine.add_zone(GARDEN)
+    events = engine.process_devices([make_device(1, 51.4005, -1.0841, 10)])
+    assert [(e.zone_id, e.kind) for e in events] == [("garden", "enter")]
+    engine.remove_zone("garden")
+    assert engine.inside_zones(1) == set()
+    with pytest.raises(ValueError):
+        engine.add_zone(HOME)
+    with pytest.raises(KeyError):
+        engine.remove_zone("nope")
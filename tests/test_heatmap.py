@@ -0,0 +1,72 @@
+"""Tests for heatmap tile aggregation."""
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.heatmap import HeatmapCache, bin_positions, mercator_tile_coords
+
+from conftest import T0, make_pos
+
+
+# 2025-12-31 22:00 UTC, so half-hourly fixes cross midnight
+EVENING = T0 + timedelta(hours=13)
+
+
+def test_mercator_tile_coords_known_points():
+    x, y = mercator_tile_coords(np.array([0.0, 51.4]), np.array([0.0, -1.08]), 1)
+    assert x[0] == pytest.approx(1.0) and y[0] == pytest.approx(1.0)
+    x, y = mercator_tile_coords(np.array([51.4]), np.array([-1.08]), 16)
+    assert (int(x[0]), int(y[0])) == (32571, 21823)
+
+
+def test_bin_positions_counts_every_point():
+    rng = np.random.default_rng(0)
+    lat = 51.4 + rng.normal(0, 0.01, 10_000)
+    lon = -1.08 + rng.normal(0, 0.01, 10_000)
+    tiles = bin_positions(lat, lon, 14, bins=32)
+    assert sum(int(g.sum()) for g in tiles.values()) == 10_000
+    assert all(g.shape == (32, 32) for g in tiles.values())
+
+    # compare with a straightforward per-point loop
+    x, y = mercator_tile_coords(lat, lon, 14)
+    expected = {}
+    for xi, yi in zip(x, y):
+        k = (14, int(xi), int(yi))
+        grid = expected.setdefault(k, np.zeros((32, 32), dtype=np.uint32))
+        grid[int((yi - int(yi)) * 32), int((xi - int(xi)) * 32)] += 1
+    assert expected.keys() == tiles.keys()
+    for k in tiles:
+        np.testing.assert_array_equal(tiles[k], expected[k])
+
+
+def test_cache_aggregates_per_day_and_deduplicates():
+    cache = HeatmapCache(zooms=[14, 16], bins=16)
+    positions = [make_pos(minutes=i * 30, t0=EVENING, id=i) for i in range(8)]  # spans midnight UTC
+    assert cache.add_positions(1, positions) == 8
+    assert cache.add_positions(1, positions) == 0
+    assert cache.days(1) == [date(2025, 12, 31), date(2026, 1, 1)]
+
+    (x, y), = cache.tiles_for(1, date(2025, 12, 31), 16)
+    assert int(cache.tile([1], date(2025, 12, 31), date(2025, 12, 31), 16, x, y).sum()) == 4
+    assert int(cache.tile([1], date(2025, 12, 1), date(2026, 1, 31), 16, x, y).sum()) == 8
+    assert cache.tile([2], date(2025, 12, 1), date(2026, 1, 31), 16, x, y) is None
+    with pytest.raises(ValueError):
+        cache.tile([1], date(2025, 12, 1), date(2026, 1, 31), 5, 0, 0)
+
+
+def test_cache_memoizes_until_new_data():
+    cache = HeatmapCache(zooms=[16], bins=16)
+    cache.add_positions(1, [make_pos(t0=EVENING, id=1)])
+    (x, y), = cache.tiles_for(1, date(2025, 12, 31), 16)
+    day = date(2025, 12, 31)
+
+    first = cache.tile([1], day, day, 16, x, y)
+    assert cache.tile([1], day, day, 16, x, y) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not first.flags.writeable
+
+    cache.add_positions(1, [make_pos(minutes=1, t0=EVENING, id=2)])
+    assert int(cache.tile([1], day, day, 16, x, y).sum()) == 2
+    assert cache.misses == 2
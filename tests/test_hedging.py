@@ -0,0 +1,143 @@
+"""Tests for hedged read requests."""
+import asyncio
+
+import pytest
+
+from pettracer.client import PetTracerClient
+from pettracer.hedging import HedgePolicy, Hedger, LatencyWindow
+from pettracer.resilience import Resilience
+from pettracer.scheduler import Priority, RequestScheduler
+
+
+def warmed_hedger(endpoint="getccinfo", latency=0.01, **policy):
+    hedger = Hedger(HedgePolicy(min_samples=10, min_delay=0.01, max_extra_ratio=1.0, **policy))
+    for _ in range(10):
+        hedger.record(endpoint, latency)
+    return hedger
+
+
+def test_latency_window_percentile_and_eviction():
+    window = LatencyWindow(4)
+    assert window.percentile(0.5) is None
+    for value in (5.0, 1.0, 3.0, 2.0, 4.0):
+        window.add(value)
+    assert len(window) == 4
+    # 5.0 was evicted
+    assert window.percentile(0.99) == 4.0
+    assert window.percentile(0.0) == 1.0
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_loser_cancelled():
+    hedger = warmed_hedger()
+    calls = []
+    cancelled = []
+
+    async def attempt():
+        n = len(calls)
+        calls.append(n)
+        try:
+            await asyncio.sleep(1.0 if n == 0 else 0.0)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return n
+
+    assert await hedger.run("getccinfo", attempt) == 1
+    await asyncio.sleep(0)
+    assert cancelled == [0]
+    assert hedger.hedged == 1 and hedger.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_requests_and_cold_endpoints_are_not_hedged():
+    hedger = warmed_hedger()
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        return "ok"
+
+    assert await hedger.run("getccinfo", attempt) == "ok"
+    # no latency history for this endpoint yet
+    assert hedger.delay("getccpositions") is None
+    assert await hedger.run("getccpositions", attempt) == "ok"
+    assert len(calls) == 2
+    assert hedger.hedged == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_extra_load_and_failed_hedge_falls_back():
+    hedger = Hedger(HedgePolicy(min_samples=1, min_delay=0.01, max_extra_ratio=0.0, budget_cap=0.0))
+    hedger.record("getccs", 0.01)
+
+    async def slow():
+        await asyncio.sleep(0.03)
+        return "primary"
+
+    assert await hedger.run("getccs", slow) == "primary"
+    assert hedger.hedged == 0 and hedger.budget_exhausted == 1
+
+    hedger = warmed_hedger("getccs")
+    calls = []
+
+    async def hedge_fails():
+        calls.append(1)
+        if len(calls) == 2:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(0.03)
+        return "primary"
+
+    assert await hedger.run("getccs", hedge_fails) == "primary"
+    assert hedger.hedged == 1 and hedger.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_client_hedges_getccinfo(mock_session):
+    async def handler(method, url, json):
+        if url.endswith("/login"):
+            return {"access_token": "tok"}
+        if len(mock_session.calls) == 2:
+            await asyncio.sleep(1.0)
+        return {"id": 7}
+
+    mock_session.handler = handler
+    client = PetTracerClient(hedge_policy=HedgePolicy(min_samples=1, min_delay=0.01, max_extra_ratio=1.0))
+    client.resilience.hedger.record("getccinfo", 0.01)
+    await client.login("user", "pass")
+    device = await client.get_device(7).get_info()
+    assert device.id == 7
+    assert len(mock_session.calls) == 3
+    assert client.resilience.hedger.hedge_wins == 1
+    # login is never hedged
+    assert client.resilience.hedger.requests == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_hedge_needs_a_free_scheduler_slot():
+    peak = []
+
+    async def slow():
+        peak.append(scheduler.active)
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    scheduler = RequestScheduler(max_concurrent=1)
+    resilience = Resilience(retry_policy=None, hedger=warmed_hedger("getccs"), scheduler=scheduler)
+    assert await resilience.call(slow, endpoint="getccs") == "ok"
+    assert peak == [1]
+    assert resilience.hedger.hedged == 0 and resilience.hedger.no_capacity == 1
+
+    scheduler = RequestScheduler(max_concurrent=2)
+    resilience = Resilience(retry_policy=None, hedger=warmed_hedger("getccs"), scheduler=scheduler)
+    assert await resilience.call(slow, endpoint="getccs", priority=Priority.BULK) == "ok"
+    # bulk_limit defaults to max_concurrent - 1, so bulk reads are never hedged
+    assert resilience.hedger.hedged == 0 and scheduler.started[Priority.BULK] == 1
+    resilience.hedger = warmed_hedger("getccs")
+    assert await resilience.call(slow, endpoint="getccs") == "ok"
+    assert resilience.hedger.hedged == 1 and max(peak) == 2
+    for _ in range(3):
+        await asyncio.sleep(0)
+    # the hedge's slot is returned once the loser is cancelled
+    assert scheduler.active == 0
@@ -0,0 +1,74 @@
+"""Tests for per-endpoint request instrumentation."""
+import json
+import math
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pettracer.client import PetTracerClient, PetTracerError
+from pettracer.instrumentation import Histogram, RequestMetrics
+from pettracer.pipeline import Pipeline, Request
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram([0.1, 1.0, 10.0])
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.1, 0.5, 2.0, 20.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (10.0, 4), (math.inf, 5)]
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(1.0) == math.inf
+    assert histogram.mean == pytest.approx(22.65 / 5)
+
+
+@pytest.mark.asyncio
+async def test_traced_session_records_phases_bytes_and_parse():
+    body = [{"id": i} for i in range(50)]
+
+    async def handler(request):
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/api/map/getccs", handler)
+    async with TestServer(app) as server:
+        metrics = RequestMetrics()
+        pipeline = Pipeline(metrics=metrics)
+        async with aiohttp.ClientSession(trace_configs=[metrics.trace_config()]) as session:
+            request = Request(
+                "getccs", "GET", str(server.make_url("/api/map/getccs")), "testing",
+                token="t", parse=len,
+            )
+            assert await pipeline.send(request, session) == 50
+    stats = metrics.endpoint("getccs")
+    assert stats.statuses == {200: 1}
+    assert stats.bytes.count == 1
+    assert stats.bytes.sum == len(json.dumps(body).encode())
+    assert stats.connect.count == 1 and stats.server.count == 1
+    assert stats.wait.count == 1 and stats.download.count == 1
+    assert stats.parse.count == 1
+
+
+@pytest.mark.asyncio
+async def test_client_metrics_cover_latency_statuses_and_errors(mock_session):
+    statuses = [200, 404]
+
+    def handler(method, url, json):
+        if url.endswith("/login"):
+            return {"access_token": "tok"}
+        return mock_session.response([{"id": 1}], status=statuses.pop(0))
+
+    mock_session.handler = handler
+    client = PetTracerClient()
+    await client.login("user", "pass")
+    await client.get_all_devices()
+    with pytest.raises(PetTracerError):
+        await client.get_all_devices()
+    stats = client.metrics.endpoint("getccs")
+    assert stats.requests == 2 and stats.errors == 1
+    assert stats.latency.count == 2
+    assert stats.statuses == {200: 1, 404: 1}
+    assert stats.parse.count == 1
+    assert len(mock_session.session_class.call_args.kwargs["trace_configs"]) == 1
+    await client.close()
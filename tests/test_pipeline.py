@@ -0,0 +1,87 @@
+"""Tests for the request middleware pipeline."""
+import asyncio
+
+import pytest
+
+from pettracer.client import PetTracerClient, PetTracerError, get_ccs_status
+from pettracer.pipeline import Pipeline, Request, ResponseCache, login_headers, request_headers
+
+
+async def one_device(method, url, json):
+    await asyncio.sleep(0.01)
+    return {"access_token": "tok"} if url.endswith("/login") else [{"id": 1}]
+
+
+def test_headers_are_prebuilt_per_token(monkeypatch):
+    assert request_headers("a") is request_headers("a")
+    assert request_headers("a")["Authorization"] == "Bearer a"
+    monkeypatch.setenv("PETTRACER_TOKEN", "env-token")
+    assert request_headers(None)["Authorization"] == "Bearer env-token"
+    monkeypatch.delenv("PETTRACER_TOKEN")
+    assert "Authorization" not in request_headers(None)
+    headers = login_headers({"login": "u", "password": "p"})
+    assert "Authorization" not in headers
+    assert headers["Content-Length"] == str(len('{"login": "u", "password": "p"}'))
+
+
+@pytest.mark.asyncio
+async def test_custom_middleware_and_decoder(mock_session):
+    mock_session.handler = one_device
+    seen = []
+
+    async def record(request, call_next):
+        seen.append(request.endpoint)
+        return await call_next(request)
+
+    async def wrap(request, response):
+        return {"wrapped": await response.json()}
+
+    pipeline = Pipeline([record, *Pipeline().middleware], decoder=wrap)
+    request = Request("getccs", "GET", "https://example.test/getccs", "testing", token="t")
+    assert await pipeline.send(request, mock_session) == {"wrapped": [{"id": 1}]}
+    assert seen == ["getccs"]
+    assert mock_session.calls[0].headers["Authorization"] == "Bearer t"
+
+    async def short_circuit(request, call_next):
+        return []
+
+    assert await get_ccs_status(session=mock_session, token="t", pipeline=Pipeline([short_circuit])) == []
+    assert len(mock_session.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_metrics_and_user_middleware(mock_session):
+    async def fail_profile(request, call_next):
+        if request.endpoint == "profile":
+            raise PetTracerError("blocked")
+        return await call_next(request)
+
+    client = PetTracerClient(middleware=[fail_profile])
+    await client.login("user", "pass")
+    await client.get_all_devices()
+    await client.get_all_devices()
+    with pytest.raises(PetTracerError):
+        await client.get_user_profile()
+    assert client.metrics.endpoint("getccs").requests == 2
+    assert client.metrics.endpoint("login").requests == 1
+    assert client.metrics.endpoint("profile").errors == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_hits_and_coalesces(mock_session):
+    mock_session.handler = one_device
+    now = [0.0]
+    cache = ResponseCache(ttl=5, clock=lambda: now[0])
+    client = PetTracerClient(response_cache=cache)
+    await client.login("user", "pass")
+    results = await asyncio.gather(*(client.get_all_devices() for _ in range(3)))
+    assert all(devices[0].id == 1 for devices in results)
+    assert cache.coalesced == 2
+    await client.get_all_devices()
+    assert cache.hits == 1
+    now[0] = 10.0
+    await client.get_all_devices()
+    # login (not idempotent) bypasses the cache; two fetches for getccs
+    assert mock_session.endpoints() == ["login", "getccs", "getccs"]
+    await client.close()
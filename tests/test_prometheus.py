@@ -0,0 +1,85 @@
+"""Tests for the Prometheus metrics exporter."""
+import aiohttp
+import pytest
+
+from pettracer.client import PetTracerClient
+from pettracer.pipeline import ResponseCache
+from pettracer.prometheus import CONTENT_TYPE, MetricsServer, render_metrics
+from pettracer.resilience import BreakerPolicy, CircuitBreaker
+
+
+@pytest.mark.asyncio
+async def test_render_counters_and_histograms(mock_session):
+    def handler(method, url, json):
+        return {"access_token": "tok"} if url.endswith("/login") else [{"id": 1}, {"id": 2}]
+
+    mock_session.handler = handler
+    client = PetTracerClient(response_cache=ResponseCache(ttl=60))
+    await client.login("user", "pass")
+    await client.login("user", "pass")
+    await client.get_all_devices()
+    await client.get_all_devices()
+    text = render_metrics(client)
+    await client.close()
+
+    lines = text.splitlines()
+    assert "# TYPE pettracer_requests_total counter" in lines
+    assert 'pettracer_requests_total{endpoint="getccs"} 2' in lines
+    assert 'pettracer_request_errors_total{endpoint="getccs"} 0' in lines
+    assert 'pettracer_responses_total{endpoint="getccs",code="200"} 1' in lines
+    assert "pettracer_cache_hits_total 1" in lines
+    assert "pettracer_cache_misses_total 1" in lines
+    assert "pettracer_coalesced_requests_total 0" in lines
+    assert "pettracer_retries_total 0" in lines
+    # devices returned by polls, cached reads included
+    assert "pettracer_devices_polled_total 4" in lines
+    assert "pettracer_token_refreshes_total 1" in lines
+    assert "# TYPE pettracer_parse_duration_seconds histogram" in lines
+    assert 'pettracer_parse_duration_seconds_bucket{endpoint="getccs",le="+Inf"} 2' in lines
+    assert 'pettracer_request_duration_seconds_count{endpoint="getccs"} 2' in lines
+    assert 'pettracer_request_duration_seconds_bucket{endpoint="login",le="+Inf"} 2' in lines
+    for phase in ("response_download", "connection_queued", "dns", "connect", "server"):
+        assert f"# TYPE pettracer_{phase}_seconds histogram" in lines
+    assert text.endswith("\n")
+
+
+def test_render_without_traffic_or_optional_features():
+    client = PetTracerClient(timeout_policy=None)
+    text = render_metrics(client)
+    assert "pettracer_devices_polled_total 0" in text
+    assert "pettracer_requests_total{" not in text
+    assert "cache_hits" not in text and "hedged" not in text and "timeouts_total" not in text
+
+
+def test_circuit_gauges_report_half_open_probe_as_rejecting():
+    now = [0.0]
+    client = PetTracerClient()
+    breaker = client.resilience.breaker = CircuitBreaker(BreakerPolicy(failure_threshold=1, reset_timeout=10),
+                                                         clock=lambda: now[0])
+    lines = render_metrics(client).splitlines()
+    assert 'pettracer_circuit_state{state="closed"} 1' in lines
+    assert "pettracer_circuit_open 0" in lines
+
+    breaker.on_failure()
+    now[0] = 11.0
+    breaker.before_call()
+    lines = render_metrics(client).splitlines()
+    assert 'pettracer_circuit_state{state="half_open"} 1' in lines
+    assert 'pettracer_circuit_state{state="open"} 0' in lines
+    assert "pettracer_circuit_open 1" in lines
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_exposition_format():
+    client = PetTracerClient()
+    client.metrics.endpoint('we"ird\\name').requests = 3
+    async with MetricsServer(client, port=0) as server:
+        assert server.port != 0
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{server.port}/metrics") as resp:
+                assert resp.status == 200
+                assert resp.headers["Content-Type"] == CONTENT_TYPE
+                body = await resp.text()
+            async with session.get(f"http://127.0.0.1:{server.port}/other") as resp:
+                assert resp.status == 404
+    assert 'pettracer_requests_total{endpoint="we\\"ird\\\\name"} 3' in body.splitlines()
@@ -0,0 +1,114 @@
+"""Tests for the token bucket and adaptive concurrency."""
+import asyncio
+
+import pytest
+
+from pettracer.client import PetTracerClient
+from pettracer.ratelimit import AdaptiveConcurrency, Throttle, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        await bucket.acquire()
+    assert clock.now == 0.0
+    await bucket.acquire()
+    await bucket.acquire()
+    assert clock.now == pytest.approx(1.0)
+    assert not bucket.try_acquire()
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_returns_its_tokens_and_try_acquire_does_not_jump_the_queue():
+    clock = FakeClock()
+    wake = asyncio.Event()
+
+    async def sleep(delay):
+        await wake.wait()
+
+    bucket = TokenBucket(rate=1, burst=1, clock=clock, sleep=sleep)
+    await bucket.acquire()
+    waiter = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0)
+    # a token arrives while the waiter is still queued; it belongs to the waiter
+    clock.now = 1.0
+    assert not bucket.try_acquire()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bucket.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_aimd_increases_when_healthy_and_backs_off_on_overload():
+    limiter = AdaptiveConcurrency(initial=4, min_limit=1, max_limit=8)
+    for _ in range(40):
+        await limiter.acquire()
+        await limiter.release(0.1, overloaded=False)
+    assert limiter.limit == 8
+
+    await limiter.acquire()
+    await limiter.release(None, overloaded=True)
+    assert limiter.limit == 4
+    # only one decrease per window
+    await limiter.acquire()
+    await limiter.release(None, overloaded=True)
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_backs_off_on_latency_growth():
+    limiter = AdaptiveConcurrency(initial=4, latency_tolerance=2.0)
+    for _ in range(10):
+        await limiter.acquire()
+        await limiter.release(0.1, overloaded=False)
+    before = limiter.limit
+    await limiter.acquire()
+    await limiter.release(1.0, overloaded=False)
+    assert limiter.limit < before
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_enforced():
+    limiter = AdaptiveConcurrency(initial=2, max_limit=2)
+    throttle = Throttle(concurrency=limiter)
+    peak = 0
+
+    async def attempt():
+        nonlocal peak
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0)
+        return True
+
+    assert all(await asyncio.gather(*(throttle.run(attempt) for _ in range(6))))
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_client_requests_go_through_limiter(mock_session):
+    bucket = TokenBucket(rate=1, burst=5)
+    client = PetTracerClient(rate_limiter=bucket, adaptive_concurrency=AdaptiveConcurrency())
+    await client.login("user", "pass")
+    await client.get_all_devices()
+    assert not bucket.try_acquire(4)
+    assert client.resilience.throttle.concurrency.in_flight == 0
+    await client.close()
@@ -0,0 +1,159 @@
+"""Tests for retry, retry budget and circuit breaker."""
+import asyncio
+import random
+
+import pytest
+import aiohttp
+
+from pettracer.client import get_ccs_status, login, PetTracerClient, PetTracerError
+from pettracer.errors import CircuitOpenError
+from pettracer.resilience import BreakerPolicy, CircuitBreaker, Resilience, RetryPolicy
+
+
+def answer_with(mock_session, statuses):
+    """Answer requests with the next status from `statuses`, then 200."""
+    def handler(method, url, json):
+        status = statuses.pop(0) if statuses else 200
+        return mock_session.response({"access_token": "tok"} if url.endswith("/login") else [], status)
+
+    mock_session.handler = handler
+    return mock_session
+
+
+def no_sleep_resilience(**retry):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    return Resilience(RetryPolicy(**retry), BreakerPolicy(failure_threshold=100), random.Random(1), sleep), delays
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_with_backoff(mock_session):
+    resilience, delays = no_sleep_resilience(max_attempts=3, base_delay=1.0)
+    devices = await get_ccs_status(session=answer_with(mock_session, [502, 503]), token="t", resilience=resilience)
+    assert devices == []
+    assert len(mock_session.calls) == 3
+    assert resilience.retries == 2
+    # full jitter within the exponential envelope
+    assert 0 <= delays[0] <= 1.0 and 0 <= delays[1] <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_permanent_errors_and_login_are_not_retried(mock_session):
+    resilience, _ = no_sleep_resilience()
+    with pytest.raises(PetTracerError):
+        await get_ccs_status(session=answer_with(mock_session, [404]), token="t", resilience=resilience)
+    assert len(mock_session.calls) == 1
+
+    mock_session.calls.clear()
+    with pytest.raises(PetTracerError):
+        await login("u", "p", session=answer_with(mock_session, [503]), resilience=resilience)
+    assert len(mock_session.calls) == 1
+    assert resilience.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries(mock_session):
+    resilience, _ = no_sleep_resilience(max_attempts=5, budget_min_retries=2, budget_ratio=0.0)
+    with pytest.raises(PetTracerError):
+        await get_ccs_status(session=answer_with(mock_session, [500] * 10), token="t", resilience=resilience)
+    assert len(mock_session.calls) == 3
+    assert resilience.budget_exhausted == 1
+
+
+def test_circuit_breaker_opens_and_probes():
+    now = [0.0]
+    breaker = CircuitBreaker(BreakerPolicy(failure_threshold=2, reset_timeout=10), clock=lambda: now[0])
+    breaker.before_call()
+    breaker.on_failure()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 11.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    # only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 22.0
+    breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_while_circuit_is_open(mock_session):
+    answer_with(mock_session, [200] + [503] * 10)
+    client = PetTracerClient(retry_policy=None, breaker_policy=BreakerPolicy(failure_threshold=2))
+    await client.login("user", "pass")
+    for _ in range(2):
+        with pytest.raises(PetTracerError):
+            await client.get_all_devices()
+    with pytest.raises(CircuitOpenError):
+        await client.get_all_devices()
+    assert len(mock_session.calls) == 3
+    assert client.resilience.rejected == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_or_cancelled_probe_does_not_wedge_breaker():
+    now = [0.0]
+    resilience = Resilience(retry_policy=None)
+    resilience.breaker = CircuitBreaker(BreakerPolicy(failure_threshold=1, reset_timeout=10), clock=lambda: now[0])
+
+    async def transient():
+        raise aiohttp.ServerDisconnectedError()
+
+    async def invalid_json():
+        raise PetTracerError("Invalid JSON response while testing")
+
+    async def hang():
+        await asyncio.sleep(3600)
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(aiohttp.ClientError):
+        await resilience.call(transient)
+    now[0] = 11.0
+    # probe answered with an undecodable body: the portal is up
+    with pytest.raises(PetTracerError):
+        await resilience.call(invalid_json)
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(aiohttp.ClientError):
+        await resilience.call(transient)
+    now[0] = 22.0
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(resilience.call(hang), 0.01)
+    # the cancelled probe gave no verdict; the next call probes again
+    assert resilience.breaker.state == CircuitBreaker.HALF_OPEN
+    assert await resilience.call(ok) == "ok"
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_default_client_sends_once_and_never_opens_circuit(mock_session):
+    def handler(method, url, json):
+        if url.endswith("/login"):
+            return {"access_token": "tok"}
+        return mock_session.response([], status=503)
+
+    mock_session.handler = handler
+    client = PetTracerClient()
+    await client.login("user", "pass")
+    for _ in range(10):
+        with pytest.raises(PetTracerError) as exc:
+            await client.get_all_devices()
+        assert not isinstance(exc.value, CircuitOpenError)
+    assert mock_session.endpoints() == ["login"] + ["getccs"] * 10
+    assert client.resilience.retries == 0 and client.resilience.breaker is None
+    await client.close()
@@ -0,0 +1,132 @@
+"""Tests for incrementally maintained daily rollups."""
+from datetime import date, timedelta
+import subprocess
+import sys
+
+import pytest
+
+from pettracer.rollups import RollupEngine
+from pettracer.types import Device
+
+from conftest import T0, make_pos
+
+
+# 2025-12-30 22:00 UTC, so ten-minute fixes cross midnight
+EVENING = T0 - timedelta(hours=11)
+# ~11 m per 1e-4 degrees of latitude
+STEP = 1e-4
+
+
+def step_pos(pid, i, **fields):
+    """Fix `i` of a track moving STEP north every ten minutes from EVENING."""
+    return make_pos(51.4 + i * STEP, -1.08, minutes=10 * i, t0=EVENING, id=pid, **fields)
+
+
+def make_device(bat, home, minutes):
+    return Device.from_dict({
+        "id": 7,
+        "bat": bat,
+        "home": home,
+        "lastContact": (EVENING + timedelta(minutes=minutes)).isoformat(),
+    })
+
+
+def test_positions_split_per_day_with_exact_distance():
+    engine = RollupEngine()
+    # 22:00 .. 01:50, one fix per 10 minutes
+    track = [step_pos(i, i, sat=8 + i % 2) for i in range(24)]
+    assert engine.add_positions(7, track) == 24
+
+    day1 = engine.get(7, date(2025, 12, 30))
+    day2 = engine.get(7, date(2025, 12, 31))
+    assert day1.fix_count == 12 and day2.fix_count == 12
+    # hops within each day only: 11 hops of ~11.1 m each
+    assert day1.distance_m == pytest.approx(11 * 11.12, rel=0.01)
+    assert day2.distance_m == pytest.approx(day1.distance_m, rel=1e-6)
+    assert day1.sat_mean == pytest.approx(8.5)
+    assert day1.rssi_mean == pytest.approx(100)
+    assert [r.day for r in engine.daily(7, date(2025, 12, 1), date(2025, 12, 31))] == [
+        date(2025, 12, 30), date(2025, 12, 31)]
+
+
+def test_incremental_and_out_of_order_syncs_match_full_rebuild():
+    track = [step_pos(i, i) for i in range(1, 11)]
+    full = RollupEngine()
+    full.add_positions(7, track)
+
+    engine = RollupEngine()
+    engine.add_positions(7, track[::2])
+    engine.add_positions(7, track[1::2])
+    # overlapping re-sync is ignored
+    assert engine.add_positions(7, track[:4]) == 0
+
+    a = engine.get(7, date(2025, 12, 30))
+    b = full.get(7, date(2025, 12, 30))
+    assert a.fix_count == b.fix_count == 10
+    assert a.distance_m == pytest.approx(b.distance_m)
+
+
+def test_closed_days_ignore_late_fixes_until_replaced():
+    engine = RollupEngine(open_days=1)
+    engine.add_positions(7, [step_pos(1, 1), step_pos(2, 2)])
+    # a fix on the next day closes 2025-12-30
+    engine.add_positions(7, [step_pos(20, 20)])
+    assert engine.add_positions(7, [step_pos(3, 3)]) == 0
+    assert engine.late_fixes == 1
+    assert engine.get(7, date(2025, 12, 30)).fix_count == 2
+
+    row = engine.replace_day(7, date(2025, 12, 30), [step_pos(i, i) for i in range(1, 6)])
+    assert row.fix_count == 5
+    assert engine.get(7, date(2025, 12, 30)) is row
+
+
+def test_device_snapshots_track_battery_and_home_time():
+    engine = RollupEngine(max_snapshot_gap=timedelta(minutes=30))
+    engine.add_device_snapshot(make_device(4100, True, 100))    # 23:40
+    engine.add_device_snapshot(make_device(4050, True, 130))    # 00:10, 30 min at home
+    engine.add_device_snapshot(make_device(4000, False, 150))   # 00:30, 20 min at home
+    engine.add_device_snapshot(make_device(3950, True, 170))    # away in between
+    engine.add_device_snapshot(make_device(3900, True, 300))    # gap too long
+
+    day1 = engine.get(7, date(2025, 12, 30))
+    day2 = engine.get(7, date(2025, 12, 31))
+    assert day1.time_at_home == timedelta(minutes=20)
+    assert day2.time_at_home == timedelta(minutes=30)
+    assert (day1.battery_min, day1.battery_max) == (4100, 4100)
+    assert (day2.battery_min, day2.battery_max) == (3900, 4050)
+    assert day2.snapshots == 4
+
+
+def test_add_devices_folds_last_position():
+    engine = RollupEngine()
+    device = Device.from_dict({
+        "id": 9,
+        "bat": 4000,
+        "lastContact": EVENING.isoformat(),
+        "lastPos": {"id": 55, "posLat": 51.4, "posLong": -1.08, "sat": 7,
+                    "timeMeasure": EVENING.isoformat()},
+    })
+    engine.add_devices([device, device])
+    row = engine.get(9, date(2025, 12, 30))
+    assert row.fix_count == 1
+    # the same poll result twice is one snapshot
+    assert row.snapshots == 1
+    assert row.battery_min == 4000
+
+
+def test_history_fed_newest_first_keeps_every_day():
+    engine = RollupEngine(open_days=1)
+    days = [[step_pos(d * 1000 + i, d * 144 + i) for i in range(3)] for d in range(4)]
+    for batch in reversed(days):
+        assert engine.add_positions(7, batch) == 3
+    rows = engine.daily(7, date(2025, 12, 1), date(2026, 1, 31))
+    assert [r.fix_count for r in rows] == [3, 3, 3, 3]
+    assert engine.late_fixes == 0
+    # older days were closed after their batch was folded
+    assert engine.add_positions(7, [step_pos(99, 1)]) == 0
+    assert engine.late_fixes == 1
+
+
+def test_rollups_and_segmentation_import_without_numpy():
+    code = "import sys; sys.modules['numpy'] = None; import pettracer.rollups, pettracer.segmentation"
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,92 @@
+"""Tests for the priority request scheduler."""
+import asyncio
+
+import pytest
+
+from pettracer.client import PetTracerClient
+from pettracer.scheduler import Priority, RequestScheduler
+
+
+@pytest.mark.asyncio
+async def test_waiters_start_by_priority_then_arrival():
+    scheduler = RequestScheduler(max_concurrent=1)
+    await scheduler.acquire(Priority.BULK)
+    order = []
+
+    async def request(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    tasks = [
+        asyncio.ensure_future(request("bulk", Priority.BULK)),
+        asyncio.ensure_future(request("poll-1", Priority.POLLING)),
+        asyncio.ensure_future(request("poll-2", Priority.POLLING)),
+        asyncio.ensure_future(request("interactive", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queued() == 4
+    scheduler.release(Priority.BULK)
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "poll-1", "poll-2", "bulk"]
+    assert scheduler.active == 0
+    assert scheduler.started[Priority.BULK] == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_only_uses_spare_capacity():
+    scheduler = RequestScheduler(max_concurrent=3, bulk_limit=2)
+    await scheduler.acquire(Priority.BULK)
+    await scheduler.acquire(Priority.BULK)
+    third = asyncio.ensure_future(scheduler.acquire(Priority.BULK))
+    await asyncio.sleep(0)
+    assert not third.done() and scheduler.queued(Priority.BULK) == 1
+    # the reserved slot is free for interactive work despite the queued bulk request
+    await asyncio.wait_for(scheduler.acquire(Priority.INTERACTIVE), 1)
+    scheduler.release(Priority.INTERACTIVE)
+    scheduler.release(Priority.BULK)
+    await asyncio.wait_for(third, 1)
+    with pytest.raises(ValueError):
+        RequestScheduler(max_concurrent=2, bulk_limit=3)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_block_queue():
+    scheduler = RequestScheduler(max_concurrent=1)
+    await scheduler.acquire(Priority.POLLING)
+    waiter = asyncio.ensure_future(scheduler.acquire(Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release(Priority.POLLING)
+    assert scheduler.queued() == 0
+    await asyncio.wait_for(scheduler.acquire(Priority.BULK), 1)
+
+
+@pytest.mark.asyncio
+async def test_interactive_get_info_jumps_queued_backfill_requests(mock_session):
+    gate = asyncio.Event()
+
+    async def handler(method, url, json):
+        if url.endswith("/login"):
+            return {"access_token": "tok"}
+        if len(mock_session.calls) == 2:
+            await gate.wait()
+        return {"id": 7} if url.endswith("getccinfo") else []
+
+    mock_session.handler = handler
+    scheduler = RequestScheduler(max_concurrent=1)
+    client = PetTracerClient(scheduler=scheduler)
+    await client.login("user", "pass")
+    device = client.get_device(7)
+    bulk = [
+        asyncio.ensure_future(device.get_positions(0, 1, priority=Priority.BULK))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    info = asyncio.ensure_future(device.get_info())
+    await asyncio.sleep(0.01)
+    gate.set()
+    await asyncio.gather(info, *bulk)
+    assert mock_session.endpoints()[1:] == ["getccpositions", "getccinfo", "getccpositions", "getccpositions"]
+    await client.close()
@@ -0,0 +1,71 @@
+"""Tests for stay-point and trip segmentation."""
+from datetime import timedelta
+
+import pytest
+
+from pettracer.segmentation import FleetSegmenter, StayPoint, StaySegmenter, Trip, segment_track
+from pettracer.types import Device
+
+from conftest import T0, make_pos
+
+
+# ~11 m per 1e-4 degrees of latitude
+STEP = 1e-4
+
+
+def day_track():
+    """Rest at home 20 min, walk 10 min north, rest 30 min, walk back."""
+    track = [make_pos(51.4, -1.08, minutes=m) for m in range(0, 21)]
+    track += [make_pos(51.4 + (i + 1) * 10 * STEP, -1.08, minutes=20 + i + 1) for i in range(10)]
+    track += [make_pos(51.41, -1.08, minutes=m) for m in range(31, 62)]
+    track += [make_pos(51.41 - (i + 1) * 10 * STEP, -1.08, minutes=61 + i + 1) for i in range(5)]
+    return track
+
+
+def test_segment_track_alternates_stays_and_trips():
+    segments = segment_track(day_track(), radius_m=30, min_dwell=timedelta(minutes=10))
+    kinds = [type(s).__name__ for s in segments]
+    assert kinds == ["StayPoint", "Trip", "StayPoint", "Trip"]
+
+    home, walk, rest, back = segments
+    assert home.dwell == timedelta(minutes=20)
+    assert home.lat == pytest.approx(51.4)
+    assert walk.start == home.end and walk.end == rest.start
+    assert walk.distance_m == pytest.approx(1112, rel=0.01)
+    assert walk.duration == timedelta(minutes=10)
+    assert rest.count == 32
+    assert back.end == T0 + timedelta(minutes=66)
+    assert back.distance_m == pytest.approx(556, rel=0.01)
+
+
+def test_streaming_matches_batch_and_ignores_repeated_polls():
+    """Feeding fixes one by one (with duplicates) gives the batch result."""
+    track = day_track()
+    seg = StaySegmenter(radius_m=30, min_dwell=timedelta(minutes=10))
+    streamed = []
+    for p in track:
+        device = Device.from_dict({"id": 1})
+        device.lastPos = p
+        streamed += seg.push_device(device)
+        streamed += seg.push_device(device)
+    streamed += seg.flush()
+    assert streamed == segment_track(track, radius_m=30, min_dwell=timedelta(minutes=10))
+    assert seg.last_time == track[-1].timeMeasure
+
+
+def test_short_pause_is_part_of_trip():
+    track = [make_pos(51.4 + i * 10 * STEP, -1.08, minutes=i) for i in range(5)]
+    track += [make_pos(51.4 + 4 * 10 * STEP, -1.08, minutes=m) for m in range(5, 8)]
+    segments = segment_track(track, radius_m=30, min_dwell=timedelta(minutes=10))
+    assert len(segments) == 1
+    assert isinstance(segments[0], Trip)
+    assert segments[0].count == len(track)
+
+
+def test_fleet_segmenter_keeps_devices_separate():
+    fleet = FleetSegmenter(radius_m=30, min_dwell=timedelta(minutes=10))
+    out = fleet.push_positions(1, day_track()[:25])
+    assert [type(s) for s in out] == [StayPoint]
+    assert fleet.push_positions(2, day_track()[:5]) == []
+    assert fleet.push_devices([Device.from_dict({"id": 3})]) == {}
+    assert fleet.segmenter(1) is not fleet.segmenter(2)
@@ -0,0 +1,63 @@
+"""Tests for track simplification."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.simplify import douglas_peucker, project_local, radial_distance, simplify_positions
+
+from conftest import make_pos
+
+
+def test_project_local_scale():
+    """0.001 degrees of latitude projects to roughly 111 m north."""
+    xy = project_local(np.array([51.0, 51.001]), np.array([-1.0, -1.0]))
+    assert xy[0].tolist() == [0.0, 0.0]
+    assert xy[1, 0] == pytest.approx(0.0)
+    assert xy[1, 1] == pytest.approx(111.2, rel=1e-3)
+
+
+def test_douglas_peucker_collinear_keeps_endpoints():
+    """Points on a straight line collapse to the two endpoints."""
+    xy = np.column_stack([np.arange(100.0), np.zeros(100)])
+    assert douglas_peucker(xy, 0.5).tolist() == [0, 99]
+
+
+def test_douglas_peucker_keeps_corner():
+    """An L-shaped track keeps its corner."""
+    xy = np.array([[0, 0], [5, 0], [10, 0], [10, 5], [10, 10]], dtype=float)
+    assert douglas_peucker(xy, 1.0).tolist() == [0, 2, 4]
+
+
+def test_douglas_peucker_time_aware_keeps_speed_change():
+    """SED keeps a stop on a straight line that plain DP would drop."""
+    xy = np.array([[0, 0], [1, 0], [2, 0], [10, 0]], dtype=float)
+    t = np.array([0.0, 10.0, 20.0, 30.0])
+    assert douglas_peucker(xy, 1.0).tolist() == [0, 3]
+    assert 2 in douglas_peucker(xy, 1.0, t=t).tolist()
+
+
+def test_radial_distance_tolerance_and_interval():
+    """Radial filter skips close points but keeps them after max_interval."""
+    xy = np.column_stack([np.arange(10.0), np.zeros(10)])
+    t = np.arange(10.0) * 60
+    assert radial_distance(xy, 3.5).tolist() == [0, 4, 8, 9]
+    assert radial_distance(xy, 3.5, t=t, max_interval=90).tolist() == [0, 2, 4, 6, 8, 9]
+
+
+def test_radial_distance_large_gap_between_kept_points():
+    """Window growth finds a far point well beyond the initial window."""
+    xy = np.zeros((5000, 2))
+    xy[-1] = [100.0, 0.0]
+    assert radial_distance(xy, 10.0).tolist() == [0, 4999]
+
+
+def test_simplify_positions_returns_original_records():
+    """simplify_positions returns LastPos objects in time order."""
+    positions = [make_pos(51.0 + i * 1e-4, -1.0, i * 10) for i in range(20)]
+    positions.append(make_pos(51.0019, -0.99, 200))
+    result = simplify_positions(list(reversed(positions)), tolerance=5.0)
+    assert result[0] is positions[0]
+    assert result[-1] is positions[-1]
+    assert len(result) == 3
+    with pytest.raises(ValueError):
+        simplify_positions(positions, tolerance=5.0, method="bogus")
@@ -0,0 +1,70 @@
+"""Tests for the spatial position index."""
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.spatial import PositionIndex
+from pettracer.trajectory import haversine
+
+from conftest import T0, make_pos
+
+
+def random_history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 51.40 + rng.uniform(-0.02, 0.02, n)
+    lon = -1.08 + rng.uniform(-0.02, 0.02, n)
+    return [make_pos(float(lat[i]), float(lon[i]), i * 10, id=i) for i in range(n)]
+
+
+def test_query_bbox_matches_linear_scan_with_time_filter():
+    positions = random_history(3000)
+    index = PositionIndex(cell_size_deg=0.002)
+    assert index.add_positions(1, positions) == 3000
+
+    start, end = T0 + timedelta(seconds=5000), T0 + timedelta(seconds=20000)
+    box = (51.395, -1.085, 51.405, -1.075)
+    expected = [
+        p for p in positions
+        if box[0] <= p.posLat <= box[2] and box[1] <= p.posLong <= box[3] and start <= p.timeMeasure <= end
+    ]
+    result = index.query_bbox(1, *box, start=start, end=end)
+    assert [p.id for p in result] == [p.id for p in expected]
+
+
+def test_query_radius_matches_linear_scan():
+    positions = random_history(2000, seed=1)
+    index = PositionIndex()
+    index.add_positions(1, positions)
+    result = index.query_radius(1, 51.40, -1.08, 300.0)
+    expected = [p for p in positions if haversine(51.40, -1.08, p.posLat, p.posLong) <= 300.0]
+    assert {p.id for p in result} == {p.id for p in expected}
+    assert result == sorted(result, key=lambda p: p.timeMeasure)
+
+
+def test_incremental_updates_skip_duplicates_and_resort():
+    """Overlapping syncs are de-duplicated and late data is still found in order."""
+    index = PositionIndex()
+    index.add_positions(1, [make_pos(51.4, -1.08, 100, id=1), make_pos(51.4, -1.08, 200, id=2)])
+    assert len(index.query_bbox(1, 51.39, -1.09, 51.41, -1.07)) == 2
+
+    assert index.add_positions(1, [make_pos(51.4, -1.08, 200, id=2), make_pos(51.4, -1.08, 50, id=3)]) == 1
+    result = index.query_bbox(1, 51.39, -1.09, 51.41, -1.07)
+    assert [p.id for p in result] == [3, 1, 2]
+    assert index.count(1) == 3
+
+
+def test_query_all_devices_and_unknown_device():
+    index = PositionIndex()
+    index.add_positions(1, [make_pos(51.4, -1.08, 0, id=1)])
+    index.add_positions(2, [make_pos(51.4, -1.08, 0, id=1), make_pos(10.0, 10.0, 0, id=2)])
+    assert len(index.query_radius(None, 51.4, -1.08, 10)) == 2
+    assert index.query_radius(99, 51.4, -1.08, 10) == []
+    assert sorted(index.device_ids) == [1, 2]
+    assert len(index) == 3
+
+
+def test_invalid_cell_size():
+    with pytest.raises(ValueError):
+        PositionIndex(cell_size_deg=0)
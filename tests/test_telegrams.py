@@ -0,0 +1,73 @@
+"""Tests for incremental telegram ingestion."""
+import pytest
+
+from pettracer.client import PetTracerError, _parse_devices, get_ccs_status
+from pettracer.telegrams import TelegramTracker
+from pettracer.types import FifoEntry
+
+
+def fifo(tid, rssi=-60):
+    return {
+        "telegram": {"id": tid, "deviceId": 14758, "hsId": 10775, "telegram": "0a1b2c", "cmd": 1},
+        "receivedBy": [{"hsId": 10775, "rssi": rssi}],
+    }
+
+
+def device(tlg_nr, ids, device_id=14758):
+    return {"id": device_id, "lastTlgNr": tlg_nr, "fiFo": [fifo(i) for i in ids]}
+
+
+def test_only_new_telegrams_are_emitted():
+    tracker = TelegramTracker()
+    first = tracker.ingest(device(5, [103, 101, 102]))
+    assert [e.telegram.id for e in first] == [101, 102, 103]
+    assert all(isinstance(e, FifoEntry) for e in first)
+    assert tracker.last_id(14758) == 103
+
+    second = tracker.ingest(device(6, [102, 103, 104, 104]))
+    assert [e.telegram.id for e in second] == [104]
+
+
+def test_unchanged_tlg_nr_skips_scan():
+    tracker = TelegramTracker()
+    tracker.ingest(device(5, [1, 2]))
+    assert tracker.ingest(device(5, [1, 2, 3])) == []
+    assert tracker.skipped_polls == 1
+    # devices are tracked independently
+    assert len(tracker.ingest(device(5, [1, 2], device_id=99))) == 2
+
+
+def test_retained_history_is_capped():
+    tracker = TelegramTracker(max_retained=3)
+    tracker.ingest(device(1, [1, 2]))
+    tracker.ingest(device(2, [2, 3, 4]))
+    assert [e.telegram.id for e in tracker.retained(14758)] == [2, 3, 4]
+    assert TelegramTracker().retained(14758) == []
+
+    tracker.reset(14758)
+    assert tracker.last_id(14758) is None
+    assert len(tracker.ingest(device(2, [2, 3, 4]))) == 3
+
+
+def test_failed_response_does_not_mark_telegrams_seen():
+    tracker = TelegramTracker(max_retained=10)
+    with pytest.raises(PetTracerError):
+        _parse_devices([device(1, [10, 11]), 42], telegrams=tracker)
+    assert tracker.last_id(14758) is None and tracker.retained(14758) == []
+
+    devices = _parse_devices([device(1, [10, 11])], telegrams=tracker)
+    assert [e.telegram.id for e in devices[0].fiFo] == [10, 11]
+    assert tracker.last_id(14758) == 11
+
+
+@pytest.mark.asyncio
+async def test_get_ccs_status_with_tracker_returns_new_fifo_only(mock_session):
+    responses = [[device(1, [10, 11])], [device(2, [10, 11, 12])]]
+    mock_session.handler = lambda method, url, json: responses.pop(0)
+
+    tracker = TelegramTracker()
+    devices = await get_ccs_status(token="t", telegrams=tracker)
+    assert [e.telegram.id for e in devices[0].fiFo] == [10, 11]
+    devices = await get_ccs_status(token="t", telegrams=tracker)
+    assert [e.telegram.id for e in devices[0].fiFo] == [12]
+    assert devices[0].lastTlgNr == 2
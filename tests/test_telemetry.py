@@ -0,0 +1,77 @@
+"""Tests for ring-buffer device telemetry."""
+from datetime import timedelta
+import random
+
+import pytest
+
+from pettracer.telemetry import RingSeries, TelemetryStore
+from pettracer.types import Device
+
+from conftest import T0
+
+
+def test_rolling_stats_match_window_after_wraparound():
+    rng = random.Random(3)
+    series = RingSeries(capacity=16)
+    samples = [(1.7e9 + 60 * i, rng.uniform(3500, 4200)) for i in range(100)]
+    for ts, v in samples:
+        series.push(ts, v)
+
+    window = samples[-16:]
+    values = [v for _, v in window]
+    assert len(series) == 16
+    assert series.min == min(values)
+    assert series.max == max(values)
+    assert series.mean == pytest.approx(sum(values) / 16)
+    assert list(series.times()) == [ts for ts, _ in window]
+    assert list(series.values()) == values
+    assert series.latest == values[-1]
+
+    n = 16
+    mt = sum(ts for ts, _ in window) / n
+    mv = sum(values) / n
+    slope = sum((ts - mt) * (v - mv) for ts, v in window) / sum((ts - mt) ** 2 for ts, _ in window)
+    assert series.slope == pytest.approx(slope)
+
+
+def test_time_to_threshold_on_linear_discharge():
+    series = RingSeries(capacity=32)
+    for i in range(10):
+        # 10 units per hour
+        series.push(1.7e9 + 3600 * i, 4000 - 10 * i)
+    assert series.slope == pytest.approx(-10 / 3600)
+    assert series.time_to(3800) == pytest.approx(timedelta(hours=11), abs=timedelta(seconds=1))
+    assert series.time_to(4200) is None
+
+
+def test_stale_samples_are_ignored():
+    series = RingSeries(capacity=4)
+    assert series.push(100.0, 1)
+    assert not series.push(100.0, 2)
+    assert not series.push(50.0, 3)
+    assert len(series) == 1
+    assert series.slope is None
+    with pytest.raises(ValueError):
+        RingSeries(capacity=0)
+
+
+def test_store_feeds_series_from_polls():
+    store = TelemetryStore(capacity=8)
+    for i in range(3):
+        device = Device.from_dict({
+            "id": 7,
+            "bat": 4100 - i * 50,
+            "chg": 0,
+            "lastRssi": -70 - i,
+            "lastContact": (T0 + timedelta(minutes=5 * i)).isoformat(),
+            "masterHs": {"id": 1, "bat": 5000},
+        })
+        store.push_devices([device, device])
+
+    telemetry = store.get(7)
+    assert store.device_ids() == [7]
+    assert list(telemetry.bat.values()) == [4100, 4050, 4000]
+    assert telemetry.lastRssi.min == -72
+    assert len(telemetry.hs_bat) == 3
+    assert len(telemetry.status) == 0
+    assert telemetry.bat.slope == pytest.approx(-50 / 300)
@@ -0,0 +1,68 @@
+"""Tests for the time index."""
+import math
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.timeindex import TimeIndex
+
+from conftest import T0, make_pos
+
+
+@pytest.fixture
+def index():
+    return TimeIndex([
+        make_pos(51.2, -1.2, 120, id=3),
+        make_pos(51.0, -1.0, 0, id=1),
+        make_pos(51.1, -1.1, 60, id=2),
+        make_pos(51.5, -1.5, 3600, id=4),
+    ])
+
+
+def test_add_sorts_and_deduplicates(index):
+    assert len(index) == 4
+    assert index.start == T0
+    assert index.end == T0 + timedelta(hours=1)
+    assert index.add([make_pos(0, 0, 60, id=2), make_pos(51.6, -1.6, 4000, id=5)]) == 1
+    assert [p.id for p in index.range(T0, T0 + timedelta(hours=2))] == [1, 2, 3, 4, 5]
+
+
+def test_nearest(index):
+    assert index.nearest(T0 + timedelta(seconds=25)).id == 1
+    assert index.nearest(T0 + timedelta(seconds=35)).id == 2
+    assert index.nearest(T0 + timedelta(seconds=60)).id == 2
+    assert index.nearest(T0 - timedelta(days=1)).id == 1
+    assert index.nearest(T0 + timedelta(seconds=1800), max_gap=timedelta(minutes=5)) is None
+    assert TimeIndex().nearest(T0) is None
+
+
+def test_interpolate(index):
+    where = index.interpolate(T0 + timedelta(seconds=30))
+    assert where.lat == pytest.approx(51.05)
+    assert where.lon == pytest.approx(-1.05)
+    assert (where.before.id, where.after.id) == (1, 2)
+
+    exact = index.interpolate(T0 + timedelta(seconds=60))
+    assert exact.before is exact.after
+    assert exact.lat == 51.1
+
+    assert index.interpolate(T0 - timedelta(seconds=1)) is None
+    assert index.interpolate(T0 + timedelta(hours=2)) is None
+    assert index.interpolate(T0 + timedelta(seconds=600), max_gap=timedelta(minutes=10)) is None
+
+
+def test_resample_with_gap_masking(index):
+    track = index.resample(T0, T0 + timedelta(seconds=240), timedelta(seconds=60), max_gap=timedelta(minutes=10))
+    assert track.times.size == 5
+    assert track.lat[:3].tolist() == pytest.approx([51.0, 51.1, 51.2])
+    assert math.isnan(track.lat[3]) and math.isnan(track.lon[4])
+
+    track = index.resample(T0 - timedelta(seconds=60), T0 + timedelta(seconds=90), timedelta(seconds=30))
+    assert math.isnan(track.lat[0]) and math.isnan(track.lat[1])
+    assert track.lat[2:].tolist() == pytest.approx([51.0, 51.05, 51.1, 51.15])
+    assert TimeIndex.to_datetimes(track.times[:1]) == [T0 - timedelta(seconds=60)]
+
+    with pytest.raises(ValueError):
+        index.resample(T0, T0, timedelta(0))
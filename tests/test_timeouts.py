@@ -0,0 +1,96 @@
+"""Tests for adaptive per-endpoint timeouts."""
+import asyncio
+
+import pytest
+
+from pettracer.client import PetTracerClient, get_ccpositions, get_ccs_status
+from pettracer.resilience import Resilience
+from pettracer.timeouts import AdaptiveTimeouts, LatencyHistogram, TimeoutPolicy
+
+
+def test_histogram_quantile_within_bucket_resolution():
+    histogram = LatencyHistogram()
+    for i in range(1, 101):
+        histogram.add(i / 100)
+    assert histogram.quantile(0.5) == pytest.approx(0.5, rel=0.13)
+    assert histogram.quantile(0.99) == pytest.approx(0.99, rel=0.13)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_read_budget_adapts_and_is_clamped():
+    timeouts = AdaptiveTimeouts(TimeoutPolicy(min_samples=5, multiplier=3.0, min_read=0.5, max_read=10.0, connect=2.0))
+    assert timeouts.read_budget("getccs") is None
+    fallback = timeouts.timeout("getccs", 10)
+    assert fallback.total == 10 and fallback.connect == 2.0
+
+    for _ in range(5):
+        timeouts.observe("getccs", 0.4)
+    budget = timeouts.read_budget("getccs")
+    assert 1.1 <= budget <= 1.4
+    timeout = timeouts.timeout("getccs", 10)
+    assert timeout.sock_read == budget and timeout.connect == 2.0
+    assert timeout.total == pytest.approx(2.0 + budget)
+
+    for _ in range(5):
+        timeouts.observe("getccinfo", 0.01)
+        timeouts.observe("getccpositions", 30.0)
+    assert timeouts.read_budget("getccinfo") == 0.5
+    assert timeouts.read_budget("getccpositions") == 10.0
+
+
+def test_position_budget_scales_with_range():
+    timeouts = AdaptiveTimeouts(TimeoutPolicy(min_samples=3))
+    day_ms = 86_400_000
+    assert timeouts.range_scale(day_ms // 2) == 1.0
+    # a 4-day range taking 4 s is one second per unit of work
+    for _ in range(3):
+        timeouts.observe("getccpositions", 4.0, timeouts.range_scale(4 * day_ms))
+    one_day = timeouts.read_budget("getccpositions")
+    assert timeouts.read_budget("getccpositions", timeouts.range_scale(7 * day_ms)) == pytest.approx(7 * one_day)
+
+
+def test_caller_timeout_and_max_read_cap_adaptive_budget():
+    timeouts = AdaptiveTimeouts(TimeoutPolicy(min_samples=3, max_read=60.0))
+    for _ in range(3):
+        timeouts.observe("getccpositions", 30.0)
+    # a year of history must not get hours of read budget
+    assert timeouts.read_budget("getccpositions", timeouts.range_scale(365 * 86_400_000)) == 60.0
+    # the caller's timeout is a ceiling, never overridden
+    timeout = timeouts.timeout("getccpositions", 20, timeouts.range_scale(365 * 86_400_000))
+    assert timeout.total == 20 and timeout.sock_read == 15.0
+
+    for _ in range(20):
+        timeouts.observe("getccs", 0.2)
+    timeout = timeouts.timeout("getccs", 120)
+    assert timeout.total < 120 and timeout.sock_read < 120
+    assert PetTracerClient().resilience.timeouts is None
+
+
+@pytest.mark.asyncio
+async def test_attempt_latency_and_timeouts_are_recorded():
+    timeouts = AdaptiveTimeouts(TimeoutPolicy(min_samples=1))
+    resilience = Resilience(None, None, timeouts=timeouts)
+
+    async def ok():
+        return "ok"
+
+    async def slow():
+        raise asyncio.TimeoutError()
+
+    assert await resilience.call(ok, endpoint="getccs") == "ok"
+    assert timeouts.read_budget("getccs") is not None
+    with pytest.raises(asyncio.TimeoutError):
+        await resilience.call(slow, endpoint="getccs")
+    assert timeouts.timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_helpers_use_adaptive_timeouts(mock_session):
+    timeouts = AdaptiveTimeouts(TimeoutPolicy(min_samples=1, min_read=1.0))
+    resilience = Resilience(None, None, timeouts=timeouts)
+    timeouts.observe("getccpositions", 0.1)
+
+    await get_ccs_status(session=mock_session, token="t", resilience=resilience)
+    assert mock_session.calls[-1].timeout.total == 10 and mock_session.calls[-1].timeout.sock_read is None
+    await get_ccpositions(1, 0, 3 * 86_400_000, session=mock_session, token="t", resilience=resilience)
+    assert mock_session.calls[-1].timeout.sock_read == pytest.approx(3.0)
@@ -0,0 +1,87 @@
+"""Tests for vectorized trajectory metrics."""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pettracer.trajectory import (
+    PositionArrays,
+    compute_fleet_metrics,
+    compute_metrics,
+    haversine,
+    initial_bearing,
+)
+
+from conftest import make_pos
+
+
+def test_haversine_one_degree_latitude():
+    """One degree of latitude is roughly 111.2 km."""
+    d = haversine(0.0, 0.0, 1.0, 0.0)
+    assert d == pytest.approx(111195, rel=1e-3)
+
+
+def test_initial_bearing_cardinal_directions():
+    """Bearings point north, east, south and west as expected."""
+    assert initial_bearing(0, 0, 1, 0) == pytest.approx(0.0)
+    assert initial_bearing(0, 0, 0, 1) == pytest.approx(90.0)
+    assert initial_bearing(1, 0, 0, 0) == pytest.approx(180.0)
+    assert initial_bearing(0, 1, 0, 0) == pytest.approx(270.0)
+
+
+def test_position_arrays_sorts_and_drops_incomplete():
+    """Records without coordinates are dropped and rows are sorted by time."""
+    positions = [
+        make_pos(51.1, -1.0, 20),
+        make_pos(None, -1.0, 5),
+        make_pos(51.0, -1.0, 0, sat=None),
+    ]
+    arrays = PositionArrays.from_positions(positions)
+    assert len(arrays) == 2
+    assert arrays.lat.tolist() == [51.0, 51.1]
+    assert math.isnan(arrays.sat[0])
+    assert arrays.t[1] - arrays.t[0] == 20
+
+
+def test_compute_metrics_matches_scalar_loop():
+    """Vectorized metrics agree with a straightforward per-segment loop."""
+    positions = [make_pos(51.40 + i * 1e-4, -1.08 + i * 2e-4, i * 10) for i in range(6)]
+    metrics = compute_metrics(positions)
+
+    expected = [
+        float(haversine(a.posLat, a.posLong, b.posLat, b.posLong))
+        for a, b in zip(positions, positions[1:])
+    ]
+    assert metrics.distance.tolist() == pytest.approx(expected)
+    assert metrics.duration.tolist() == [10.0] * 5
+    assert metrics.speed.tolist() == pytest.approx([d / 10 for d in expected])
+    assert metrics.cumulative[0] == 0.0
+    assert metrics.total_distance == pytest.approx(sum(expected))
+
+
+def test_compute_metrics_zero_duration_speed_is_nan():
+    """Duplicate timestamps give NaN speed rather than a division error."""
+    metrics = compute_metrics([make_pos(51.0, -1.0, 0), make_pos(51.001, -1.0, 0)])
+    assert math.isnan(metrics.speed[0])
+
+
+def test_compute_metrics_short_tracks():
+    """Empty and single-fix tracks produce empty segment arrays."""
+    assert compute_metrics([]).total_distance == 0.0
+    single = compute_metrics([make_pos(51.0, -1.0, 0)])
+    assert single.distance.size == 0
+    assert single.cumulative.tolist() == [0.0]
+
+
+def test_compute_fleet_metrics_does_not_join_devices():
+    """Fleet metrics equal per-device metrics with no cross-device segment."""
+    a = [make_pos(51.0, -1.0, i * 10) for i in range(3)]
+    b = [make_pos(10.0, 10.0 + i * 1e-3, i * 5) for i in range(4)]
+    fleet = compute_fleet_metrics({1: a, 2: b, 3: []})
+
+    assert fleet[1].distance.size == 2
+    assert fleet[2].distance.size == 3
+    assert fleet[3].distance.size == 0
+    np.testing.assert_allclose(fleet[2].distance, compute_metrics(b).distance)
+    np.testing.assert_allclose(fleet[2].cumulative, compute_metrics(b).cumulative)
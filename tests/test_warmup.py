@@ -0,0 +1,86 @@
+"""Tests for connection warm-up and reuse statistics."""
+from unittest.mock import patch
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pettracer.client import PetTracerClient
+from pettracer.warmup import ConnectionWarmer, WarmupPolicy
+
+from conftest import MockSession
+
+
+@pytest.mark.asyncio
+async def test_warm_connections_are_reused():
+    async def ok(request):
+        return web.json_response([])
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    app.router.add_get("/api", ok)
+    async with TestServer(app) as server:
+        warmer = ConnectionWarmer(WarmupPolicy(url=str(server.make_url("/")), connections=2))
+        async with aiohttp.ClientSession(trace_configs=[warmer.stats.trace_config()]) as session:
+            assert await warmer.warm(session) == 2
+            assert warmer.stats.created == 2
+
+            async def fetch():
+                async with session.get(server.make_url("/api")) as resp:
+                    return await resp.json()
+
+            await asyncio.gather(fetch(), fetch())
+            assert warmer.stats.created == 2
+            assert warmer.stats.reused == 2
+            assert warmer.stats.reuse_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_warm_failures_are_ignored():
+    warmer = ConnectionWarmer(WarmupPolicy(url="http://127.0.0.1:9/", connections=2, timeout=1))
+    async with aiohttp.ClientSession() as session:
+        assert await warmer.warm(session) == 0
+    assert warmer.stats.reuse_ratio is None
+
+
+@pytest.mark.asyncio
+async def test_keep_warm_pings_while_active_then_rewarms_after_gap():
+    now = [0.0]
+    pinged = []
+
+    async def sleep(delay):
+        now[0] += delay
+        await asyncio.sleep(0)
+
+    session = MockSession(lambda method, url, json: pinged.append(now[0]))
+    policy = WarmupPolicy(connections=2, idle_after=10, keep_warm_for=30, keepalive_timeout=15)
+    warmer = ConnectionWarmer(policy, clock=lambda: now[0], sleep=sleep)
+    warmer.start(session)
+    for _ in range(20):
+        await asyncio.sleep(0)
+    # initial warm-up of 2, then one ping every 10 s until 30 s after the last request
+    assert pinged == [0.0, 0.0, 10.0, 20.0]
+    assert warmer.pings == 2 and warmer.warmups == 3
+
+    now[0] = 100.0
+    warmer.touch()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    # cold pool: the other connection is re-opened and pings resume
+    assert warmer.warmups >= 4 and pinged[4] >= 100.0
+    await warmer.stop()
+
+
+@pytest.mark.asyncio
+async def test_client_warms_after_login(mock_session):
+    with patch('aiohttp.TCPConnector'):
+        client = PetTracerClient(warmup=WarmupPolicy(connections=3))
+        await client.login("user", "pass")
+        await asyncio.sleep(0.01)
+        heads = [call.url for call in mock_session.calls if call.method == "HEAD"]
+        assert heads == ["https://portal.pettracer.com/"] * 3
+        assert "trace_configs" in mock_session.session_class.call_args.kwargs
+        assert client.connection_stats.reuse_ratio is None
+        await client.close()